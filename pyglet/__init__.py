@@ -132,6 +132,30 @@ if getattr(sys, 'frozen', None):
 #:     this option is enabled if ``__debug__`` is (i.e., if Python was not run
 #:     with the -O option).  It is disabled by default when pyglet is "frozen"
 #:     within a py2exe or py2app library archive.
+#:
+#:     Since pyglet 1.3, the checked calls are also counted for
+#:     `pyglet.gl.lib.get_call_count` and
+#:     `pyglet.gl.lib.get_frame_call_count`; when this option is disabled,
+#:     GL calls are not counted.
+#:
+#: debug_gl_deferred
+#:     If True (and ``debug_gl`` is enabled), GL calls are not checked
+#:     individually; instead ``glGetError`` is called once per
+#:     `pyglet.graphics.Batch.draw` and `pyglet.window.Window.flip`.  This
+#:     has a much smaller performance impact than checking every call.  When
+#:     an error is detected, the exception lists the GL calls made since the
+#:     previous check, and per-call checking is enabled from then on.  The
+#:     default is False.
+#:
+#:     **Since:** pyglet 1.3
+#:
+#: debug_gl_check_interval
+#:     In deferred mode, additionally check for GL errors after this many
+#:     GL calls in a frame.  The default is 0, which only checks at the
+#:     points listed under ``debug_gl_deferred``.
+#:
+#:     **Since:** pyglet 1.3
+#:
 #: shadow_window
 #:     By default, pyglet creates a hidden window with a GL context when
 #:     pyglet.gl is imported.  This allows resources to be loaded before
@@ -176,6 +200,57 @@ if getattr(sys, 'frozen', None):
 #:
 #:     **Since:** pyglet 1.2
 #:
+#: graphics_compact_threshold
+#:     Fraction of free space in a vertex domain that may be held in holes
+#:     between vertex lists before the domain is compacted.  Compaction moves
+#:     all vertex lists into one contiguous range (so the domain is drawn
+#:     with a single call) and shrinks its buffers; it happens automatically
+#:     the next time the domain is drawn by its batch, provided the holes
+#:     also make up at least a quarter of the domain's capacity.  A value
+#:     of 0.5 is a reasonable choice for applications that delete many
+#:     vertex lists at once.  The default is None, which disables automatic
+#:     compaction; `pyglet.graphics.vertexdomain.VertexDomain.compact` can
+#:     still be called explicitly.  In the environment variable, ``none``
+#:     or an empty value means None.
+#:
+#:     **Since:** pyglet 1.3
+#:
+#: graphics_numpy
+#:     If True, the attribute properties of vertex lists (``vertices``,
+#:     ``colors``, ``tex_coords``, etc.) return NumPy arrays that are views
+#:     of the vertex buffers, rather than ctypes arrays.  This allows a
+#:     single vectorized assignment to update many vertices.  Interleaved
+#:     (``static``) attributes cannot be viewed as flat arrays, and are
+#:     returned as usual.  Requires NumPy.  The default is False.
+#:
+#:     **Since:** pyglet 1.3
+#:
+#: graphics_arena
+#:     If True, vertex domains sub-allocate their buffers from large buffers
+#:     shared by all domains of a context (see
+#:     `pyglet.graphics.vertexbuffer.BufferArena`), and grow them in smaller
+#:     steps.  This reduces the memory used by applications with many small
+#:     batches or groups.  The default is False.
+#:
+#:     **Since:** pyglet 1.3
+#:
+#: coalesce_mouse_motion
+#:     If True, consecutive mouse motion (or drag) events are merged into a
+#:     single ``on_mouse_motion`` (or ``on_mouse_drag``) event with the
+#:     latest position and the summed ``dx`` and ``dy``.  This reduces the
+#:     number of events dispatched for high-rate mice and tablets.  The
+#:     initial value of `pyglet.window.Window.coalesce_mouse_motion`; the
+#:     default is False.
+#:
+#:     **Since:** pyglet 1.3
+#:
+#: profile_frames
+#:     If True, `pyglet.profiler` records the time spent in scheduled
+#:     functions, ``on_draw``, ``flip`` and batch drawing in each frame of
+#:     the `pyglet.app` event loop.  The default is False.
+#:
+#:     **Since:** pyglet 1.3
+#:
 options = {
     'audio': ('directsound', 'pulse', 'openal', 'silent'),
     'font': ('gdiplus', 'win32'), # ignored outside win32; win32 is deprecated
@@ -183,6 +258,8 @@ options = {
     'debug_gl': not _enable_optimisations,
     'debug_gl_trace': False,
     'debug_gl_trace_args': False,
+    'debug_gl_deferred': False,
+    'debug_gl_check_interval': 0,
     'debug_graphics_batch': False,
     'debug_lib': False,
     'debug_media': False,
@@ -194,6 +271,11 @@ options = {
     'debug_win32': False,
     'debug_x11': False,
     'graphics_vbo': True,
+    'graphics_compact_threshold': None,
+    'graphics_numpy': False,
+    'graphics_arena': False,
+    'coalesce_mouse_motion': False,
+    'profile_frames': False,
     'shadow_window': True,
     'vsync': None,
     'xsync': True,
@@ -209,6 +291,8 @@ _option_types = {
     'debug_gl': bool,
     'debug_gl_trace': bool,
     'debug_gl_trace_args': bool,
+    'debug_gl_deferred': bool,
+    'debug_gl_check_interval': int,
     'debug_graphics_batch': bool,
     'debug_lib': bool,
     'debug_media': bool,
@@ -220,6 +304,11 @@ _option_types = {
     'debug_win32': bool,
     'debug_x11': bool,
     'graphics_vbo': bool,
+    'graphics_compact_threshold': float,
+    'graphics_numpy': bool,
+    'graphics_arena': bool,
+    'coalesce_mouse_motion': bool,
+    'profile_frames': bool,
     'shadow_window': bool,
     'vsync': bool,
     'xsync': bool,
@@ -255,8 +344,15 @@ def _read_environment():
                 options[key] = value in ('true', 'TRUE', 'True', '1')
             elif _option_types[key] is int:
                 options[key] = int(value)
+            elif _option_types[key] is float:
+                if value.lower() in ('', 'none'):
+                    options[key] = None
+                else:
+                    options[key] = float(value)
         except KeyError:
             pass
+        except ValueError:
+            warnings.warn('Ignoring invalid value %r for %s' % (value, env))
 _read_environment()
 
 if compat_platform == 'cygwin':
@@ -412,6 +508,7 @@ if True:
     input = _ModuleProxy('input')
     lib = _ModuleProxy('lib')
     media = _ModuleProxy('media')
+    profiler = _ModuleProxy('profiler')
     resource = _ModuleProxy('resource')
     sprite = _ModuleProxy('sprite')
     text = _ModuleProxy('text')
@@ -432,6 +529,7 @@ if False:
     from . import image
     from . import lib
     from . import media
+    from . import profiler
     from . import resource
     from . import sprite
     from . import text
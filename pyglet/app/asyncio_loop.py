@@ -0,0 +1,219 @@
+# ----------------------------------------------------------------------------
+# pyglet
+# Copyright (c) 2006-2008 Alex Holkner
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions 
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright 
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of pyglet nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+
+
+'''Run the pyglet event loop inside an asyncio event loop.
+
+`AsyncioEventLoop` replaces the blocking ``select`` of the X11 platform event
+loop with readers on the asyncio event loop for the X display connections and
+input devices, and schedules the next iteration of the pyglet clock with
+``call_at``.  Network code using asyncio can then run in the same thread as
+pyglet, without polling::
+
+    import asyncio
+    import pyglet
+    from pyglet.app.asyncio_loop import AsyncioEventLoop
+
+    pyglet.app.event_loop = AsyncioEventLoop()
+    window = pyglet.window.Window()
+
+    async def receive(reader):
+        while True:
+            line = await reader.readline()
+            # ... update the scene
+            window.invalid = True
+            await pyglet.app.event_loop.next_frame()
+
+    loop = asyncio.get_event_loop()
+    reader, writer = loop.run_until_complete(
+        asyncio.open_connection('localhost', 8000))
+    loop.create_task(receive(reader))
+    pyglet.app.run()
+
+`AsyncioEventLoop.start` starts processing pyglet events without blocking,
+for applications that run the asyncio event loop themselves.
+
+Requires Python 3.4 or later (3.5 for the ``async def`` syntax of the
+example) and the X11 platform event loop.
+
+:since: pyglet 1.3
+'''
+
+__docformat__ = 'restructuredtext'
+__version__ = '$Id$'
+
+import asyncio
+
+from pyglet import app
+from pyglet.app import AppException
+from pyglet.app.base import EventLoop
+
+
+class AsyncioEventLoop(EventLoop):
+    '''Event loop that runs on an asyncio event loop.
+
+    Windows, the clock and the events of `EventLoop` behave as with the
+    default event loop; `run` runs the asyncio event loop until `exit` is
+    called.
+    '''
+
+    def __init__(self, loop=None):
+        '''Create an event loop.
+
+        :Parameters:
+            `loop` : `asyncio.AbstractEventLoop`
+                The asyncio event loop to run on.  If None, the current
+                event loop is used when the pyglet event loop starts.
+
+        '''
+        super(AsyncioEventLoop, self).__init__()
+        self.loop = loop
+
+        # File descriptors registered with the asyncio loop, by device.
+        self._readers = {}
+        self._step_handle = None
+        self._timer_handle = None
+        self._exit_future = None
+        self._frame_futures = []
+
+    def run(self):
+        '''Begin processing events, scheduled functions and window updates.
+
+        Runs the asyncio event loop, including any other tasks scheduled on
+        it, until `has_exit` is set to True.
+        '''
+        if self.loop is None:
+            self.loop = asyncio.get_event_loop()
+        self.loop.run_until_complete(self.start())
+
+    def start(self):
+        '''Begin processing events, scheduled functions and window updates
+        on the asyncio event loop, without blocking.
+
+        :rtype: `asyncio.Future`
+        :return: A future that is done when the event loop exits.
+        '''
+        platform_event_loop = app.platform_event_loop
+        if not hasattr(platform_event_loop, '_select_devices'):
+            raise AppException(
+                'asyncio integration requires the X11 event loop')
+        if self.loop is None:
+            self.loop = asyncio.get_event_loop()
+
+        self.has_exit = False
+        self._legacy_setup()
+        platform_event_loop.start()
+        self.dispatch_event('on_enter')
+        self.is_running = True
+
+        self._exit_future = asyncio.Future(loop=self.loop)
+        self._request_step()
+        return self._exit_future
+
+    def next_frame(self):
+        '''Wait for the next iteration of the event loop.
+
+        The returned future is done after the next call to `idle`, which
+        calls scheduled functions and draws the windows that need it::
+
+            await pyglet.app.event_loop.next_frame()
+
+        :rtype: `asyncio.Future`
+        '''
+        future = asyncio.Future(loop=self.loop)
+        self._frame_futures.append(future)
+        self._request_step()
+        return future
+
+    def _request_step(self):
+        if self._step_handle is None and self.is_running:
+            self._step_handle = self.loop.call_soon(self._step)
+
+    def _on_readable(self, device):
+        device.select()
+        self._request_step()
+
+    def _update_readers(self):
+        devices = app.platform_event_loop._select_devices
+        for device in list(self._readers):
+            if device not in devices:
+                self.loop.remove_reader(self._readers.pop(device))
+        for device in devices:
+            if device not in self._readers:
+                fileno = device.fileno()
+                self.loop.add_reader(fileno, self._on_readable, device)
+                self._readers[device] = fileno
+
+    def _step(self):
+        self._step_handle = None
+        if self._timer_handle is not None:
+            self._timer_handle.cancel()
+            self._timer_handle = None
+
+        # Devices can hold events that were already read from their file
+        # (for example, Xlib's event queue), which readers do not see.
+        for device in list(app.platform_event_loop._select_devices):
+            if device.poll():
+                device.select()
+
+        if not self.has_exit:
+            self._update_readers()
+            timeout = self.idle()
+
+            frame_futures = self._frame_futures
+            self._frame_futures = []
+            for future in frame_futures:
+                if not future.done():
+                    future.set_result(None)
+
+        if self.has_exit:
+            self._stop()
+        elif timeout is not None:
+            self._timer_handle = self.loop.call_at(
+                self.loop.time() + timeout, self._step)
+
+    def _stop(self):
+        for fileno in self._readers.values():
+            self.loop.remove_reader(fileno)
+        self._readers.clear()
+        self.is_running = False
+
+        self.dispatch_event('on_exit')
+        app.platform_event_loop.stop()
+
+        for future in self._frame_futures:
+            future.cancel()
+        self._frame_futures = []
+        if not self._exit_future.done():
+            self._exit_future.set_result(None)
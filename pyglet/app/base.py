@@ -14,6 +14,7 @@ from pyglet import app
 from pyglet import compat_platform
 from pyglet import clock
 from pyglet import event
+from pyglet import profiler
 
 _is_epydoc = hasattr(sys, 'is_epydoc') and sys.is_epydoc
 
@@ -112,6 +113,27 @@ class EventLoop(event.EventDispatcher):
     _has_exit_condition = None
     _has_exit = False
 
+    #: If True, `idle` draws only the windows that need it: windows that have
+    #: `pyglet.window.Window.invalid` set, or that handled an event since
+    #: they were last drawn.  `invalid` is cleared after the window is
+    #: drawn, so scheduled functions must set it on the windows they change.
+    #: If False (the default), running any scheduled function redraws every
+    #: window.
+    #:
+    #: This saves drawing and buffer swaps in applications with several
+    #: windows that change independently::
+    #:
+    #:     pyglet.app.event_loop.redraw_invalid_only = True
+    #:
+    #:     def update_chart(dt):
+    #:         # ...
+    #:         chart_window.invalid = True
+    #:     pyglet.clock.schedule_interval(update_chart, 1 / 60.)
+    #:
+    #: :type: bool
+    #: :since: pyglet 1.3
+    redraw_invalid_only = False
+
     def __init__(self):
         self._has_exit_condition = threading.Condition()
         self.clock = clock.get_default()
@@ -257,7 +279,8 @@ class EventLoop(event.EventDispatcher):
         second, or immediately after any user events.
 
         The default implementation dispatches the
-        `pyglet.window.Window.on_draw` event for all windows and uses
+        `pyglet.window.Window.on_draw` event for all windows (or only for
+        invalid windows; see `redraw_invalid_only`) and uses
         `pyglet.clock.tick` and `pyglet.clock.get_sleep_time` on the default
         clock to determine the return value.
 
@@ -269,20 +292,43 @@ class EventLoop(event.EventDispatcher):
         :return: The number of seconds before the idle method should
             be called again, or `None` to block for user input.
         '''
+        if profiler.enabled:
+            profiler.next_frame()
+
         dt = self.clock.update_time()
         redraw_all = self.clock.call_scheduled_functions(dt)
 
-        # Redraw all windows
-        for window in app.windows:
-            if redraw_all or (window._legacy_invalid and window.invalid):
-                window.switch_to()
-                window.dispatch_event('on_draw')
-                window.flip()
-                window._legacy_invalid = False
+        if self.redraw_invalid_only:
+            # Redraw windows that were invalidated or handled events
+            for window in app.windows:
+                if window.invalid or window._legacy_invalid:
+                    window.invalid = False
+                    self._redraw_window(window)
+        else:
+            # Redraw all windows
+            for window in app.windows:
+                if redraw_all or (window._legacy_invalid and window.invalid):
+                    self._redraw_window(window)
 
         # Update timout
         return self.clock.get_sleep_time(True)
 
+    def _redraw_window(self, window):
+        window.switch_to()
+        if profiler.enabled:
+            profiler.begin('on_draw')
+            window.dispatch_event('on_draw')
+            profiler.end()
+            profiler.begin('flip')
+            window.flip()
+            profiler.end()
+        else:
+            window.dispatch_event('on_draw')
+            window.flip()
+        window._legacy_invalid = False
+        window.coalesced_event_count = 0
+        window.redraw_count += 1
+
     def _get_has_exit(self):
         self._has_exit_condition.acquire()
         result = self._has_exit
@@ -117,6 +117,19 @@ Call draw on the ClockDisplay object for each frame::
 There are several options to change the font, color and text displayed
 within the __init__ method.
 
+Average framerate hides occasional long frames.  `get_frame_stats` reports
+percentiles and the worst of recent frame times, and `set_frame_budget`
+counts (and optionally reports) frames that take too long::
+
+    clock.set_frame_budget(1 / 60.)
+    stats = clock.get_frame_stats()
+    print('p99 %.1f ms, %d slow frames' % (stats['p99'] * 1000,
+                                           stats['over_budget']))
+
+These values can also be shown by ClockDisplay::
+
+    fps_display = clock.ClockDisplay(format='%(fps).1f p99 %(p99).1f ms')
+
 Using multiple clocks
 =====================
 
@@ -145,11 +158,16 @@ from builtins import object
 __docformat__ = 'restructuredtext'
 __version__ = '$Id$'
 
-import time
+import bisect
 import ctypes
+import heapq
+import itertools
+import math
+import time
 
 import pyglet.lib
 from pyglet import compat_platform
+from pyglet import profiler
 
 if compat_platform in ('win32', 'cygwin'):
     # Win32 Sleep function is only 10-millisecond resolution, so instead
@@ -187,7 +205,7 @@ class _ScheduledItem(object):
 
 class _ScheduledIntervalItem(object):
     __slots__ = ['func', 'interval', 'last_ts', 'next_ts', 
-                 'args', 'kwargs']
+                 'args', 'kwargs', 'in_heap']
     def __init__(self, func, interval, last_ts, next_ts, args, kwargs):
         self.func = func
         self.interval = interval
@@ -195,6 +213,13 @@ class _ScheduledIntervalItem(object):
         self.next_ts = next_ts
         self.args = args
         self.kwargs = kwargs
+        self.in_heap = False
+
+def _get_rank(n, percentile):
+    # Index of the given percentile in a sorted list of n values, using the
+    # nearest-rank method.
+    rank = int(math.ceil(percentile / 100. * n)) - 1
+    return min(max(rank, 0), n - 1)
 
 def _dummy_schedule_func(*args, **kwargs):
     '''Dummy function that does nothing, placed onto zombie scheduled items
@@ -219,15 +244,46 @@ class Clock(_ClockBase):
     #: to compensate for lazy operating systems.
     SLEEP_UNDERSHOOT = MIN_SLEEP - 0.001
 
+    #: The number of recent frame times kept for `get_frame_stats`.  The
+    #: history is never shorter than the window used by `get_fps`.
+    #:
+    #: :since: pyglet 1.3
+    FRAME_HISTORY = 600
+
     # List of functions to call every tick.
     _schedule_items = None
 
-    # List of schedule interval items kept in sort order.
+    # Heap of (next_ts, sequence number, item) for schedule interval items.
+    # Unscheduled items are left in the heap with a dummy func, and skipped
+    # when they reach the top.
     _schedule_interval_items = None
 
+    # Number of unscheduled items still in the heap.
+    _cancelled_count = 0
+
+    # Items scheduled for each function, so that `unschedule` does not need
+    # to search the schedule.
+    _items_by_func = None
+
+    # Sorted list of the next_ts of interval items in the heap that have not
+    # been unscheduled, used by `schedule_interval_soft`.  It is kept up to
+    # date as items are added and removed, each change costing a binary
+    # search plus a list insertion or deletion.
+    _sorted_times = None
+
     # If True, a sleep(0) is inserted on every tick.   
     _force_sleep = False
 
+    # Ring buffer of recent frame times.  _frame_index is the position of the
+    # next frame time to be written.
+    _frame_times = None
+    _frame_index = 0
+    _frame_count = 0
+
+    _frame_budget = None
+    _frame_budget_callback = None
+    _over_budget_count = 0
+
     def __init__(self, fps_limit=None, time_function=_default_time_function):
         '''Initialise a Clock, with optional framerate limit and custom
         time function.
@@ -247,13 +303,16 @@ class Clock(_ClockBase):
         self.time = time_function
         self.next_ts = self.time()
         self.last_ts = None
-        self.times = []
+        self._frame_times = [0.] * self.FRAME_HISTORY
+        self.cumulative_time = 0
 
         self.set_fps_limit(fps_limit)
-        self.cumulative_time = 0
 
         self._schedule_items = []
         self._schedule_interval_items = []
+        self._items_by_func = {}
+        self._sorted_times = []
+        self._counter = itertools.count()
 
     def update_time(self):
         '''Get the elapsed time since the last call to `update_time`.
@@ -272,14 +331,52 @@ class Clock(_ClockBase):
             delta_t = 0
         else:
             delta_t = ts - self.last_ts
-            self.times.insert(0, delta_t)
-            if len(self.times) > self.window_size:
-                self.cumulative_time -= self.times.pop()
-        self.cumulative_time += delta_t
+            self._add_frame_time(delta_t)
         self.last_ts = ts
 
         return delta_t
 
+    def _add_frame_time(self, delta_t):
+        times = self._frame_times
+        size = len(times)
+        i = self._frame_index
+        budget = self._frame_budget
+
+        # Drop the oldest frame from the FPS window and, if the history is
+        # full, from the history.
+        if self._frame_count >= self.window_size:
+            self.cumulative_time -= times[(i - self.window_size) % size]
+        if self._frame_count == size:
+            if budget is not None and times[i] > budget:
+                self._over_budget_count -= 1
+        else:
+            self._frame_count += 1
+
+        times[i] = delta_t
+        self._frame_index = (i + 1) % size
+        self.cumulative_time += delta_t
+
+        if budget is not None and delta_t > budget:
+            self._over_budget_count += 1
+            if self._frame_budget_callback is not None:
+                self._frame_budget_callback(delta_t)
+
+    def _set_frame_history(self, size):
+        times = self.get_frame_times()[-size:]
+        self._frame_times = times + [0.] * (size - len(times))
+        self._frame_count = len(times)
+        self._frame_index = len(times) % size
+        self._update_frame_totals()
+
+    def _update_frame_totals(self):
+        times = self.get_frame_times()
+        self.cumulative_time = sum(times[-self.window_size:])
+        if self._frame_budget is None:
+            self._over_budget_count = 0
+        else:
+            budget = self._frame_budget
+            self._over_budget_count = len([t for t in times if t > budget])
+
     def call_scheduled_functions(self, dt):
         '''Call scheduled functions that elapsed on the last `update_time`.
 
@@ -296,21 +393,47 @@ class Clock(_ClockBase):
         '''
         ts = self.last_ts
         result = False
+        profiling = profiler.enabled
 
         # Call functions scheduled for every frame  
         # Dupe list just in case one of the items unchedules itself
         for item in list(self._schedule_items):
+            if item.func is _dummy_schedule_func:
+                continue
             result = True
+            if profiling:
+                profiler.begin(profiler.get_func_name(item.func))
             item.func(dt, *item.args, **item.kwargs)
+            if profiling:
+                profiler.end()
+
+        # Take all due interval items off the heap first, so that items
+        # scheduled by the callbacks are not called until the next tick.
+        heap = self._schedule_interval_items
+        due = []
+        while heap and heap[0][0] <= ts:
+            item = heapq.heappop(heap)[2]
+            item.in_heap = False
+            if item.func is _dummy_schedule_func:
+                self._cancelled_count -= 1
+            else:
+                self._remove_time(item.next_ts)
+                due.append(item)
 
         # Call all scheduled interval functions and reschedule for future.
-        need_resort = False
-        # Dupe list just in case one of the items unchedules itself
-        for item in list(self._schedule_interval_items):
-            if item.next_ts > ts:
-                break
+        for item in due:
+            if item.func is _dummy_schedule_func:
+                # Unscheduled by an earlier callback.
+                continue
             result = True
+            if profiling:
+                profiler.begin(profiler.get_func_name(item.func))
             item.func(ts - item.last_ts, *item.args, **item.kwargs)
+            if profiling:
+                profiler.end()
+            if item.func is _dummy_schedule_func:
+                # Unscheduled itself.
+                continue
             if item.interval:
                 # Try to keep timing regular, even if overslept this time;
                 # but don't schedule in the past (which could lead to
@@ -329,18 +452,12 @@ class Clock(_ClockBase):
                         # future.  Unfortunately means the next reported dt is
                         # incorrect (looks like interval but actually isn't).
                         item.last_ts = item.next_ts - item.interval
-                need_resort = True
+                heapq.heappush(heap, (item.next_ts, next(self._counter), item))
+                item.in_heap = True
+                bisect.insort(self._sorted_times, item.next_ts)
             else:
                 item.next_ts = None
-
-        # Remove finished one-shots.
-        self._schedule_interval_items = \
-            [item for item in self._schedule_interval_items \
-             if item.next_ts is not None]
-
-        if need_resort:
-            # TODO bubble up changed items might be faster
-            self._schedule_interval_items.sort(key=lambda a: a.next_ts)
+                self._discard_item(item)
 
         return result
 
@@ -438,14 +555,14 @@ class Clock(_ClockBase):
                 return 0.
             else:
                 wake_time = self.next_ts
-                if self._schedule_interval_items:
-                    wake_time = min(wake_time,
-                                    self._schedule_interval_items[0].next_ts)
+                next_ts = self._get_next_ts()
+                if next_ts is not None:
+                    wake_time = min(wake_time, next_ts)
                 return max(wake_time - self.time(), 0.)
 
-        if self._schedule_interval_items:
-            return max(self._schedule_interval_items[0].next_ts - self.time(),
-                       0)
+        next_ts = self._get_next_ts()
+        if next_ts is not None:
+            return max(next_ts - self.time(), 0)
             
         return None
 
@@ -467,7 +584,12 @@ class Clock(_ClockBase):
             self.period_limit = None
         else:
             self.period_limit = 1. / fps_limit
-        self.window_size = fps_limit or 60
+        self.window_size = int(fps_limit or 60)
+        size = max(self.FRAME_HISTORY, self.window_size)
+        if size != len(self._frame_times):
+            self._set_frame_history(size)
+        else:
+            self._update_frame_totals()
 
     def get_fps_limit(self):
         '''Get the framerate limit.
@@ -492,7 +614,114 @@ class Clock(_ClockBase):
         '''
         if not self.cumulative_time: 
             return 0
-        return len(self.times) / self.cumulative_time
+        return min(self._frame_count, self.window_size) / self.cumulative_time
+
+    @property
+    def times(self):
+        '''The frame times used by `get_fps`, most recent first.
+
+        :type: list of float
+        '''
+        times = self.get_frame_times()[-self.window_size:]
+        times.reverse()
+        return times
+
+    def get_frame_times(self):
+        '''Get the recent history of frame times.
+
+        At most `FRAME_HISTORY` frame times are kept.
+
+        :since: pyglet 1.3
+
+        :rtype: list of float
+        :return: The time in seconds between successive calls to
+            `update_time`, oldest first.
+        '''
+        times = self._frame_times
+        i = self._frame_index
+        if self._frame_count < len(times):
+            return times[:i]
+        return times[i:] + times[:i]
+
+    def get_frame_time_percentile(self, percentile):
+        '''Get a percentile of the recent frame times.
+
+        :Parameters:
+            `percentile` : float
+                Percentile between 0 and 100.  For example, 99 gives the
+                frame time that 99% of recent frames did not exceed.
+
+        :since: pyglet 1.3
+
+        :rtype: float
+        :return: The frame time in seconds, or 0 if no frames have been
+            measured.
+        '''
+        times = sorted(self.get_frame_times())
+        if not times:
+            return 0.
+        return times[_get_rank(len(times), percentile)]
+
+    def get_frame_stats(self):
+        '''Get statistics of the recent frame times.
+
+        Average framerate hides the occasional long frames that are seen as
+        stutter; these statistics describe the distribution of frame times
+        over the last `FRAME_HISTORY` frames.
+
+        The result is a dict with the following keys:
+
+        ``frames``
+            Number of frame times measured.
+        ``mean``, ``p50``, ``p95``, ``p99``
+            Mean, median, 95th and 99th percentile frame time, in seconds.
+        ``worst``
+            The longest frame time, in seconds.
+        ``over_budget``
+            Number of frames longer than the budget given to
+            `set_frame_budget`, or 0 if no budget was set.
+
+        :since: pyglet 1.3
+
+        :rtype: dict
+        '''
+        times = sorted(self.get_frame_times())
+        n = len(times)
+        if not n:
+            return dict(frames=0, mean=0., p50=0., p95=0., p99=0., worst=0.,
+                        over_budget=0)
+        return dict(frames=n,
+                    mean=sum(times) / n,
+                    p50=times[_get_rank(n, 50)],
+                    p95=times[_get_rank(n, 95)],
+                    p99=times[_get_rank(n, 99)],
+                    worst=times[-1],
+                    over_budget=self._over_budget_count)
+
+    def set_frame_budget(self, budget, callback=None):
+        '''Set the longest acceptable frame time.
+
+        Frames longer than the budget are counted in the ``over_budget``
+        value of `get_frame_stats`, and reported to the callback.  For
+        example, to report frames that miss a 60Hz display::
+
+            def on_slow_frame(dt):
+                print('Slow frame: %.1f ms' % (dt * 1000))
+
+            clock.set_frame_budget(1 / 60., on_slow_frame)
+
+        :Parameters:
+            `budget` : float
+                Frame time in seconds, or None to stop counting.
+            `callback` : function
+                Function called with the frame time whenever a frame exceeds
+                the budget, or None.
+
+        :since: pyglet 1.3
+        '''
+        self._frame_budget = budget
+        self._frame_budget_callback = callback
+        self._update_frame_totals()
 
     def schedule(self, func, *args, **kwargs):
         '''Schedule a function to be called every frame.
@@ -511,18 +740,68 @@ class Clock(_ClockBase):
         '''
         item = _ScheduledItem(func, args, kwargs)
         self._schedule_items.append(item)
+        self._add_item(item)
+
+    def _add_item(self, item):
+        items = self._items_by_func.get(item.func)
+        if items is None:
+            self._items_by_func[item.func] = [item]
+        else:
+            items.append(item)
+
+    def _discard_item(self, item):
+        items = self._items_by_func.get(item.func)
+        if items is not None:
+            items.remove(item)
+            if not items:
+                del self._items_by_func[item.func]
 
     def _schedule_item(self, func, last_ts, next_ts, interval, *args, **kwargs):
         item = _ScheduledIntervalItem(
             func, interval, last_ts, next_ts, args, kwargs)
+        heapq.heappush(self._schedule_interval_items,
+                       (next_ts, next(self._counter), item))
+        item.in_heap = True
+        self._add_item(item)
+        bisect.insort(self._sorted_times, next_ts)
+
+    def _remove_time(self, ts):
+        times = self._sorted_times
+        del times[bisect.bisect_left(times, ts)]
+
+    def _get_next_ts(self):
+        # Time of the earliest scheduled interval item, or None.
+        heap = self._schedule_interval_items
+        while heap and heap[0][2].func is _dummy_schedule_func:
+            heapq.heappop(heap)[2].in_heap = False
+            self._cancelled_count -= 1
+        if heap:
+            return heap[0][0]
+        return None
 
-        # Insert in sort order
-        for i, other in enumerate(self._schedule_interval_items):
-            if other.next_ts is not None and other.next_ts > next_ts:
-                self._schedule_interval_items.insert(i, item)
-                break
-        else:
-            self._schedule_interval_items.append(item)
+    def get_schedule_time(self):
+        '''Get the time that delays given to `schedule_once` and
+        `schedule_interval` are measured from.
+
+        This is the time of the last tick, unless it was long ago, in which
+        case it is the current time.
+
+        :since: pyglet 1.3
+
+        :rtype: float
+        '''
+        last_ts = self.last_ts or self.next_ts
+
+        # Schedule from now, unless now is sufficiently close to last_ts, in
+        # which case use last_ts.  This clusters together scheduled items that
+        # probably want to be scheduled together.  The old (pre 1.1.1)
+        # behaviour was to always use self.last_ts, and not look at ts.  The
+        # new behaviour is needed because clock ticks can now be quite
+        # irregular, and span several seconds.
+        ts = self.time()
+        if ts - last_ts > 0.2:
+            return ts
+        return last_ts
 
     def schedule_interval(self, func, interval, *args, **kwargs):
         '''Schedule a function to be called every `interval` seconds.
@@ -539,18 +818,7 @@ class Clock(_ClockBase):
                 The number of seconds to wait between each call.
 
         '''
-        last_ts = self.last_ts or self.next_ts
-
-        # Schedule from now, unless now is sufficiently close to last_ts, in
-        # which case use last_ts.  This clusters together scheduled items that
-        # probably want to be scheduled together.  The old (pre 1.1.1)
-        # behaviour was to always use self.last_ts, and not look at ts.  The
-        # new behaviour is needed because clock ticks can now be quite
-        # irregular, and span several seconds.
-        ts = self.time()
-        if ts - last_ts > 0.2:
-            last_ts = ts
-
+        last_ts = self.get_schedule_time()
         next_ts = last_ts + interval
         self._schedule_item(func, last_ts, next_ts, interval, *args, **kwargs)
 
@@ -597,18 +865,14 @@ class Clock(_ClockBase):
         self._schedule_item(func, last_ts, next_ts, interval, *args, **kwargs)
 
     def _get_soft_next_ts(self, last_ts, interval):
+        times = self._sorted_times
+
         def taken(ts, e):
             '''Return True if the given time has already got an item
             scheduled nearby.
             '''
-            for item in self._schedule_interval_items:
-                if item.next_ts is None:
-                    pass
-                elif abs(item.next_ts - ts) <= e:
-                    return True
-                elif item.next_ts > ts + e:
-                    return False
-            return False
+            i = bisect.bisect_left(times, ts - e)
+            return i < len(times) and times[i] <= ts + e
 
         # Binary division over interval:
         #
@@ -655,13 +919,7 @@ class Clock(_ClockBase):
             `delay` : float
                 The number of seconds to wait before the timer lapses.
         '''
-        last_ts = self.last_ts or self.next_ts
-
-        # See schedule_interval
-        ts = self.time()
-        if ts - last_ts > 0.2:
-            last_ts = ts
-
+        last_ts = self.get_schedule_time()
         next_ts = last_ts + delay
         self._schedule_item(func, last_ts, next_ts, 0, *args, **kwargs)
 
@@ -676,25 +934,42 @@ class Clock(_ClockBase):
                 The function to remove from the schedule.
 
         '''
-        # First replace zombie items' func with a dummy func that does
-        # nothing, in case the list has already been cloned inside tick().
-        # (Fixes issue 326).
-        for item in self._schedule_items:
-            if item.func == func:
-                item.func = _dummy_schedule_func
-
-        for item in self._schedule_interval_items:
-            if item.func == func:
-                item.func = _dummy_schedule_func
-    
-        # Now remove matching items from both schedule lists.
-        self._schedule_items = \
-            [item for item in self._schedule_items \
-                  if item.func is not _dummy_schedule_func]
-
-        self._schedule_interval_items = \
-            [item for item in self._schedule_interval_items \
-                  if item.func is not _dummy_schedule_func]
+        items = self._items_by_func.pop(func, None)
+        if not items:
+            return
+
+        # Replace the items' func with a dummy func that does nothing, in
+        # case they have already been taken from the schedule inside tick().
+        # (Fixes issue 326).  Interval items are left in the heap and
+        # dropped when they reach the top.
+        frame_items = False
+        for item in items:
+            item.func = _dummy_schedule_func
+            if isinstance(item, _ScheduledItem):
+                frame_items = True
+            elif item.in_heap:
+                # Items already taken off the heap by tick() are not
+                # counted; they are never returned to it.
+                self._cancelled_count += 1
+                self._remove_time(item.next_ts)
+
+        if frame_items:
+            self._schedule_items = \
+                [item for item in self._schedule_items \
+                      if item.func is not _dummy_schedule_func]
+
+        # Rebuild the heap when it is mostly unscheduled items.
+        heap = self._schedule_interval_items
+        if self._cancelled_count > 64 and self._cancelled_count > len(heap) // 2:
+            live = []
+            for entry in heap:
+                if entry[2].func is _dummy_schedule_func:
+                    entry[2].in_heap = False
+                else:
+                    live.append(entry)
+            heap[:] = live
+            heapq.heapify(heap)
+            self._cancelled_count = 0
 
 # Default clock.
 _default = Clock()
@@ -767,6 +1042,33 @@ def get_fps():
     '''
     return _default.get_fps()
 
+def get_frame_stats():
+    '''Get statistics of the recent frame times of the default clock.
+
+    See `Clock.get_frame_stats`.
+
+    :since: pyglet 1.3
+
+    :rtype: dict
+    '''
+    return _default.get_frame_stats()
+
+def set_frame_budget(budget, callback=None):
+    '''Set the longest acceptable frame time of the default clock.
+
+    See `Clock.set_frame_budget`.
+
+    :Parameters:
+        `budget` : float
+            Frame time in seconds, or None to stop counting.
+        `callback` : function
+            Function called with the frame time whenever a frame exceeds
+            the budget, or None.
+
+    :since: pyglet 1.3
+    '''
+    _default.set_frame_budget(budget, callback)
+
 def set_fps_limit(fps_limit):
     '''Set the framerate limit for the default clock.
 
@@ -900,7 +1202,10 @@ class ClockDisplay(object):
                 The number of seconds between updating the display.
             `format` : str
                 A format string describing the format of the text.  This
-                string is modulated with the dict ``{'fps' : fps}``.
+                string is modulated with a dict containing ``fps``, and the
+                values of `Clock.get_frame_stats` with frame times in
+                milliseconds; for example
+                ``'%(fps).1f fps, p99 %(p99).1f ms, worst %(worst).1f ms'``.
             `color` : 4-tuple of float
                 The color, including alpha, passed to ``glColor4f``.
             `clock` : `Clock`
@@ -938,8 +1243,11 @@ class ClockDisplay(object):
 
     def update_text(self, dt=0):
         '''Scheduled method to update the label text.''' 
-        fps = self.clock.get_fps()
-        self.label.text = self.format % {'fps': fps}
+        values = self.clock.get_frame_stats()
+        for key in ('mean', 'p50', 'p95', 'p99', 'worst'):
+            values[key] *= 1000
+        values['fps'] = self.clock.get_fps()
+        self.label.text = self.format % values
 
     def draw(self):
         '''Method called each frame to render the label.'''
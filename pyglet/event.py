@@ -159,6 +159,11 @@ class EventDispatcher(object):
     # Placeholder empty stack; real stack is created only if needed
     _event_stack = ()
 
+    # Tuple of the stack frames with a handler for each event type, from the
+    # top of the stack down.  Created only if needed, and cleared when the
+    # stack is changed.
+    _handler_cache = None
+
     @classmethod
     def register_event_type(cls, name):
         '''Register an event type with the dispatcher.
@@ -244,6 +249,8 @@ class EventDispatcher(object):
             self._event_stack = [{}]
 
         self._event_stack[0][name] = handler
+        if self._handler_cache:
+            self._handler_cache.pop(name, None)
 
     def pop_handlers(self):
         '''Pop the top level of event handlers off the stack.
@@ -251,6 +258,7 @@ class EventDispatcher(object):
         assert self._event_stack and 'No handlers pushed'
 
         del self._event_stack[0]
+        self._handler_cache = None
 
     def remove_handlers(self, *args, **kwargs):
         '''Remove event handlers from the event stack.
@@ -288,6 +296,7 @@ class EventDispatcher(object):
                     del frame[name]
             except KeyError:
                 pass
+        self._handler_cache = None
 
         # Remove the frame if it's empty.
         if not frame:
@@ -313,6 +322,8 @@ class EventDispatcher(object):
             try:
                 if frame[name] == handler:
                     del frame[name]
+                    if self._handler_cache:
+                        self._handler_cache.pop(name, None)
                     break
             except KeyError:
                 pass
@@ -348,27 +359,39 @@ class EventDispatcher(object):
 
         invoked = False
 
-        # Search handler stack for matching event handlers
-        for frame in list(self._event_stack):
+        # Stack frames with a matching event handler.  Frames pushed or
+        # popped by handlers during dispatch do not change which frames are
+        # visited, but each handler is looked up when its frame is reached,
+        # so that handlers removed by an earlier handler are not called.
+        cache = self._handler_cache
+        if cache is None:
+            cache = self._handler_cache = {}
+        frames = cache.get(event_type)
+        if frames is None:
+            frames = cache[event_type] = tuple(
+                frame for frame in self._event_stack
+                if frame.get(event_type, None))
+
+        for frame in frames:
             handler = frame.get(event_type, None)
-            if handler:
-                try:
-                    invoked = True
-                    if handler(*args):
-                        return EVENT_HANDLED
-                except TypeError:
-                    self._raise_dispatch_exception(event_type, args, handler)
-
+            if not handler:
+                continue
+            try:
+                invoked = True
+                if handler(*args):
+                    return EVENT_HANDLED
+            except TypeError:
+                self._raise_dispatch_exception(event_type, args, handler)
 
         # Check instance for an event handler
-        if hasattr(self, event_type):
+        handler = getattr(self, event_type, None)
+        if handler is not None:
             try:
                 invoked = True
-                if getattr(self, event_type)(*args):
+                if handler(*args):
                     return EVENT_HANDLED
             except TypeError:
-                self._raise_dispatch_exception(
-                    event_type, args, getattr(self, event_type))
+                self._raise_dispatch_exception(event_type, args, handler)
 
         if invoked:
             return EVENT_UNHANDLED
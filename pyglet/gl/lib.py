@@ -40,14 +40,29 @@ __docformat__ = 'restructuredtext'
 __version__ = '$Id$'
 
 import ctypes
+from collections import deque
 
 import pyglet
+from pyglet.compat import asstr
 
 __all__ = ['link_GL', 'link_GLU', 'link_AGL', 'link_GLX', 'link_WGL']
 
 _debug_gl = pyglet.options['debug_gl']
 _debug_gl_trace = pyglet.options['debug_gl_trace']
 _debug_gl_trace_args = pyglet.options['debug_gl_trace_args']
+_debug_gl_deferred = _debug_gl and pyglet.options['debug_gl_deferred']
+_debug_gl_check_interval = pyglet.options['debug_gl_check_interval']
+
+#: Number of recent GL calls reported with an error detected in deferred
+#: mode.
+CALL_HISTORY = 32
+
+# Recent (func, arguments) pairs since the last deferred check.
+_call_history = deque(maxlen=CALL_HISTORY)
+
+# GL calls made in the current frame, and in the last completed frame.
+_call_count = 0
+_frame_call_count = 0
 
 class MissingFunctionException(Exception):
     def __init__(self, name, requires=None, suggestions=None):
@@ -82,17 +97,122 @@ class c_void(ctypes.Structure):
 class GLException(Exception):
     pass
 
+def _get_func_name(func):
+    try:
+        return func.__name__
+    except AttributeError:
+        return repr(func)
+
+def _format_call(func, arguments):
+    return '%s(%s)' % (_get_func_name(func),
+                       ', '.join([repr(arg)[:20] for arg in arguments]))
+
+def _raise_error(error, where=None):
+    from pyglet import gl
+    global _debug_gl_deferred
+    msg = ctypes.cast(gl.gluErrorString(error), ctypes.c_char_p).value
+    if not _debug_gl_deferred:
+        raise GLException(msg)
+
+    # The error was raised by one of the calls recorded since the last
+    # check.  Report them, and check each call from now on so that the
+    # next occurrence is raised at the point of failure.
+    calls = [_format_call(func, arguments)
+             for func, arguments in _call_history]
+    _call_history.clear()
+    _debug_gl_deferred = False
+    msg = asstr(msg)
+    if where:
+        msg += ' (detected at %s)' % where
+    if calls:
+        msg += '; most recent GL calls:\n    ' + '\n    '.join(calls)
+    raise GLException(msg)
+
+def check_error(where=None):
+    '''Check for a GL error raised since the last check.
+
+    In deferred mode (the ``debug_gl_deferred`` option), this is called
+    by `pyglet.graphics.Batch.draw` and `pyglet.window.Window.flip`.  The
+    `GLException` raised lists the GL calls made since the previous check,
+    and per-call checking is enabled for the remainder of the program.
+
+    :Parameters:
+        `where` : str
+            Description of the checkpoint, included in the exception
+            message.
+
+    :since: pyglet 1.3
+    '''
+    from pyglet import gl
+    context = gl.current_context
+    if not context:
+        raise GLException('No GL context; create a Window first')
+    if context._gl_begin:
+        return
+    error = gl.glGetError()
+    if error:
+        _raise_error(error, where)
+    _call_history.clear()
+
+def end_frame(where=None):
+    '''Finish counting the GL calls made in a frame.
+
+    Called by `pyglet.window.Window.flip`; in deferred mode, GL errors
+    are also checked.
+
+    :Parameters:
+        `where` : str
+            Description of the checkpoint, included in the exception
+            message of any error.
+
+    :since: pyglet 1.3
+    '''
+    global _call_count, _frame_call_count
+    _frame_call_count = _call_count
+    _call_count = 0
+    if _debug_gl_deferred:
+        check_error(where)
+
+def get_call_count():
+    '''Get the number of GL calls made so far in the current frame.
+
+    GL calls are counted by the error checking of the ``debug_gl``
+    option, so that counting costs nothing in optimised programs; when the
+    option is disabled, the count is always 0.
+
+    :since: pyglet 1.3
+    :rtype: int
+    '''
+    return _call_count
+
+def get_frame_call_count():
+    '''Get the number of GL calls made in the last completed frame.
+
+    As for `get_call_count`, GL calls are only counted when the
+    ``debug_gl`` option is enabled.
+
+    :since: pyglet 1.3
+    :rtype: int
+    '''
+    return _frame_call_count
+
 def errcheck(result, func, arguments):
+    global _call_count
+    _call_count += 1
+
     if _debug_gl_trace:
-        try:
-            name = func.__name__
-        except AttributeError:
-            name = repr(func)
         if _debug_gl_trace_args:
-            trace_args = ', '.join([repr(arg)[:20] for arg in arguments])
-            print('%s(%s)' % (name, trace_args))
+            print(_format_call(func, arguments))
         else:
-            print(name)
+            print(_get_func_name(func))
+
+    if _debug_gl_deferred:
+        _call_history.append((func, arguments))
+        if _debug_gl_check_interval and \
+           _call_count % _debug_gl_check_interval == 0:
+            check_error('%s, every %d calls' % (
+                _get_func_name(func), _debug_gl_check_interval))
+        return result
 
     from pyglet import gl
     context = gl.current_context
@@ -101,16 +221,19 @@ def errcheck(result, func, arguments):
     if not context._gl_begin:
         error = gl.glGetError()
         if error:
-            msg = ctypes.cast(gl.gluErrorString(error), ctypes.c_char_p).value
-            raise GLException(msg)
+            _raise_error(error)
         return result
 
 def errcheck_glbegin(result, func, arguments):
+    global _call_count
+    _call_count += 1
     from pyglet import gl
     context = gl.current_context
     if not context:
         raise GLException('No GL context; create a Window first')
     context._gl_begin = True
+    if _debug_gl_deferred:
+        _call_history.append((func, arguments))
     return result
 
 def errcheck_glend(result, func, arguments):
@@ -169,6 +169,8 @@ import ctypes
 import pyglet
 from pyglet.gl import *
 from pyglet import gl
+from pyglet import profiler
+from pyglet.gl import lib as gl_lib
 from pyglet.graphics import vertexbuffer, vertexattribute, vertexdomain
 
 _debug_graphics_batch = pyglet.options['debug_graphics_batch']
@@ -335,6 +337,23 @@ class Batch(object):
         self._draw_list = []
         self._draw_list_dirty = False
 
+        #: Number of group state changes (calls to `Group.set_state` and
+        #: `Group.unset_state`) made each time the batch is drawn.
+        #:
+        #: :since: pyglet 1.3
+        self.state_changes = 0
+
+        #: Number of state changes elided because adjacent groups have the
+        #: same state, or no state at all.
+        #:
+        #: :since: pyglet 1.3
+        self.state_changes_elided = 0
+
+        #: Number of vertex domains drawn each time the batch is drawn.
+        #:
+        #: :since: pyglet 1.3
+        self.draw_calls = 0
+
     def invalidate(self):
         '''Force the batch to update the draw list.
 
@@ -345,6 +364,77 @@ class Batch(object):
         '''
         self._draw_list_dirty = True
 
+    def compact(self):
+        '''Compact the vertex storage of every domain in the batch.
+
+        Vertex lists in each domain are moved into a single contiguous range
+        so that the domain is drawn with one call, and the buffers are shrunk
+        to fit.  Domains can also be compacted automatically when they
+        become fragmented, by setting the ``graphics_compact_threshold``
+        option; see `pyglet.graphics.vertexdomain.VertexDomain.compact`.
+
+        :since: pyglet 1.3
+        '''
+        for domain_map in self.group_map.values():
+            for domain in domain_map.values():
+                domain.compact()
+
+    def get_upload_stats(self):
+        '''Get the amount of vertex and index data uploaded to OpenGL.
+
+        The totals accumulate over the lifetime of the domains currently in
+        the batch (a domain is discarded, with its totals, when it no longer
+        has any vertex lists).  To find the bandwidth used by the batch in a
+        frame, subtract the result of the previous frame::
+
+            bytes_before, calls_before = batch.get_upload_stats()
+            batch.draw()
+            bytes_after, calls_after = batch.get_upload_stats()
+
+        :since: pyglet 1.3
+
+        :rtype: (int, int)
+        :return: Number of bytes uploaded and number of upload calls.
+        '''
+        bytes_uploaded = upload_calls = 0
+        for domain_map in self.group_map.values():
+            for domain in domain_map.values():
+                domain_bytes, domain_calls = domain.get_upload_stats()
+                bytes_uploaded += domain_bytes
+                upload_calls += domain_calls
+        return bytes_uploaded, upload_calls
+
+    def get_memory_report(self):
+        '''Describe the buffer memory used by each domain of the batch.
+
+        Each line gives the group, vertex formats and mode of a domain, the
+        number of bytes holding vertex lists and the total size of the
+        domain's buffers.  When the ``graphics_arena`` option is set, the
+        report of the shared `pyglet.graphics.vertexbuffer.BufferArena`
+        follows.
+
+        :since: pyglet 1.3
+
+        :rtype: str
+        '''
+        lines = []
+        total_used = total_size = 0
+        for group, domain_map in self.group_map.items():
+            for (formats, mode, indexed), domain in domain_map.items():
+                used, size = domain.get_memory_usage()
+                total_used += used
+                total_size += size
+                lines.append('%r %s mode=%d%s used=%d size=%d' % (
+                    group, ','.join(formats), mode,
+                    indexed and ' indexed' or '', used, size))
+        lines.append('total used=%d size=%d' % (total_used, total_size))
+        arenas = set(domain.arena for domain_map in self.group_map.values()
+                     for domain in domain_map.values()
+                     if domain.arena is not None)
+        for arena in arenas:
+            lines.append(arena.get_report())
+        return '\n'.join(lines)
+
     def add(self, count, mode, group, *data):
         '''Add a vertex list to the batch.
 
@@ -405,6 +495,108 @@ class Batch(object):
 
         return vlist 
 
+    def add_many(self, n, count, mode, group, *data):
+        '''Add several vertex lists of the same size to the batch.
+
+        This is equivalent to calling `add` `n` times, but the vertex lists
+        are allocated together and each attribute's initial data is set with
+        a single copy, which is considerably faster when creating many
+        objects at once.
+
+        :Parameters:
+            `n` : int
+                The number of vertex lists to add.
+            `count` : int
+                The number of vertices in each list.
+            `mode` : int
+                OpenGL drawing mode enumeration; for example, one of
+                ``GL_POINTS``, ``GL_LINES``, ``GL_TRIANGLES``, etc.
+                See the module summary for additional information.
+            `group` : `Group`
+                Group of the vertex lists, or ``None`` if no group is
+                required.
+            `data` : data items
+                Attribute formats and initial data for the vertex lists.
+                Initial data is given for all `n` vertex lists at once, as a
+                flat sequence of ``n * count`` vertices.  ctypes arrays of
+                the attribute's type and NumPy arrays are copied without
+                iterating over them in Python.
+
+        Full `VertexList` objects are returned, rather than lighter handles,
+        because each one is only its domain, start and count until one of
+        its attributes is accessed, and because the lists must remain
+        independently resizable, deletable and movable between groups like
+        those returned by `add`.
+
+        :since: pyglet 1.3
+
+        :rtype: list of `VertexList`
+        '''
+        formats, initial_arrays = _parse_data(data)
+        domain = self._get_domain(False, mode, group, formats)
+
+        vlists = domain.create_many(n, count)
+        if vlists:
+            start = vlists[0].start
+            for i, array in initial_arrays:
+                domain.set_attribute_data(i, start, n * count, array)
+
+        return vlists
+
+    def add_indexed_many(self, n, count, mode, group, indices, *data):
+        '''Add several indexed vertex lists of the same size to the batch.
+
+        See `add_many`.
+
+        :Parameters:
+            `n` : int
+                The number of vertex lists to add.
+            `count` : int
+                The number of vertices in each list.
+            `mode` : int
+                OpenGL drawing mode enumeration; for example, one of
+                ``GL_POINTS``, ``GL_LINES``, ``GL_TRIANGLES``, etc.
+                See the module summary for additional information.
+            `group` : `Group`
+                Group of the vertex lists, or ``None`` if no group is
+                required.
+            `indices` : sequence
+                Sequence of integers giving indices into the vertex lists;
+                the same number for each list, one list after another.  As
+                with `add_indexed`, the indices of each list are relative to
+                its own first vertex.
+            `data` : data items
+                Attribute formats and initial data for the vertex lists, as
+                for `add_many`.
+
+        :since: pyglet 1.3
+
+        :rtype: list of `IndexedVertexList`
+        '''
+        formats, initial_arrays = _parse_data(data)
+        domain = self._get_domain(True, mode, group, formats)
+
+        index_count, remainder = divmod(len(indices), n) if n else (0, 0)
+        assert not remainder, 'Indices must be given for each vertex list'
+
+        vlists = domain.create_many(n, count, index_count)
+        if vlists:
+            start = vlists[0].start
+            if type(indices).__module__ == 'numpy':
+                import numpy
+                offsets = start + numpy.arange(n) * count
+                indices = (numpy.reshape(indices, (n, index_count)) +
+                           offsets[:, numpy.newaxis])
+            else:
+                indices = [index + start + (i // index_count) * count
+                           for i, index in enumerate(indices)]
+            domain.set_index_data(vlists[0].index_start, n * index_count,
+                                  indices)
+            for i, array in initial_arrays:
+                domain.set_attribute_data(i, start, n * count, array)
+
+        return vlists
+
     def migrate(self, vertex_list, mode, group, batch):
         '''Migrate a vertex list to another batch and/or group.
 
@@ -476,6 +668,12 @@ class Batch(object):
     def _update_draw_list(self):
         '''Visit group tree in preorder and create a list of bound methods
         to call.
+
+        State changes that have no effect are left out of the list: those of
+        groups that do not override `Group.set_state` and
+        `Group.unset_state`, and an ``unset_state`` immediately followed by
+        a ``set_state`` of a group with the same state key (see
+        `Group.get_state_key`).
         '''
 
         def visit(group):
@@ -488,8 +686,7 @@ class Batch(object):
                 if domain._is_empty():
                     del domain_map[(formats, mode, indexed)]
                     continue
-                draw_list.append(
-                    (lambda d, m: lambda: d.draw(m))(domain, mode))
+                draw_list.append((_DRAW, domain, mode))
 
             # Sort and visit child groups of this group
             children = self.group_children.get(group)
@@ -499,7 +696,8 @@ class Batch(object):
                     draw_list.extend(visit(child))
 
             if children or domain_map:
-                return [group.set_state] + draw_list + [group.unset_state]
+                return ([(_SET_STATE, group)] + draw_list +
+                        [(_UNSET_STATE, group)])
             else:
                 # Remove unused group from batch
                 del self.group_map[group]
@@ -515,11 +713,44 @@ class Batch(object):
                     pass
                 return []
 
-        self._draw_list = []
-
+        ops = []
         self.top_groups.sort()
         for group in list(self.top_groups):
-            self._draw_list.extend(visit(group))
+            ops.extend(visit(group))
+
+        # Elide state changes, comparing each set with the last op kept so
+        # that elisions cascade up through parent groups.
+        program = []
+        elided = 0
+        for op in ops:
+            if op[0] != _DRAW and _is_stateless(op[1]):
+                elided += 1
+                continue
+            if op[0] == _SET_STATE and program and \
+                    program[-1][0] == _UNSET_STATE:
+                key = op[1].get_state_key()
+                if (key is not None and
+                        key == program[-1][1].get_state_key()):
+                    program.pop()
+                    elided += 2
+                    continue
+            program.append(op)
+
+        self._draw_list = []
+        self.state_changes = 0
+        self.draw_calls = 0
+        for op in program:
+            if op[0] == _DRAW:
+                self._draw_list.append(
+                    (lambda d, m: lambda: d.draw(m))(op[1], op[2]))
+                self.draw_calls += 1
+            elif op[0] == _SET_STATE:
+                self._draw_list.append(op[1].set_state)
+                self.state_changes += 1
+            else:
+                self._draw_list.append(op[1].unset_state)
+                self.state_changes += 1
+        self.state_changes_elided = elided
 
         self._draw_list_dirty = False
 
@@ -553,12 +784,21 @@ class Batch(object):
     def draw(self):
         '''Draw the batch.
         '''
+        if profiler.enabled:
+            profiler.begin('Batch.draw')
+
         if self._draw_list_dirty:
             self._update_draw_list()
 
         for func in self._draw_list:
             func()
 
+        if gl_lib._debug_gl_deferred:
+            gl_lib.check_error('Batch.draw')
+
+        if profiler.enabled:
+            profiler.end()
+
     def draw_subset(self, vertex_lists):
         '''Draw only some vertex lists in the batch.
 
@@ -598,6 +838,19 @@ class Batch(object):
         for group in self.top_groups:
             visit(group)
 
+# Operations in a batch's draw program
+_SET_STATE = 0
+_UNSET_STATE = 1
+_DRAW = 2
+
+def _is_stateless(group):
+    # True if the group uses the default (no-op) state changes.
+    cls = group.__class__
+    return (getattr(cls.set_state, '__func__', cls.set_state) is
+                getattr(Group.set_state, '__func__', Group.set_state) and
+            getattr(cls.unset_state, '__func__', cls.unset_state) is
+                getattr(Group.unset_state, '__func__', Group.unset_state))
+
 class Group(object):
     '''Group of common OpenGL state.
 
@@ -632,6 +885,24 @@ class Group(object):
         The default implementation does nothing.'''
         pass
 
+    def get_state_key(self):
+        '''Get a value identifying the OpenGL state change of this group.
+
+        Groups with equal state keys must make the same state changes in
+        `set_state` and `unset_state`, and the key must not change while the
+        group is in a batch.  When such groups are drawn one after the other,
+        the batch skips the ``unset_state`` of the first and the
+        ``set_state`` of the second.
+
+        The default implementation returns ``None``, indicating that the
+        state is not comparable with that of any other group.
+
+        :since: pyglet 1.3
+
+        :rtype: hashable object
+        '''
+        return None
+
     def set_state_recursive(self):
         '''Set this group and its ancestry.
 
@@ -691,6 +962,9 @@ class TextureGroup(Group):
     def unset_state(self):
         glDisable(self.texture.target)
 
+    def get_state_key(self):
+        return (self.__class__, self.texture.target, self.texture.id)
+
     def __hash__(self):
         return hash((self.texture.target, self.texture.id, self.parent))
 
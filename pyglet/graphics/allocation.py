@@ -52,6 +52,8 @@ from builtins import str
 from builtins import zip
 from builtins import object
 
+import bisect
+
 __docformat__ = 'restructuredtext'
 __version__ = '$Id: $'
  
@@ -77,6 +79,11 @@ __version__ = '$Id: $'
 #  a region from the allocator's point of view.
 # -this means that compacting is probably not feasible, or would be hideously
 #  expensive
+# -free blocks are indexed by start (for coalescing on dealloc) and by size
+#  (for best-fit search on alloc), so that the cost of an operation does not
+#  depend on the number of live regions.  The aggregate allocated regions
+#  needed for drawing are the complement of the free blocks, and are cached
+#  until the next mutation.
 
 class AllocatorMemoryException(Exception):
     '''The buffer is not large enough to fulfil an allocation.
@@ -91,7 +98,305 @@ class AllocatorMemoryException(Exception):
         self.requested_capacity = requested_capacity
 
 class Allocator(object):
-    '''Buffer space allocation implementation.'''
+    '''Buffer space allocation implementation.
+
+    Free space is kept as a set of coalesced free blocks, indexed both by
+    starting position and by size.  Allocation takes the smallest free block
+    that is large enough (lowest start first among equals); deallocation
+    merges the freed region with its free neighbours.  Each operation is a
+    few binary searches plus list insertions and deletions in the free block
+    indexes, so its cost depends on the number of free blocks rather than
+    the number of allocated regions.
+    '''
+    def __init__(self, capacity):
+        '''Create an allocator for a buffer of the specified capacity.
+
+        :Parameters:
+            `capacity` : int
+                Maximum size of the buffer.
+
+        '''
+        self.capacity = capacity
+
+        # Free blocks.  Sorted list of starts, size of each block keyed by
+        # start, and sorted list of (size, start) for best-fit search.
+        #
+        # # = allocated, - = free
+        #
+        #  0  3 5        15   20  24                    40
+        # |###--##########-----####----------------------|
+        #
+        # _free_starts = [3, 15, 24]
+        # _free_sizes = {3: 2, 15: 5, 24: 16}
+        # _free_index = [(2, 3), (5, 15), (16, 24)]
+
+        self._free_starts = []
+        self._free_sizes = {}
+        self._free_index = []
+        self._allocated_size = 0
+
+        # Cached result of get_allocated_regions; None when out of date.
+        self._regions = None
+
+        #: Incremented whenever the allocated regions change.
+        self.version = 0
+
+        if capacity:
+            self._add_free(0, capacity)
+
+    def _add_free(self, start, size):
+        bisect.insort(self._free_starts, start)
+        self._free_sizes[start] = size
+        bisect.insort(self._free_index, (size, start))
+
+    def _remove_free(self, start):
+        size = self._free_sizes.pop(start)
+        del self._free_starts[bisect.bisect_left(self._free_starts, start)]
+        del self._free_index[bisect.bisect_left(self._free_index,
+                                                (size, start))]
+        return size
+
+    def _get_final_free_size(self):
+        # Size of the free block that extends to the end of the buffer, if
+        # any.
+        if self._free_starts:
+            start = self._free_starts[-1]
+            size = self._free_sizes[start]
+            if start + size == self.capacity:
+                return size
+        return 0
+
+    def _check_allocated(self, start, size):
+        # Check that no free block overlaps the region.
+        starts = self._free_starts
+        i = bisect.bisect_right(starts, start)
+        if i > 0 and starts[i - 1] + self._free_sizes[starts[i - 1]] > start:
+            return False
+        if i < len(starts) and starts[i] < start + size:
+            return False
+        return start >= 0 and start + size <= self.capacity
+
+    def set_capacity(self, size):
+        '''Resize the maximum buffer size.
+
+        The capacity cannot be reduced.
+
+        :Parameters:
+            `size` : int
+                New maximum size of the buffer.
+
+        '''
+        assert size > self.capacity
+        final_free_size = self._get_final_free_size()
+        if final_free_size:
+            start = self._free_starts[-1]
+            self._remove_free(start)
+            self._add_free(start, final_free_size + size - self.capacity)
+        else:
+            self._add_free(self.capacity, size - self.capacity)
+        self.capacity = size
+        self._regions = None
+        self.version += 1
+
+    def alloc(self, size):
+        '''Allocate memory in the buffer.
+
+        Raises `AllocatorMemoryException` if the allocation cannot be
+        fulfilled.
+
+        :Parameters:
+            `size` : int
+                Size of region to allocate.
+
+        :rtype: int
+        :return: Starting index of the allocated region.
+        '''
+        assert size >= 0
+
+        if size == 0:
+            return 0
+
+        # Smallest free block that is large enough; (size, -1) sorts before
+        # any block of exactly the requested size.
+        i = bisect.bisect_left(self._free_index, (size, -1))
+        if i == len(self._free_index):
+            raise AllocatorMemoryException(
+                self.capacity + size - self._get_final_free_size())
+
+        free_size, start = self._free_index[i]
+        self._remove_free(start)
+        if free_size > size:
+            self._add_free(start + size, free_size - size)
+        self._allocated_size += size
+        self._regions = None
+        self.version += 1
+        return start
+
+    def realloc(self, start, size, new_size):
+        '''Reallocate a region of the buffer.
+
+        This is more efficient than separate `dealloc` and `alloc` calls, as
+        the region can often be resized in-place.
+
+        Raises `AllocatorMemoryException` if the allocation cannot be
+        fulfilled.
+
+        :Parameters:
+            `start` : int
+                Current starting index of the region.
+            `size` : int
+                Current size of the region.
+            `new_size` : int
+                New size of the region.
+
+        '''
+        assert size >= 0 and new_size >= 0
+
+        if new_size == 0:
+            if size != 0:
+                self.dealloc(start, size)
+            return 0
+        elif size == 0:
+            return self.alloc(new_size)
+
+        # Truncation is the same as deallocating the tail cruft
+        if new_size < size:
+            self.dealloc(start + new_size, size - new_size)
+            return start
+        elif new_size == size:
+            return start
+
+        assert self._check_allocated(start, size), 'Region not allocated'
+
+        # Expand in place if the free block immediately following the region
+        # is large enough.
+        end = start + size
+        growth = new_size - size
+        free_size = self._free_sizes.get(end, 0)
+        if free_size >= growth:
+            self._remove_free(end)
+            if free_size > growth:
+                self._add_free(end + growth, free_size - growth)
+            self._allocated_size += growth
+            self._regions = None
+            self.version += 1
+            return start
+
+        # The block must be repositioned.  It must be alloc'd first, so that
+        # the original block is not lost if the alloc fails.
+        result = self.alloc(new_size)
+        self.dealloc(start, size)
+        return result
+
+    def dealloc(self, start, size):
+        '''Free a region of the buffer.
+
+        :Parameters:
+            `start` : int
+                Starting index of the region.
+            `size` : int
+                Size of the region.
+
+        '''
+        assert size >= 0
+
+        if size == 0:
+            return
+
+        assert self._check_allocated(start, size), 'Region not allocated'
+
+        self._allocated_size -= size
+        self._regions = None
+        self.version += 1
+
+        # Coalesce with the free blocks on either side.
+        end = start + size
+        i = bisect.bisect_left(self._free_starts, start)
+        if i > 0:
+            prev_start = self._free_starts[i - 1]
+            if prev_start + self._free_sizes[prev_start] == start:
+                size += self._remove_free(prev_start)
+                start = prev_start
+        if end in self._free_sizes:
+            size += self._remove_free(end)
+        self._add_free(start, size)
+
+    def get_allocated_regions(self):
+        '''Get a list of (aggregate) allocated regions.
+
+        The result of this method is ``(starts, sizes)``, where ``starts`` is
+        a list of starting indices of the regions and ``sizes`` their
+        corresponding lengths.  The lists must not be modified by the caller.
+
+        :rtype: (list, list)
+        '''
+        if self._regions is None:
+            starts = []
+            sizes = []
+            alloc_start = 0
+            for free_start in self._free_starts:
+                if free_start > alloc_start:
+                    starts.append(alloc_start)
+                    sizes.append(free_start - alloc_start)
+                alloc_start = free_start + self._free_sizes[free_start]
+            if alloc_start < self.capacity:
+                starts.append(alloc_start)
+                sizes.append(self.capacity - alloc_start)
+            self._regions = (starts, sizes)
+        return self._regions
+
+    # Compatibility with code that inspected the block lists directly.
+    starts = property(lambda self: self.get_allocated_regions()[0])
+    sizes = property(lambda self: self.get_allocated_regions()[1])
+
+    def get_fragmented_free_size(self):
+        '''Returns the amount of space unused, not including the final
+        free block.
+
+        :rtype: int
+        '''
+        return self.get_free_size() - self._get_final_free_size()
+
+    def get_free_size(self):
+        '''Return the amount of space unused.
+
+        :rtype: int
+        '''
+        return self.capacity - self._allocated_size
+
+    def get_usage(self):
+        '''Return fraction of capacity currently allocated.
+
+        :rtype: float
+        '''
+        return self._allocated_size / float(self.capacity)
+
+    def get_fragmentation(self):
+        '''Return fraction of free space that is not expandable.
+
+        :rtype: float
+        '''
+        free_size = self.get_free_size()
+        if free_size == 0:
+            return 0.
+        return self.get_fragmented_free_size() / float(free_size)
+
+    def _is_empty(self):
+        return self._allocated_size == 0
+
+    def __str__(self):
+        return 'allocs=' + repr(list(zip(*self.get_allocated_regions())))
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, str(self))
+
+class LinearAllocator(object):
+    '''Buffer space allocation implementation that scans allocated blocks.
+
+    This was the allocator used by vertex domains prior to `Allocator`.  Each
+    operation is linear in the number of allocated blocks; it is retained as
+    a reference implementation for testing and benchmarking.
+    '''
     def __init__(self, capacity):
         '''Create an allocator for a buffer of the specified capacity.
 
@@ -121,6 +426,9 @@ class Allocator(object):
         self.starts = []
         self.sizes = []
 
+        #: Incremented whenever the allocated regions change.
+        self.version = 0
+
     def set_capacity(self, size):
         '''Resize the maximum buffer size.
         
@@ -133,6 +441,7 @@ class Allocator(object):
         '''
         assert size > self.capacity
         self.capacity = size
+        self.version += 1
 
     def alloc(self, size):
         '''Allocate memory in the buffer.
@@ -154,6 +463,7 @@ class Allocator(object):
 
         # return start
         # or raise AllocatorMemoryException
+        self.version += 1
 
         if not self.starts:
             if size <= self.capacity:
@@ -214,6 +524,8 @@ class Allocator(object):
         '''
         assert size >= 0 and new_size >= 0
         
+        self.version += 1
+
         if new_size == 0:
             if size != 0:
                 self.dealloc(start, size)
@@ -297,6 +609,8 @@ class Allocator(object):
 
         assert self.starts
         
+        self.version += 1
+
         # Find which block needs to be split
         for i, (alloc_start, alloc_size) in \
                 enumerate(zip(*(self.starts, self.sizes))):
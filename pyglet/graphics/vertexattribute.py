@@ -347,6 +347,49 @@ class AbstractAttribute(object):
             return vertexbuffer.IndirectArrayRegion(
                 region, array_count, self.count, elem_stride)
 
+    def get_numpy_region(self, buffer, start, count):
+        '''Map a buffer region as a NumPy array, without copying.
+
+        If the attribute is not interleaved, the array is one-dimensional and
+        has the same layout as the array returned by `get_region`.
+        Interleaved attributes cannot be presented as a contiguous array;
+        instead the array has shape ``(count, self.count)`` and strides over
+        the interleaved data.
+
+        Requires NumPy.
+
+        :Parameters:
+            `buffer` : `AbstractMappable`
+                The buffer to map.
+            `start` : int
+                Offset of the first vertex to map.
+            `count` : int
+                Number of vertices to map
+
+        :since: pyglet 1.3
+
+        :rtype: `pyglet.graphics.vertexbuffer.NumpyArrayRegion`
+        '''
+        import numpy.ctypeslib
+
+        byte_start = self.stride * start
+        byte_size = self.stride * count
+        if self.stride == self.size:
+            # non-interleaved
+            ptr_type = ctypes.POINTER(self.c_type * (self.count * count))
+            region = buffer.get_region(byte_start, byte_size, ptr_type)
+            array = numpy.ctypeslib.as_array(region.array)
+        else:
+            # interleaved; view each vertex as a row of bytes and select the
+            # columns holding this attribute.
+            ptr_type = ctypes.POINTER(ctypes.c_ubyte * byte_size)
+            region = buffer.get_region(byte_start, byte_size, ptr_type)
+            rows = numpy.ctypeslib.as_array(region.array).reshape(
+                count, self.stride)
+            array = rows[:, self.offset:self.offset + self.size].view(
+                numpy.dtype(self.c_type))
+        return vertexbuffer.NumpyArrayRegion(region, array)
+
     def set_region(self, buffer, start, count, data):
         '''Set the data over a region of the buffer.
 
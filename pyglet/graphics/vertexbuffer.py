@@ -42,18 +42,23 @@ Buffers can optionally be created "mappable" (incorporating the
 `AbstractMappable` mix-in).  In this case the buffer provides a ``get_region``
 method which provides the most efficient path for updating partial data within
 the buffer.
+
+Mappable buffers can also be sub-allocated from a `BufferArena`, which
+shares a few large buffers among many small ones.
 '''
+from builtins import zip
 from builtins import range
 from builtins import object
 
 __docformat__ = 'restructuredtext'
 __version__ = '$Id: $'
 
+import bisect
 import ctypes
-import sys
 
 import pyglet
 from pyglet.gl import *
+from pyglet.graphics import allocation
 
 _enable_vbo = pyglet.options['graphics_vbo']
 
@@ -132,11 +137,20 @@ class AbstractBuffer(object):
             OpenGL buffer target, for example ``GL_ARRAY_BUFFER``
         `usage` : int
             OpenGL buffer usage, for example ``GL_DYNAMIC_DRAW``
+        `bytes_uploaded` : int
+            Total number of bytes sent to OpenGL for this buffer.  Sample it
+            each frame to measure upload bandwidth.  Always 0 for vertex
+            arrays.
+        `upload_calls` : int
+            Total number of ``glBufferData`` and ``glBufferSubData`` calls
+            made for this buffer.
 
     '''
 
     ptr = 0
     size = 0
+    bytes_uploaded = 0
+    upload_calls = 0
 
     def bind(self):
         '''Bind this buffer to its OpenGL target.'''
@@ -321,12 +335,16 @@ class VertexBufferObject(AbstractBuffer):
         glBindBuffer(self.target, self.id)
         glBufferData(self.target, self.size, data, self.usage)
         glPopClientAttrib()
+        self.bytes_uploaded += self.size
+        self.upload_calls += 1
 
     def set_data_region(self, data, start, length):
         glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
         glBindBuffer(self.target, self.id)
         glBufferSubData(self.target, start, length, data)
         glPopClientAttrib()
+        self.bytes_uploaded += length
+        self.upload_calls += 1
 
     def map(self, invalidate=False):
         glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
@@ -368,6 +386,71 @@ class VertexBufferObject(AbstractBuffer):
         self.size = size
         glBufferData(self.target, self.size, temp, self.usage)
         glPopClientAttrib()
+        self.bytes_uploaded += self.size
+        self.upload_calls += 1
+
+class DirtyRanges(object):
+    '''Set of byte ranges of a buffer that have changed.
+
+    Ranges are kept sorted and disjoint.  A range that is within
+    `merge_gap` bytes of another is merged with it, as uploading the
+    unchanged bytes between them is cheaper than another OpenGL call.  If
+    there are more than `max_ranges` ranges, the two closest are merged.
+
+    :since: pyglet 1.3
+    '''
+    def __init__(self, merge_gap, max_ranges):
+        self.merge_gap = merge_gap
+        self.max_ranges = max_ranges
+        self.starts = []
+        self.ends = []
+
+    def add(self, start, end):
+        '''Mark the bytes from `start` up to `end` as changed.'''
+        starts = self.starts
+        ends = self.ends
+        i = bisect.bisect_right(starts, start)
+        if i and ends[i - 1] >= end:
+            # Already marked; the common case when a region is invalidated
+            # every frame.
+            return
+
+        gap = self.merge_gap
+        lo = hi = i
+        if i and ends[i - 1] + gap >= start:
+            lo = i - 1
+            start = starts[lo]
+        while hi < len(starts) and starts[hi] <= end + gap:
+            hi += 1
+        if hi > i:
+            end = max(end, ends[hi - 1])
+        starts[lo:hi] = [start]
+        ends[lo:hi] = [end]
+
+        if len(starts) > self.max_ranges:
+            j = min(range(1, len(starts)),
+                    key=lambda j: starts[j] - ends[j - 1])
+            ends[j - 1] = ends[j]
+            del starts[j]
+            del ends[j]
+
+    def clear(self):
+        '''Mark all bytes as unchanged.'''
+        del self.starts[:]
+        del self.ends[:]
+
+    def get_size(self):
+        '''Get the total number of bytes in the ranges.
+
+        :rtype: int
+        '''
+        return sum(self.ends) - sum(self.starts)
+
+    def __iter__(self):
+        return zip(self.starts, self.ends)
+
+    def __len__(self):
+        return len(self.starts)
 
 class MappableVertexBufferObject(VertexBufferObject, AbstractMappable):
     '''A VBO with system-memory backed store.
@@ -376,44 +459,62 @@ class MappableVertexBufferObject(VertexBufferObject, AbstractMappable):
     held in local memory until `bind` is called.  The advantage is that fewer
     OpenGL calls are needed, increasing performance.
 
+    Each disjoint changed range is committed with its own
+    ``glBufferSubData`` call, so that two small changes far apart in the
+    buffer do not upload everything between them.
+
     There may also be less performance penalty for resizing this buffer.
 
     Updates to data via `map` are committed immediately.
+
+    :Ivariables:
+        `dirty_merge_gap` : int
+            Changed ranges separated by no more than this many bytes are
+            uploaded in a single call.
+        `max_dirty_ranges` : int
+            Maximum number of ranges uploaded by `bind`; the closest ranges
+            are merged beyond this.
+
     '''
+    dirty_merge_gap = 1024
+    max_dirty_ranges = 8
+
     def __init__(self, size, target, usage):
         super(MappableVertexBufferObject, self).__init__(size, target, usage)
         self.data = (ctypes.c_byte * size)()
         self.data_ptr = ctypes.cast(self.data, ctypes.c_void_p).value
-        self._dirty_min = sys.maxsize
-        self._dirty_max = 0
+        self._dirty = DirtyRanges(self.dirty_merge_gap, self.max_dirty_ranges)
 
     def bind(self):
         # Commit pending data
         super(MappableVertexBufferObject, self).bind()
-        size = self._dirty_max - self._dirty_min
-        if size > 0:
-            if size == self.size:
+        dirty = self._dirty
+        if dirty.starts:
+            if dirty.starts[0] == 0 and dirty.ends[0] >= self.size:
                 glBufferData(self.target, self.size, self.data, self.usage)
+                self.bytes_uploaded += self.size
+                self.upload_calls += 1
             else:
-                glBufferSubData(self.target, self._dirty_min, size,
-                    self.data_ptr + self._dirty_min)
-            self._dirty_min = sys.maxsize
-            self._dirty_max = 0
+                for start, end in dirty:
+                    glBufferSubData(self.target, start, end - start,
+                        self.data_ptr + start)
+                self.bytes_uploaded += dirty.get_size()
+                self.upload_calls += len(dirty)
+            dirty.clear()
 
     def set_data(self, data):
         super(MappableVertexBufferObject, self).set_data(data)
         ctypes.memmove(self.data, data, self.size)
-        self._dirty_min = 0
-        self._dirty_max = self.size
+        self._dirty.clear()
+        self._dirty.add(0, self.size)
 
     def set_data_region(self, data, start, length):
         ctypes.memmove(self.data_ptr + start, data, length)
-        self._dirty_min = min(start, self._dirty_min)
-        self._dirty_max = max(start + length, self._dirty_max)
+        self._dirty.add(start, start + length)
 
     def map(self, invalidate=False):
-        self._dirty_min = 0
-        self._dirty_max = self.size
+        self._dirty.clear()
+        self._dirty.add(0, self.size)
         return self.data
 
     def unmap(self):
@@ -434,9 +535,225 @@ class MappableVertexBufferObject(VertexBufferObject, AbstractMappable):
         glBindBuffer(self.target, self.id)
         glBufferData(self.target, self.size, self.data, self.usage)
         glPopClientAttrib()
+        self.bytes_uploaded += self.size
+        self.upload_calls += 1
+
+        self._dirty.clear()
+
+class BufferArena(object):
+    '''Shared storage from which mappable buffers are sub-allocated.
+
+    The arena holds a number of large pages, each a buffer created with
+    `create_mappable_buffer`.  Buffers created with `create_buffer` occupy
+    a range of a page shared with other buffers of the same target and
+    usage, so that many small buffers do not each hold their own OpenGL
+    buffer object and system memory.  Pages are released when they no
+    longer hold any buffers.
+
+    Use `get_buffer_arena` to obtain the arena of the current context.
+
+    :Ivariables:
+        `page_size` : int
+            Size of each page, in bytes.  Buffers larger than this are
+            given a page of their own.
+        `pages` : list of `BufferArenaPage`
+            Pages currently in use.
+
+    :since: pyglet 1.3
+    '''
+    #: Granularity of allocations within a page, in bytes.
+    alignment = 16
 
-        self._dirty_min = sys.maxsize
-        self._dirty_max = 0
+    def __init__(self, page_size=1 << 20):
+        self.page_size = page_size
+        self.pages = []
+
+    def create_buffer(self, size,
+                      target=GL_ARRAY_BUFFER,
+                      usage=GL_DYNAMIC_DRAW,
+                      vbo=True):
+        '''Create a buffer within the arena.
+
+        The parameters are the same as for `create_mappable_buffer`.
+
+        :rtype: `ArenaBuffer`
+        '''
+        return ArenaBuffer(self, size, target, usage, vbo)
+
+    def _get_block_count(self, size):
+        return max(1, (size + self.alignment - 1) // self.alignment)
+
+    def _alloc(self, size, target, usage, vbo):
+        # Returns (page, block start) of a new range of at least `size`
+        # bytes.
+        blocks = self._get_block_count(size)
+        for page in self.pages:
+            if page.target == target and page.usage == usage and \
+                    page.vbo == vbo:
+                try:
+                    return page, page.allocator.alloc(blocks)
+                except allocation.AllocatorMemoryException:
+                    pass
+        page_blocks = max(blocks, self._get_block_count(self.page_size))
+        page = BufferArenaPage(page_blocks * self.alignment,
+                               target, usage, vbo)
+        self.pages.append(page)
+        return page, page.allocator.alloc(blocks)
+
+    def _dealloc(self, page, start, blocks):
+        page.allocator.dealloc(start, blocks)
+        if page.allocator._is_empty():
+            self.pages.remove(page)
+
+    def get_report(self):
+        '''Describe the memory used by each page of the arena.
+
+        :rtype: str
+        '''
+        lines = []
+        for page in self.pages:
+            allocator = page.allocator
+            used = (allocator.capacity -
+                    allocator.get_free_size()) * self.alignment
+            lines.append('%s target=0x%x usage=0x%x vbo=%s size=%d used=%d '
+                         '(%.0f%%) uploaded=%d' % (
+                page.buffer.__class__.__name__, page.target, page.usage,
+                page.vbo, page.buffer.size, used,
+                100. * allocator.get_usage(), page.buffer.bytes_uploaded))
+        return '\n'.join(lines)
+
+class BufferArenaPage(object):
+    '''A buffer shared by several `ArenaBuffer` instances.
+
+    :since: pyglet 1.3
+    '''
+    def __init__(self, size, target, usage, vbo):
+        self.target = target
+        self.usage = usage
+        self.vbo = vbo
+        self.buffer = create_mappable_buffer(size, target, usage, vbo)
+        self.allocator = allocation.Allocator(size // BufferArena.alignment)
+
+class ArenaBuffer(AbstractBuffer, AbstractMappable):
+    '''A mappable buffer occupying a range of a `BufferArena` page.
+
+    Binding the buffer binds the whole page; `ptr` gives the offset of the
+    buffer within it.  Uploads are counted by the page buffer, not by this
+    buffer.
+
+    :since: pyglet 1.3
+    '''
+    def __init__(self, arena, size, target, usage, vbo):
+        self.arena = arena
+        self.size = size
+        self.target = target
+        self.usage = usage
+        self.vbo = vbo
+        self._page, self._start = arena._alloc(size, target, usage, vbo)
+
+    @property
+    def offset(self):
+        '''Offset of this buffer within its page, in bytes.'''
+        return self._start * self.arena.alignment
+
+    @property
+    def ptr(self):
+        return self._page.buffer.ptr + self.offset
+
+    def bind(self):
+        self._page.buffer.bind()
+
+    def unbind(self):
+        self._page.buffer.unbind()
+
+    def set_data(self, data):
+        self.set_data_region(data, 0, self.size)
+
+    def set_data_region(self, data, start, length):
+        self._page.buffer.set_data_region(data, self.offset + start, length)
+
+    def map(self, invalidate=False):
+        region = self.get_region(0, self.size,
+                                 ctypes.POINTER(ctypes.c_byte * self.size))
+        region.invalidate()
+        return region.array
+
+    def unmap(self):
+        pass
+
+    def get_region(self, start, size, ptr_type):
+        return self._page.buffer.get_region(self.offset + start, size,
+                                            ptr_type)
+
+    def resize(self, size):
+        arena = self.arena
+        page = self._page
+        blocks = arena._get_block_count(self.size)
+        new_blocks = arena._get_block_count(size)
+        copy_size = min(size, self.size)
+
+        try:
+            # Moving within the page keeps the old range allocated until the
+            # new one is, so the ranges never overlap.
+            new_page = page
+            new_start = page.allocator.realloc(self._start, blocks,
+                                               new_blocks)
+        except allocation.AllocatorMemoryException:
+            new_page, new_start = arena._alloc(size, self.target,
+                                               self.usage, self.vbo)
+
+        if new_page is not page or new_start != self._start:
+            ptr_type = ctypes.POINTER(ctypes.c_byte * copy_size)
+            old = page.buffer.get_region(self.offset, copy_size, ptr_type)
+            new = new_page.buffer.get_region(new_start * arena.alignment,
+                                             copy_size, ptr_type)
+            ctypes.memmove(new.array, old.array, copy_size)
+            new.invalidate()
+            if new_page is not page:
+                arena._dealloc(page, self._start, blocks)
+
+        self._page = new_page
+        self._start = new_start
+        self.size = size
+
+    def delete(self):
+        if self._page is not None:
+            self.arena._dealloc(self._page, self._start,
+                                self.arena._get_block_count(self.size))
+            self._page = None
+
+    def __del__(self):
+        try:
+            self.delete()
+        except:
+            pass
+
+_default_arena = None
+
+def get_buffer_arena():
+    '''Get the `BufferArena` shared by the current context and the
+    contexts it shares objects with.
+
+    If there is no current context, an arena of vertex arrays shared by
+    the whole process is returned.
+
+    :since: pyglet 1.3
+
+    :rtype: `BufferArena`
+    '''
+    global _default_arena
+    from pyglet import gl
+    if gl.current_context is None:
+        if _default_arena is None:
+            _default_arena = BufferArena()
+        return _default_arena
+
+    object_space = gl.current_context.object_space
+    try:
+        return object_space.pyglet_graphics_buffer_arena
+    except AttributeError:
+        object_space.pyglet_graphics_buffer_arena = BufferArena()
+        return object_space.pyglet_graphics_buffer_arena
 
 class AbstractBufferRegion(object):
     '''A mapped region of a buffer.
@@ -466,9 +783,7 @@ class VertexBufferObjectRegion(AbstractBufferRegion):
         self.array = array
 
     def invalidate(self):
-        buffer = self.buffer
-        buffer._dirty_min = min(buffer._dirty_min, self.start)
-        buffer._dirty_max = max(buffer._dirty_max, self.end)
+        self.buffer._dirty.add(self.start, self.end)
 
 class VertexArrayRegion(AbstractBufferRegion):
     '''A mapped region of a vertex array.
@@ -479,6 +794,32 @@ class VertexArrayRegion(AbstractBufferRegion):
     def __init__(self, array):
         self.array = array
 
+class NumpyArrayRegion(AbstractBufferRegion):
+    '''A mapped region presented as a NumPy array.
+
+    The array is a view of the buffer's memory, so changes made through it
+    (including vectorized assignments) are made directly to the buffer.  As
+    for other regions, `invalidate` must be called for the changes to be
+    uploaded.
+
+    :since: pyglet 1.3
+    '''
+    def __init__(self, region, array):
+        '''Wrap a buffer region.
+
+        :Parameters:
+            `region` : `AbstractBufferRegion`
+                The region containing the data.
+            `array` : ``numpy.ndarray``
+                View of the data within the region.
+
+        '''
+        self.region = region
+        self.array = array
+
+    def invalidate(self):
+        self.region.invalidate()
+
 class IndirectArrayRegion(AbstractBufferRegion):
     '''A mapped region in which data elements are not necessarily contiguous.
 
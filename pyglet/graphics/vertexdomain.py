@@ -54,6 +54,12 @@ buffers automatically.
 The entire domain can be efficiently drawn in one step with the
 `VertexDomain.draw` method, assuming all the vertices comprise primitives of
 the same OpenGL primitive mode.
+
+As vertex lists are created and deleted, free space opens up between them
+and the domain must be drawn in several ranges.  `VertexDomain.compact` moves
+the vertex lists back into a single range and shrinks the buffers; this can
+be done automatically when the domain becomes too fragmented (see the
+``graphics_compact_threshold`` option).
 '''
 from builtins import zip
 from builtins import range
@@ -64,10 +70,21 @@ __version__ = '$Id: $'
 
 import ctypes
 import re
+import weakref
 
+import pyglet
 from pyglet.gl import *
 from pyglet.graphics import allocation, vertexattribute, vertexbuffer
 
+_compact_threshold = pyglet.options['graphics_compact_threshold']
+_use_numpy = pyglet.options['graphics_numpy']
+_use_arena = pyglet.options['graphics_arena']
+
+try:
+    import numpy.ctypeslib
+except ImportError:
+    numpy = None
+
 _usage_format_re = re.compile(r'''
     (?P<attribute>[^/]*)
     (/ (?P<usage> static|dynamic|stream|none))?
@@ -91,6 +108,22 @@ def _nearest_pow2(v):
     v |= v >> 16
     return v + 1
 
+def _copy_data(array, data):
+    # Copy a sequence into a ctypes array.  Arrays of the same type are
+    # copied with a single memmove, and NumPy arrays are converted by NumPy;
+    # anything else is copied element by element.
+    if isinstance(array, ctypes.Array):
+        if (isinstance(data, ctypes.Array) and
+                data._type_ is array._type_ and
+                ctypes.sizeof(data) == ctypes.sizeof(array)):
+            ctypes.memmove(array, data, ctypes.sizeof(array))
+            return
+        if type(data).__module__ == 'numpy':
+            import numpy.ctypeslib
+            numpy.ctypeslib.as_array(array)[:] = numpy.ravel(data)
+            return
+    array[:] = data
+
 def create_attribute_usage(format):
     '''Create an attribute and usage pair from a format string.  The
     format string is as documented in `pyglet.graphics.vertexattribute`, with
@@ -154,12 +187,67 @@ class VertexDomain(object):
 
     Construction of a vertex domain is usually done with the `create_domain`
     function.
+
+    :Ivariables:
+        `compact_threshold` : float
+            Fragmentation of the allocator above which the domain is
+            compacted before it is next drawn, or None to only compact
+            when `compact` is called.  Defaults to the
+            ``graphics_compact_threshold`` option.
+        `compact_min_free` : float
+            Fraction of the capacity that must be held in holes between
+            vertex lists before the domain is compacted automatically, so
+            that a nearly full domain is not compacted each time a vertex
+            list is deleted.
+        `range_rebuild_count` : int
+            Number of times the ranges passed to ``glMultiDrawArrays`` (or
+            ``glMultiDrawElements``) have been rebuilt because vertex lists
+            were added, resized or removed.
+        `numpy_arrays` : bool
+            If True, the attribute properties of vertex lists in the domain
+            return NumPy arrays that are views of the buffers; see
+            `pyglet.graphics.vertexattribute.AbstractAttribute.get_numpy_region`.
+            Interleaved (``static``) attributes cannot be viewed as flat
+            arrays, and are returned as for other domains.
+            Defaults to the ``graphics_numpy`` option.  Must be set before
+            the properties of any vertex list are first used.
+        `use_arena` : bool
+            If True, buffers are sub-allocated from the context's
+            `pyglet.graphics.vertexbuffer.BufferArena` and grow by about a
+            quarter rather than doubling.  Defaults to the
+            ``graphics_arena`` option.  Must be set before the domain is
+            created.
+
     '''
     _version = 0
     _initial_count = 16
 
+    compact_threshold = _compact_threshold
+    compact_min_free = 0.25
+    numpy_arrays = _use_numpy
+    use_arena = _use_arena
+
+    # Allocation version at which `compact` last found space held by vertex
+    # lists it does not know about.
+    _compact_refused_version = None
+
+    # ctypes arrays of draw ranges, and the allocator version they were built
+    # from.
+    _draw_ranges = None
+    _draw_ranges_version = None
+    range_rebuild_count = 0
+
     def __init__(self, attribute_usages):
         self.allocator = allocation.Allocator(self._initial_count)
+        if self.use_arena:
+            self.arena = vertexbuffer.get_buffer_arena()
+        else:
+            self.arena = None
+
+        # Live vertex lists, so that they can be moved by `compact`.  Weak
+        # references avoid a reference cycle between the domain and its
+        # vertex lists.
+        self._vertex_lists = weakref.WeakSet()
 
         # If there are any MultiTexCoord attributes, then a TexCoord attribute
         # must be converted.
@@ -184,7 +272,7 @@ class VertexDomain(object):
             else:
                 # Create non-interleaved buffer
                 attributes.append(attribute)
-                attribute.buffer = vertexbuffer.create_mappable_buffer(
+                attribute.buffer = self._create_buffer(
                     attribute.stride * self.allocator.capacity,
                     usage=usage, vbo=vbo)
                 attribute.buffer.element_size = attribute.stride
@@ -196,7 +284,7 @@ class VertexDomain(object):
         if static_attributes:
             vertexattribute.interleave_attributes(static_attributes)
             stride = static_attributes[0].stride
-            buffer = vertexbuffer.create_mappable_buffer(
+            buffer = self._create_buffer(
                 stride * self.allocator.capacity, usage=GL_STATIC_DRAW)
             buffer.element_size = stride
             self.buffer_attributes.append(
@@ -243,12 +331,26 @@ class VertexDomain(object):
             except AttributeError:
                 pass
 
+    def _create_buffer(self, size, **kwargs):
+        if self.arena is not None:
+            return self.arena.create_buffer(size, **kwargs)
+        return vertexbuffer.create_mappable_buffer(size, **kwargs)
+
+    def _get_grown_capacity(self, requested_capacity):
+        if self.arena is None:
+            return _nearest_pow2(requested_capacity)
+        # Arena buffers can usually grow in place, so smaller steps are
+        # affordable and waste less memory.
+        capacity = requested_capacity + requested_capacity // 4
+        step = self._initial_count
+        return (capacity + step - 1) // step * step
+
     def _safe_alloc(self, count):
         '''Allocate vertices, resizing the buffers if necessary.'''
         try:
             return self.allocator.alloc(count)
         except allocation.AllocatorMemoryException as e:
-            capacity = _nearest_pow2(e.requested_capacity)
+            capacity = self._get_grown_capacity(e.requested_capacity)
             self._version += 1
             for buffer, _ in self.buffer_attributes:
                 buffer.resize(capacity * buffer.element_size)
@@ -260,7 +362,7 @@ class VertexDomain(object):
         try:
             return self.allocator.realloc(start, count, new_count)
         except allocation.AllocatorMemoryException as e:
-            capacity = _nearest_pow2(e.requested_capacity)
+            capacity = self._get_grown_capacity(e.requested_capacity)
             self._version += 1
             for buffer, _ in self.buffer_attributes:
                 buffer.resize(capacity * buffer.element_size)
@@ -277,7 +379,167 @@ class VertexDomain(object):
         :rtype: `VertexList`
         '''
         start = self._safe_alloc(count)
-        return VertexList(self, start, count)
+        vertex_list = VertexList(self, start, count)
+        self._vertex_lists.add(vertex_list)
+        return vertex_list
+
+    def create_many(self, n, count):
+        '''Create `n` vertex lists of the same size in this domain.
+
+        The vertex lists are allocated as one contiguous range, the first
+        list at the lowest position, so that their attribute data can be set
+        with a single call to `set_attribute_data`.  Each can afterwards be
+        resized or deleted independently.
+
+        :Parameters:
+            `n` : int
+                Number of vertex lists to create.
+            `count` : int
+                Number of vertices in each vertex list.
+
+        :since: pyglet 1.3
+
+        :rtype: list of `VertexList`
+        '''
+        start = self._safe_alloc(n * count)
+        vertex_lists = [VertexList(self, start + i * count, count)
+                        for i in range(n)]
+        self._vertex_lists.update(vertex_lists)
+        return vertex_lists
+
+    def set_attribute_data(self, i, start, count, data):
+        '''Set the data of an attribute over a range of vertices.
+
+        :Parameters:
+            `i` : int
+                Index of the attribute in `attributes`.
+            `start` : int
+                First vertex to set.
+            `count` : int
+                Number of vertices to set.
+            `data` : sequence
+                Attribute data, with components for each vertex.  ctypes
+                arrays of the attribute's type and NumPy arrays are copied
+                without iterating over the elements in Python.
+
+        :since: pyglet 1.3
+        '''
+        attribute = self.attributes[i]
+        region = attribute.get_region(attribute.buffer, start, count)
+        _copy_data(region.array, data)
+        region.invalidate()
+
+    def _get_compact_capacity(self, allocator, count):
+        # Leave room at the end for about a quarter more, so that lists
+        # created after compacting do not immediately grow the buffers.
+        capacity = max(self._initial_count,
+                       self._get_grown_capacity(count + count // 4))
+        return min(capacity, allocator.capacity)
+
+    def _is_fragmented(self, allocator):
+        threshold = self.compact_threshold
+        if threshold is None:
+            return False
+        if (allocator.get_fragmented_free_size() <
+                allocator.capacity * self.compact_min_free):
+            return False
+        return allocator.get_fragmentation() > threshold
+
+    def _get_allocation_version(self):
+        return self.allocator.version
+
+    def _needs_compact(self):
+        return (self._is_fragmented(self.allocator) and
+                self._compact_refused_version != self._get_allocation_version())
+
+    def _can_compact(self):
+        # Vertex lists that were garbage collected without being deleted
+        # still hold space in the buffers (and are still drawn), but the
+        # domain no longer knows where, so it cannot move the other vertex
+        # lists past them.
+        if (sum(v.count for v in self._vertex_lists) !=
+                self.allocator.capacity - self.allocator.get_free_size()):
+            self._compact_refused_version = self._get_allocation_version()
+            return False
+        return True
+
+    def _compact_vertices(self):
+        '''Move vertex lists to the start of the buffers, preserving their
+        order, and shrink the buffers.
+
+        :rtype: list of (`VertexList`, int)
+        :return: The vertex lists that moved, with the distance they moved.
+        '''
+        vertex_lists = sorted(self._vertex_lists, key=lambda v: v.start)
+        moved = []
+        count = 0
+        for vertex_list in vertex_lists:
+            if vertex_list.start != count:
+                moved.append((vertex_list, count - vertex_list.start))
+            count += vertex_list.count
+
+        # Destinations are always below their sources, so copying in
+        # ascending order never overwrites data that is yet to be moved.
+        if moved:
+            for buffer, _ in self.buffer_attributes:
+                element_size = buffer.element_size
+                region = buffer.get_region(0, buffer.size,
+                    ctypes.POINTER(ctypes.c_byte * buffer.size))
+                base = ctypes.addressof(region.array)
+                for vertex_list, diff in moved:
+                    start = vertex_list.start * element_size
+                    ctypes.memmove(base + start + diff * element_size,
+                                   base + start,
+                                   vertex_list.count * element_size)
+                region.invalidate()
+            for vertex_list, diff in moved:
+                vertex_list.start += diff
+
+        capacity = self._get_compact_capacity(self.allocator, count)
+        if capacity < self.allocator.capacity:
+            for buffer, _ in self.buffer_attributes:
+                buffer.resize(capacity * buffer.element_size)
+        self.allocator = allocation.Allocator(capacity)
+        self.allocator.alloc(count)
+        return moved
+
+    def compact(self):
+        '''Move all vertex lists in the domain into a single contiguous
+        range, and shrink the buffers to fit.
+
+        The `start` of vertex lists in the domain may change, and any arrays
+        previously obtained from them become invalid.
+
+        The domain is not compacted if it holds vertex lists that were
+        garbage collected without being deleted.
+
+        :since: pyglet 1.3
+        '''
+        if not self._can_compact():
+            return
+        self._compact_vertices()
+        self._version += 1
+        self._draw_ranges_version = None
+
+    def _get_draw_ranges(self):
+        '''Get the ranges to draw all vertex lists in the domain.
+
+        The ctypes arrays are only rebuilt when the allocator has changed
+        since they were last built.
+
+        :rtype: (int, ctypes array, ctypes array)
+        :return: primcount, starts, sizes
+        '''
+        version = self.allocator.version
+        if self._draw_ranges_version != version:
+            starts, sizes = self.allocator.get_allocated_regions()
+            primcount = len(starts)
+            self._draw_ranges = (primcount,
+                                 (GLint * primcount)(*starts),
+                                 (GLsizei * primcount)(*sizes))
+            self._draw_ranges_version = version
+            self.range_rebuild_count += 1
+        return self._draw_ranges
 
     def draw(self, mode, vertex_list=None):
         '''Draw vertices in the domain.
@@ -295,6 +557,9 @@ class VertexDomain(object):
                 Vertex list to draw, or ``None`` for all lists in this domain.
 
         '''
+        if vertex_list is None and self._needs_compact():
+            self.compact()
+
         glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
         for buffer, attributes in self.buffer_attributes:
             buffer.bind()
@@ -307,16 +572,13 @@ class VertexDomain(object):
         if vertex_list is not None:
             glDrawArrays(mode, vertex_list.start, vertex_list.count)
         else:
-            starts, sizes = self.allocator.get_allocated_regions()
-            primcount = len(starts)
+            primcount, starts, sizes = self._get_draw_ranges()
             if primcount == 0:
                 pass
             elif primcount == 1:
                 # Common case
                 glDrawArrays(mode, starts[0], sizes[0])
             elif gl_info.have_version(1, 4):
-                starts = (GLint * primcount)(*starts)
-                sizes = (GLsizei * primcount)(*sizes)
                 glMultiDrawArrays(mode, starts, sizes, primcount)
             else:
                 for start, size in zip(starts, sizes):
@@ -326,8 +588,38 @@ class VertexDomain(object):
             buffer.unbind()
         glPopClientAttrib()
 
+    def get_upload_stats(self):
+        '''Get the amount of data uploaded to OpenGL for this domain.
+
+        The totals cover every buffer of the domain since it was created;
+        compare the result from one frame to the next to measure bandwidth.
+
+        :since: pyglet 1.3
+
+        :rtype: (int, int)
+        :return: Number of bytes uploaded and number of upload calls.
+        '''
+        buffers = [buffer for buffer, _ in self.buffer_attributes]
+        return (sum(buffer.bytes_uploaded for buffer in buffers),
+                sum(buffer.upload_calls for buffer in buffers))
+
+    def get_memory_usage(self):
+        '''Get the amount of buffer memory used by the domain.
+
+        :since: pyglet 1.3
+
+        :rtype: (int, int)
+        :return: Number of bytes holding vertex lists, and the total size
+            of the domain's buffers in bytes.
+        '''
+        allocator = self.allocator
+        count = allocator.capacity - allocator.get_free_size()
+        buffers = [buffer for buffer, _ in self.buffer_attributes]
+        return (sum(count * buffer.element_size for buffer in buffers),
+                sum(buffer.size for buffer in buffers))
+
     def _is_empty(self):
-        return not self.allocator.starts
+        return self.allocator._is_empty()
 
     def __repr__(self):
         return '<%s@%x %s>' % (self.__class__.__name__, id(self),
@@ -400,6 +692,7 @@ class VertexList(object):
     def delete(self):
         '''Delete this group.'''
         self.domain.allocator.dealloc(self.start, self.count)
+        self.domain._vertex_lists.discard(self)
 
     def migrate(self, domain):
         '''Move this group from its current domain and add to the specified
@@ -425,8 +718,10 @@ class VertexList(object):
             new.invalidate()
 
         self.domain.allocator.dealloc(self.start, self.count)
+        self.domain._vertex_lists.discard(self)
         self.domain = domain
         self.start = new_start
+        domain._vertex_lists.add(self)
 
         self._colors_cache_version = None
         self._fog_coords_cache_version = None
@@ -436,12 +731,17 @@ class VertexList(object):
         self._tex_coords_cache_version = None
         self._vertices_cache_version = None
 
+    def _get_region(self, attribute):
+        # Region backing one of the attribute properties.  Interleaved
+        # attributes cannot be viewed as flat NumPy arrays, so they keep
+        # the ctypes-like region, which supports flat indexing.
+        if self.domain.numpy_arrays and attribute.stride == attribute.size:
+            return attribute.get_numpy_region(attribute.buffer,
+                                              self.start, self.count)
+        return attribute.get_region(attribute.buffer, self.start, self.count)
+
     def _set_attribute_data(self, i, data):
-        attribute = self.domain.attributes[i]
-        # TODO without region
-        region = attribute.get_region(attribute.buffer, self.start, self.count)
-        region.array[:] = data
-        region.invalidate()
+        self.domain.set_attribute_data(i, self.start, self.count, data)
 
     # ---
 
@@ -449,8 +749,7 @@ class VertexList(object):
         if (self._colors_cache_version != self.domain._version):
             domain = self.domain
             attribute = domain.attribute_names['colors']
-            self._colors_cache = attribute.get_region(
-                attribute.buffer, self.start, self.count)
+            self._colors_cache = self._get_region(attribute)
             self._colors_cache_version = domain._version
 
         region = self._colors_cache
@@ -471,8 +770,7 @@ class VertexList(object):
         if (self._fog_coords_cache_version != self.domain._version):
             domain = self.domain
             attribute = domain.attribute_names['fog_coords']
-            self._fog_coords_cache = attribute.get_region(
-                attribute.buffer, self.start, self.count)
+            self._fog_coords_cache = self._get_region(attribute)
             self._fog_coords_cache_version = domain._version
 
         region = self._fog_coords_cache
@@ -493,8 +791,7 @@ class VertexList(object):
         if (self._edge_flags_cache_version != self.domain._version):
             domain = self.domain
             attribute = domain.attribute_names['edge_flags']
-            self._edge_flags_cache = attribute.get_region(
-                attribute.buffer, self.start, self.count)
+            self._edge_flags_cache = self._get_region(attribute)
             self._edge_flags_cache_version = domain._version
 
         region = self._edge_flags_cache
@@ -515,8 +812,7 @@ class VertexList(object):
         if (self._normals_cache_version != self.domain._version):
             domain = self.domain
             attribute = domain.attribute_names['normals']
-            self._normals_cache = attribute.get_region(
-                attribute.buffer, self.start, self.count)
+            self._normals_cache = self._get_region(attribute)
             self._normals_cache_version = domain._version
 
         region = self._normals_cache
@@ -537,8 +833,7 @@ class VertexList(object):
         if (self._secondary_colors_cache_version != self.domain._version):
             domain = self.domain
             attribute = domain.attribute_names['secondary_colors']
-            self._secondary_colors_cache = attribute.get_region(
-                attribute.buffer, self.start, self.count)
+            self._secondary_colors_cache = self._get_region(attribute)
             self._secondary_colors_cache_version = domain._version
 
         region = self._secondary_colors_cache
@@ -563,8 +858,7 @@ class VertexList(object):
             if (self._tex_coords_cache_version != self.domain._version):
                 domain = self.domain
                 attribute = domain.attribute_names['tex_coords']
-                self._tex_coords_cache = attribute.get_region(
-                    attribute.buffer, self.start, self.count)
+                self._tex_coords_cache = self._get_region(attribute)
                 self._tex_coords_cache_version = domain._version
 
             region = self._tex_coords_cache
@@ -574,7 +868,7 @@ class VertexList(object):
             return None
 
     def _set_tex_coords(self, data):
-        if self._get_tex_coords() != None:
+        if self._get_tex_coords() is not None:
             self._get_tex_coords()[:] = data
 
     tex_coords = property(_get_tex_coords, _set_tex_coords,
@@ -589,8 +883,7 @@ class VertexList(object):
                 attribute = domain.attribute_names['multi_tex_coords']
                 self._tex_coords_cache = []
                 for a in attribute:
-                    self._tex_coords_cache.append(a.get_region(
-                        a.buffer, self.start, self.count))
+                    self._tex_coords_cache.append(self._get_region(a))
                 self._tex_coords_cache_version = domain._version
 
             region = self._tex_coords_cache
@@ -603,11 +896,11 @@ class VertexList(object):
             return None
 
     def _set_multi_tex_coords(self, data):
-        if self._get_multi_tex_coords() != None:
+        if self._get_multi_tex_coords() is not None:
             for a in range(0, len(self._tex_coords_cache),1):
                 if a > len(data):
                     break
-                elif data[a] != None:
+                elif data[a] is not None:
                     self._tex_coords_cache[a].array[:] = data[a]
 
     multi_tex_coords = property(_get_multi_tex_coords, _set_multi_tex_coords,
@@ -622,8 +915,7 @@ class VertexList(object):
         if (self._vertices_cache_version != self.domain._version):
             domain = self.domain
             attribute = domain.attribute_names['vertices']
-            self._vertices_cache = attribute.get_region(
-                attribute.buffer, self.start, self.count)
+            self._vertices_cache = self._get_region(attribute)
             self._vertices_cache_version = domain._version
 
         region = self._vertices_cache
@@ -652,7 +944,7 @@ class IndexedVertexDomain(VertexDomain):
         self.index_gl_type = index_gl_type
         self.index_c_type = vertexattribute._c_types[index_gl_type]
         self.index_element_size = ctypes.sizeof(self.index_c_type)
-        self.index_buffer = vertexbuffer.create_mappable_buffer(
+        self.index_buffer = self._create_buffer(
             self.index_allocator.capacity * self.index_element_size,
             target=GL_ELEMENT_ARRAY_BUFFER)
 
@@ -661,7 +953,7 @@ class IndexedVertexDomain(VertexDomain):
         try:
             return self.index_allocator.alloc(count)
         except allocation.AllocatorMemoryException as e:
-            capacity = _nearest_pow2(e.requested_capacity)
+            capacity = self._get_grown_capacity(e.requested_capacity)
             self._version += 1
             self.index_buffer.resize(capacity * self.index_element_size)
             self.index_allocator.set_capacity(capacity)
@@ -672,7 +964,7 @@ class IndexedVertexDomain(VertexDomain):
         try:
             return self.index_allocator.realloc(start, count, new_count)
         except allocation.AllocatorMemoryException as e:
-            capacity = _nearest_pow2(e.requested_capacity)
+            capacity = self._get_grown_capacity(e.requested_capacity)
             self._version += 1
             self.index_buffer.resize(capacity * self.index_element_size)
             self.index_allocator.set_capacity(capacity)
@@ -690,7 +982,166 @@ class IndexedVertexDomain(VertexDomain):
         '''
         start = self._safe_alloc(count)
         index_start = self._safe_index_alloc(index_count)
-        return IndexedVertexList(self, start, count, index_start, index_count)
+        vertex_list = IndexedVertexList(self, start, count,
+                                        index_start, index_count)
+        self._vertex_lists.add(vertex_list)
+        return vertex_list
+
+    def create_many(self, n, count, index_count):
+        '''Create `n` indexed vertex lists of the same size in this domain.
+
+        Vertices and indices are each allocated as one contiguous range; see
+        `VertexDomain.create_many`.
+
+        :Parameters:
+            `n` : int
+                Number of vertex lists to create.
+            `count` : int
+                Number of vertices in each vertex list.
+            `index_count` : int
+                Number of indices in each vertex list.
+
+        :since: pyglet 1.3
+
+        :rtype: list of `IndexedVertexList`
+        '''
+        start = self._safe_alloc(n * count)
+        index_start = self._safe_index_alloc(n * index_count)
+        vertex_lists = [IndexedVertexList(self,
+                                          start + i * count, count,
+                                          index_start + i * index_count,
+                                          index_count)
+                        for i in range(n)]
+        self._vertex_lists.update(vertex_lists)
+        return vertex_lists
+
+    def set_index_data(self, start, count, data):
+        '''Set a range of the index buffer.
+
+        :Parameters:
+            `start` : int
+                First index to set.
+            `count` : int
+                Number of indices to set.
+            `data` : sequence of int
+                Index data; see `VertexDomain.set_attribute_data`.
+
+        :since: pyglet 1.3
+        '''
+        region = self.get_index_region(start, count)
+        _copy_data(region.array, data)
+        region.invalidate()
+
+    def _get_allocation_version(self):
+        return self.allocator.version, self.index_allocator.version
+
+    def _needs_compact(self):
+        return ((self._is_fragmented(self.allocator) or
+                 self._is_fragmented(self.index_allocator)) and
+                self._compact_refused_version != self._get_allocation_version())
+
+    def _can_compact(self):
+        index_allocator = self.index_allocator
+        if (sum(v.index_count for v in self._vertex_lists) !=
+                index_allocator.capacity - index_allocator.get_free_size()):
+            self._compact_refused_version = self._get_allocation_version()
+            return False
+        return super(IndexedVertexDomain, self)._can_compact()
+
+    def compact(self):
+        '''Move all vertex lists in the domain into a single contiguous
+        range, and shrink the buffers to fit.  Indices are renumbered and
+        moved to a single contiguous range as well.
+
+        The `start` and `index_start` of vertex lists in the domain may
+        change, and any arrays previously obtained from them become invalid.
+
+        The domain is not compacted if it holds vertex lists that were
+        garbage collected without being deleted.
+
+        :since: pyglet 1.3
+        '''
+        if not self._can_compact():
+            return
+
+        # Renumber indices of vertex lists whose vertices moved.  Vertices
+        # only move down, so `diff` is negative.
+        moved = self._compact_vertices()
+        if moved:
+            region = self.get_index_region(0, self.index_allocator.capacity)
+            indices = region.array
+            if numpy is not None:
+                indices = numpy.ctypeslib.as_array(indices)
+            for vertex_list, diff in moved:
+                start = vertex_list.index_start
+                end = start + vertex_list.index_count
+                if numpy is not None:
+                    indices[start:end] -= -diff
+                else:
+                    indices[start:end] = list(map(diff.__add__,
+                                                  indices[start:end]))
+            region.invalidate()
+
+        vertex_lists = sorted(self._vertex_lists, key=lambda v: v.index_start)
+        buffer = self.index_buffer
+        element_size = self.index_element_size
+        region = buffer.get_region(0, buffer.size,
+            ctypes.POINTER(ctypes.c_byte * buffer.size))
+        base = ctypes.addressof(region.array)
+        count = 0
+        for vertex_list in vertex_lists:
+            if vertex_list.index_start != count:
+                ctypes.memmove(base + count * element_size,
+                               base + vertex_list.index_start * element_size,
+                               vertex_list.index_count * element_size)
+                vertex_list.index_start = count
+            count += vertex_list.index_count
+        region.invalidate()
+
+        capacity = self._get_compact_capacity(self.index_allocator, count)
+        if capacity < self.index_allocator.capacity:
+            buffer.resize(capacity * element_size)
+        self.index_allocator = allocation.Allocator(capacity)
+        self.index_allocator.alloc(count)
+
+        self._version += 1
+        self._draw_ranges_version = None
+
+    def _get_draw_ranges(self):
+        '''Get the index ranges to draw all vertex lists in the domain.
+
+        The starts are pointers (or offsets, if the index buffer is a VBO)
+        into the index buffer, as expected by ``glMultiDrawElements``.
+
+        :rtype: (int, ctypes array, ctypes array)
+        :return: primcount, starts, sizes
+        '''
+        version = (self.index_allocator.version, self.index_buffer.ptr)
+        if self._draw_ranges_version != version:
+            starts, sizes = self.index_allocator.get_allocated_regions()
+            primcount = len(starts)
+            ptr = self.index_buffer.ptr
+            element_size = self.index_element_size
+            self._draw_ranges = (primcount,
+                (ctypes.c_void_p * primcount)(
+                    *[ptr + start * element_size for start in starts]),
+                (GLsizei * primcount)(*sizes))
+            self._draw_ranges_version = version
+            self.range_rebuild_count += 1
+        return self._draw_ranges
+
+    def get_upload_stats(self):
+        bytes_uploaded, upload_calls = \
+            super(IndexedVertexDomain, self).get_upload_stats()
+        return (bytes_uploaded + self.index_buffer.bytes_uploaded,
+                upload_calls + self.index_buffer.upload_calls)
+
+    def get_memory_usage(self):
+        used, size = super(IndexedVertexDomain, self).get_memory_usage()
+        allocator = self.index_allocator
+        count = allocator.capacity - allocator.get_free_size()
+        return (used + count * self.index_element_size,
+                size + self.index_buffer.size)
 
     def get_index_region(self, start, count):
         '''Get a region of the index buffer.
@@ -724,6 +1175,9 @@ class IndexedVertexDomain(VertexDomain):
                 Vertex list to draw, or ``None`` for all lists in this domain.
 
         '''
+        if vertex_list is None and self._needs_compact():
+            self.compact()
+
         glPushClientAttrib(GL_CLIENT_VERTEX_ARRAY_BIT)
         for buffer, attributes in self.buffer_attributes:
             buffer.bind()
@@ -739,25 +1193,19 @@ class IndexedVertexDomain(VertexDomain):
                 self.index_buffer.ptr +
                     vertex_list.index_start * self.index_element_size)
         else:
-            starts, sizes = self.index_allocator.get_allocated_regions()
-            primcount = len(starts)
+            primcount, starts, sizes = self._get_draw_ranges()
             if primcount == 0:
                 pass
             elif primcount == 1:
                 # Common case
-                glDrawElements(mode, sizes[0], self.index_gl_type,
-                    self.index_buffer.ptr + starts[0])
+                glDrawElements(mode, sizes[0], self.index_gl_type, starts[0])
             elif gl_info.have_version(1, 4):
-                starts = [s * self.index_element_size + self.index_buffer.ptr for s in starts]
-                starts = ctypes.cast((GLuint * primcount)(*starts), ctypes.POINTER(ctypes.c_void_p))
-                sizes = (GLsizei * primcount)(*sizes)
-                glMultiDrawElements(mode, sizes, GL_UNSIGNED_INT, starts,
-                                    primcount)
+                glMultiDrawElements(mode, sizes, self.index_gl_type,
+                    ctypes.cast(starts, ctypes.POINTER(ctypes.c_void_p)),
+                    primcount)
             else:
                 for start, size in zip(starts, sizes):
-                    glDrawElements(mode, size, self.index_gl_type,
-                        self.index_buffer.ptr +
-                            start * self.index_element_size)
+                    glDrawElements(mode, size, self.index_gl_type, start)
 
         self.index_buffer.unbind()
         for buffer, _ in self.buffer_attributes:
@@ -852,11 +1300,7 @@ class IndexedVertexList(VertexList):
         self._indices_cache_version = None
 
     def _set_index_data(self, data):
-        # TODO without region
-        region = self.domain.get_index_region(
-            self.index_start, self.index_count)
-        region.array[:] = data
-        region.invalidate()
+        self.domain.set_index_data(self.index_start, self.index_count, data)
 
     # ---
 
@@ -865,6 +1309,11 @@ class IndexedVertexList(VertexList):
             domain = self.domain
             self._indices_cache = domain.get_index_region(
                 self.index_start, self.index_count)
+            if domain.numpy_arrays:
+                import numpy.ctypeslib
+                region = self._indices_cache
+                self._indices_cache = vertexbuffer.NumpyArrayRegion(
+                    region, numpy.ctypeslib.as_array(region.array))
             self._indices_cache_version = domain._version
 
         region = self._indices_cache
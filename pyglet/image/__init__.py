@@ -139,7 +139,6 @@ __version__ = '$Id$'
 
 from io import open
 import sys
-import re
 import warnings
 import weakref
 
@@ -153,6 +152,7 @@ from pyglet import graphics
 from pyglet.window import *
 
 from pyglet.image import atlas
+from pyglet.image import convert
 from pyglet.compat import asbytes, bytes_type, BytesIO
 
 class ImageException(Exception):
@@ -607,6 +607,11 @@ class UniformTextureSequence(TextureSequence):
 class ImageData(AbstractImage):
     '''An image represented as a string of unsigned bytes.
 
+    The data may be any object supporting the buffer protocol with
+    C-contiguous memory, such as a ctypes array, NumPy array, ``mmap`` or
+    ``memoryview``.  It is kept as-is, and uploaded to textures without being
+    copied as long as it is requested in its current format and pitch.
+
     :Ivariables:
         `data` : str
             Pixel data, encoded according to `format` and `pitch`.
@@ -621,11 +626,6 @@ class ImageData(AbstractImage):
     `format` and `pitch` to obtain the current encoding is not deprecated).
     '''
 
-    _swap1_pattern = re.compile(asbytes('(.)'), re.DOTALL)
-    _swap2_pattern = re.compile(asbytes('(.)(.)'), re.DOTALL)
-    _swap3_pattern = re.compile(asbytes('(.)(.)(.)'), re.DOTALL)
-    _swap4_pattern = re.compile(asbytes('(.)(.)(.)(.)'), re.DOTALL)
-
     _current_texture = None
     _current_mipmap_texture = None
 
@@ -640,7 +640,8 @@ class ImageData(AbstractImage):
             `format` : str
                 A valid format string, such as 'RGB', 'RGBA', 'ARGB', etc.
             `data` : sequence
-                String or array/list of bytes giving the decoded data.
+                String, or object supporting the buffer protocol, giving
+                the decoded data.
             `pitch` : int or None
                 If specified, the number of bytes per row.  Negative values
                 indicate a top-to-bottom arrangement.  Defaults to 
@@ -660,8 +661,8 @@ class ImageData(AbstractImage):
         return {
             'width': self.width, 
             'height': self.height, 
-            '_current_data': 
-                self.get_data(self._current_format, self._current_pitch), 
+            '_current_data': convert.to_bytes(
+                self.get_data(self._current_format, self._current_pitch)),
             '_current_format': self._current_format,
             '_desired_format': self._desired_format,
             '_current_pitch': self._current_pitch,
@@ -717,6 +718,10 @@ class ImageData(AbstractImage):
                 Number of bytes per row.  Negative values indicate a
                 top-to-bottom arrangement.
 
+        The data is returned without being copied if it is already in the
+        requested format and pitch; in that case it is the object given to
+        the constructor or `set_data`.
+
         :since: pyglet 1.1
 
         :rtype: sequence of bytes, or str
@@ -735,7 +740,10 @@ class ImageData(AbstractImage):
                 Number of bytes per row.  Negative values indicate a
                 top-to-bottom arrangement.
             `data` : str or sequence of bytes
-                Image data.
+                Image data: a string, or any object supporting the buffer
+                protocol with C-contiguous memory.  The data is not copied,
+                so it must not be modified until it has been uploaded to any
+                texture created from this image.
 
         :since: pyglet 1.1
         '''
@@ -955,7 +963,7 @@ class ImageData(AbstractImage):
         # Get data in required format (hopefully will be the same format it's
         # already in, unless that's an obscure format, upside-down or the
         # driver is old).
-        data = self._convert(data_format, data_pitch)
+        data = _get_gl_data(self._convert(data_format, data_pitch))
 
         if data_pitch & 0x1:
             alignment = 1
@@ -1010,75 +1018,17 @@ class ImageData(AbstractImage):
                 return asbytes(self._current_data)
             return self._current_data
 
-        self._ensure_string_data()
-        data = self._current_data
-        current_pitch = self._current_pitch
-        current_format = self._current_format
-        sign_pitch = current_pitch // abs(current_pitch)
-        if format != self._current_format:
-            # Create replacement string, e.g. r'\4\1\2\3' to convert RGBA to
-            # ARGB
-            repl = asbytes('')
-            for c in format:
-                try:
-                    idx = current_format.index(c) + 1
-                except ValueError:
-                    idx = 1
-                repl += asbytes(r'\%d' % idx)
-
-            if len(current_format) == 1:
-                swap_pattern = self._swap1_pattern
-            elif len(current_format) == 2:
-                swap_pattern = self._swap2_pattern
-            elif len(current_format) == 3:
-                swap_pattern = self._swap3_pattern
-            elif len(current_format) == 4:
-                swap_pattern = self._swap4_pattern
-            else:
-                raise ImageException(
-                    'Current image format is wider than 32 bits.')
-
-            packed_pitch = self.width * len(current_format)
-            if abs(self._current_pitch) != packed_pitch:
-                # Pitch is wider than pixel data, need to go row-by-row.
-                rows = re.findall(
-                    asbytes('.') * abs(self._current_pitch), data, re.DOTALL)
-                rows = [swap_pattern.sub(repl, r[:packed_pitch]) for r in rows]
-                data = asbytes('').join(rows)
-            else:
-                # Rows are tightly packed, apply regex over whole image.
-                data = swap_pattern.sub(repl, data)
-
-            # After conversion, rows will always be tightly packed
-            current_pitch = sign_pitch * (len(format) * self.width)
-
-        if pitch != current_pitch:
-            diff = abs(current_pitch) - abs(pitch)
-            if diff > 0:
-                # New pitch is shorter than old pitch, chop bytes off each row
-                pattern = re.compile(
-                    asbytes('(%s)%s' % ('.' * abs(pitch), '.' * diff)), re.DOTALL)
-                data = pattern.sub(asbytes(r'\1'), data)    
-            elif diff < 0:
-                # New pitch is longer than old pitch, add '0' bytes to each row
-                pattern = re.compile(
-                    asbytes('(%s)' % ('.' * abs(current_pitch))), re.DOTALL)
-                pad = '.' * -diff
-                data = pattern.sub(asbytes(r'\1%s' % pad), data)
-
-            if current_pitch * pitch < 0:
-                # Pitch differs in sign, swap row order
-                rows = re.findall(asbytes('.') * abs(pitch), data, re.DOTALL)
-                rows.reverse()
-                data = asbytes('').join(rows)
-
-        return asbytes(data)
+        if len(self._current_format) > 4:
+            raise ImageException(
+                'Current image format is wider than 32 bits.')
+
+        return convert.convert(self._current_data, self.width,
+                               self._current_format, self._current_pitch,
+                               format, pitch)
 
     def _ensure_string_data(self):
         if type(self._current_data) is not bytes_type:
-            buf = create_string_buffer(len(self._current_data))
-            memmove(buf, self._current_data, len(self._current_data))
-            self._current_data = buf.raw
+            self._current_data = convert.to_bytes(self._current_data)
 
     def _get_gl_format_and_type(self, format):
         if format == 'I':
@@ -1130,6 +1080,18 @@ class ImageData(AbstractImage):
             return GL_INTENSITY
         return GL_RGBA
 
+def _get_gl_data(data):
+    # Data that can be passed to a GL function taking a pointer, without
+    # copying it if possible.
+    if isinstance(data, (bytes_type, Array)):
+        return data
+    view = convert.get_buffer(data)
+    if isinstance(view, bytes_type):
+        return view
+    if view.readonly:
+        return (GLubyte * len(view)).from_buffer_copy(view)
+    return (GLubyte * len(view)).from_buffer(view)
+
 class ImageDataRegion(ImageData):
     def __init__(self, x, y, width, height, image_data):
         super(ImageDataRegion, self).__init__(width, height,
@@ -1142,8 +1104,8 @@ class ImageDataRegion(ImageData):
         return {
             'width': self.width, 
             'height': self.height, 
-            '_current_data': 
-                self.get_data(self._current_format, self._current_pitch), 
+            '_current_data': convert.to_bytes(
+                self.get_data(self._current_format, self._current_pitch)),
             '_current_format': self._current_format,
             '_desired_format': self._desired_format,
             '_current_pitch': self._current_pitch,
@@ -1158,11 +1120,9 @@ class ImageDataRegion(ImageData):
         x1 = len(self._current_format) * self.x
         x2 = len(self._current_format) * (self.x + self.width)
 
-        self._ensure_string_data()
         data = self._convert(self._current_format, abs(self._current_pitch))
-        rows = re.findall(b'.' * abs(self._current_pitch), data, re.DOTALL)
-        rows = [row[x1:x2] for row in rows[self.y:self.y+self.height]]
-        self._current_data = b''.join(rows)
+        self._current_data = convert.crop(data, abs(self._current_pitch),
+                                          x1, self.y, x2 - x1, self.height)
         self._current_pitch = self.width * len(self._current_format)
         self._current_texture = None
         self.x = 0
@@ -1181,12 +1141,9 @@ class ImageDataRegion(ImageData):
         x1 = len(self._current_format) * self.x
         x2 = len(self._current_format) * (self.x + self.width)
 
-        self._ensure_string_data()
         data = self._convert(self._current_format, abs(self._current_pitch))
-        rows = re.findall(asbytes('.') * abs(self._current_pitch), data,
-                          re.DOTALL)
-        rows = [row[x1:x2] for row in rows[self.y:self.y+self.height]]
-        self._current_data = asbytes('').join(rows)
+        self._current_data = convert.crop(data, abs(self._current_pitch),
+                                          x1, self.y, x2 - x1, self.height)
         self._current_pitch = self.width * len(self._current_format)
         self._current_texture = None
         self.x = 0
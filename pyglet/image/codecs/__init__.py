@@ -241,3 +241,11 @@ def add_default_image_codecs():
         add_decoders(bmp)
     except ImportError:
         pass
+
+    # Fallback: GIF loader (slow)
+    try:
+        import pyglet.image.codecs.gif
+        add_encoders(gif)
+        add_decoders(gif)
+    except ImportError:
+        pass
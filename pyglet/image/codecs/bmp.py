@@ -148,6 +148,11 @@ def to_ctypes(buffer, offset, type):
     ptr = ptr_add(ctypes.pointer(buffer), offset)
     return ctypes.cast(ptr, ctypes.POINTER(type)).contents
 
+def to_bytes(data, offset, size):
+    if offset + size > len(data):
+        raise ImageDecodeException('BMP file is truncated')
+    return data[offset:offset + size]
+
 class BMPImageDecoder(ImageDecoder):
     def get_file_extensions(self):
         return ['.bmp']
@@ -155,10 +160,10 @@ class BMPImageDecoder(ImageDecoder):
     def decode(self, file, filename):
         if not file:
             file = open(filename, 'rb')
-        bytes = file.read()
-        buffer = ctypes.c_buffer(bytes)
+        data = file.read()
+        buffer = ctypes.c_buffer(data)
 
-        if bytes[:2] != b'BM':
+        if data[:2] != b'BM':
             raise ImageDecodeException(
                 'Not a Windows bitmap file: %r' % (filename or file))
 
@@ -189,32 +194,25 @@ class BMPImageDecoder(ImageDecoder):
         bitcount = info_header.biBitCount 
         if bitcount == 1:
             pitch = (width + 7) // 8
-            bits_type = ctypes.c_ubyte
             decoder = decode_1bit
         elif bitcount == 4:
             pitch = (width + 1) // 2
-            bits_type = ctypes.c_ubyte
             decoder = decode_4bit
         elif bitcount == 8:
-            bits_type = ctypes.c_ubyte
             pitch = width
             decoder = decode_8bit
         elif bitcount == 16:
             pitch = width * 2
-            bits_type = ctypes.c_uint16
             decoder = decode_bitfields
         elif bitcount == 24:
             pitch = width * 3
-            bits_type = ctypes.c_ubyte
             decoder = decode_24bit 
         elif bitcount == 32:
             pitch = width * 4
             if compression == BI_RGB:
                 decoder = decode_32bit_rgb
-                bits_type = ctypes.c_ubyte
             elif compression == BI_BITFIELDS:
                 decoder = decode_bitfields
-                bits_type = ctypes.c_uint32
             else:
                 raise ImageDecodeException(
                     'Unsupported compression: %r' % (filename or file))
@@ -223,17 +221,14 @@ class BMPImageDecoder(ImageDecoder):
                 'Unsupported bit count %d: %r' % (bitcount, filename or file))
 
         pitch = (pitch + 3) & ~3
-        packed_width = pitch // ctypes.sizeof(bits_type)
 
         if bitcount < 16 and compression == BI_RGB: 
             clr_used = info_header.biClrUsed or (1 <<  bitcount)
             palette = to_ctypes(buffer, palette_offset, RGBQUAD * clr_used)
-            bits = to_ctypes(buffer, bits_offset, 
-                             bits_type * packed_width * height)
+            bits = to_bytes(data, bits_offset, pitch * height)
             return decoder(bits, palette, width, height, pitch, pitch_sign)
         elif bitcount >= 16 and compression == BI_RGB:
-            bits = to_ctypes(buffer, bits_offset, 
-                             bits_type * (packed_width * height))
+            bits = to_bytes(data, bits_offset, pitch * height)
             return decoder(bits, None, width, height, pitch, pitch_sign)
         elif compression == BI_BITFIELDS:
             if info_header.biSize >= ctypes.sizeof(BITMAPV4HEADER):
@@ -249,74 +244,54 @@ class BMPImageDecoder(ImageDecoder):
                 r_mask = fields.red
                 g_mask = fields.green
                 b_mask = fields.blue
-            class _BitsArray(ctypes.LittleEndianStructure):
-                _pack_ = 1
-                _fields_ = [
-                    ('data', bits_type * packed_width * height),
-                ]
-            bits = to_ctypes(buffer, bits_offset, _BitsArray).data
-            return decoder(bits, r_mask, g_mask, b_mask, 
+            bits = to_bytes(data, bits_offset, pitch * height)
+            return decoder(bits, r_mask, g_mask, b_mask, bitcount // 8,
                            width, height, pitch, pitch_sign)
 
-def decode_1bit(bits, palette, width, height, pitch, pitch_sign):
-    rgb_pitch = (((pitch << 3) + 7) & ~0x7) * 3
-    buffer = (ctypes.c_ubyte * (height * rgb_pitch))()
-    i = 0
-    for row in bits:
-        for packed in row:
-            for _ in range(8):
-                rgb = palette[(packed & 0x80) >> 7]
-                buffer[i] = rgb.rgbRed
-                buffer[i + 1] = rgb.rgbGreen
-                buffer[i + 2] = rgb.rgbBlue
-                i += 3
-                packed <<= 1
+# Pixels are decoded with a lookup table for each output channel, applied to
+# whole images at once with bytes.translate.
+
+def decode_palette(bits, palette, bitcount, width, height, pitch,
+                   pitch_sign):
+    # Each byte holds 8 // bitcount palette indices, most significant first.
+    # Rows are expanded to every index they hold, including padding.
+    per_byte = 8 // bitcount
+    mask = (1 << bitcount) - 1
+    channels = [[entry.rgbRed for entry in palette],
+                [entry.rgbGreen for entry in palette],
+                [entry.rgbBlue for entry in palette]]
+    for channel in channels:
+        channel.extend([0] * (mask + 1 - len(channel)))
+
+    stride = per_byte * 3
+    buffer = bytearray(len(bits) * stride)
+    for i in range(per_byte):
+        shift = 8 - bitcount * (i + 1)
+        for c, channel in enumerate(channels):
+            table = bytearray([channel[(b >> shift) & mask]
+                               for b in range(256)])
+            buffer[i * 3 + c::stride] = bits.translate(bytes(table))
+
+    return ImageData(width, height, 'RGB', buffer, pitch_sign * pitch * stride)
 
-    return ImageData(width, height, 'RGB', buffer, pitch_sign * rgb_pitch)
+def decode_1bit(bits, palette, width, height, pitch, pitch_sign):
+    return decode_palette(bits, palette, 1, width, height, pitch, pitch_sign)
 
 def decode_4bit(bits, palette, width, height, pitch, pitch_sign):
-    rgb_pitch = (((pitch << 1) + 1) & ~0x1) * 3
-    buffer = (ctypes.c_ubyte * (height * rgb_pitch))()
-    i = 0
-    for row in bits:
-        for packed in row:
-            for index in ((packed & 0xf0) >> 4, packed & 0xf):
-                rgb = palette[index]
-                buffer[i] = rgb.rgbRed
-                buffer[i + 1] = rgb.rgbGreen
-                buffer[i + 2] = rgb.rgbBlue
-                i += 3
-
-    return ImageData(width, height, 'RGB', buffer, pitch_sign * rgb_pitch)
+    return decode_palette(bits, palette, 4, width, height, pitch, pitch_sign)
 
 def decode_8bit(bits, palette, width, height, pitch, pitch_sign):
-    rgb_pitch = pitch * 3
-    buffer = (ctypes.c_ubyte * (height * rgb_pitch))()
-    i = 0
-    for row in bits:
-        for index in row:
-            rgb = palette[index]
-            buffer[i] = rgb.rgbRed
-            buffer[i + 1] = rgb.rgbGreen
-            buffer[i + 2] = rgb.rgbBlue
-            i += 3
-
-    return ImageData(width, height, 'RGB', buffer, pitch_sign * rgb_pitch)
-
+    return decode_palette(bits, palette, 8, width, height, pitch, pitch_sign)
 
 def decode_24bit(bits, palette, width, height, pitch, pitch_sign):
-    buffer = (ctypes.c_ubyte * (height * pitch))()
-    ctypes.memmove(buffer, bits, len(buffer))
-    return ImageData(width, height, 'BGR', buffer, pitch_sign * pitch)
+    return ImageData(width, height, 'BGR', bits, pitch_sign * pitch)
 
 def decode_32bit_rgb(bits, palette, width, height, pitch, pitch_sign):
-    buffer = (ctypes.c_ubyte * (height * pitch))()
-    ctypes.memmove(buffer, bits, len(buffer))
-    return ImageData(width, height, 'BGRA', buffer, pitch_sign * pitch)
+    return ImageData(width, height, 'BGRA', bits, pitch_sign * pitch)
 
 def get_shift(mask):
     if not mask:
-        return 0
+        return 0, 0
 
     # Shift down
     shift = 0
@@ -334,23 +309,38 @@ def get_shift(mask):
     else:
         return s, 0
 
-def decode_bitfields(bits, r_mask, g_mask, b_mask, 
-                     width, height, pitch, pitch_sign):
-    r_shift1, r_shift2 = get_shift(r_mask)
-    g_shift1, g_shift2 = get_shift(g_mask)
-    b_shift1, b_shift2 = get_shift(b_mask)
+if hasattr(int, 'from_bytes'):
+    def _or_bytes(a, b):
+        return (int.from_bytes(a, 'little') |
+                int.from_bytes(b, 'little')).to_bytes(len(a), 'little')
+else:
+    def _or_bytes(a, b):
+        return bytes(bytearray([x | y for x, y in zip(bytearray(a),
+                                                      bytearray(b))]))
 
-    rgb_pitch = 3 * len(bits[0])
-    buffer = (ctypes.c_ubyte * (height * rgb_pitch))()
-
-    i = 0
-    for row in bits:
-        for packed in row:
-            buffer[i] = (packed & r_mask) >> r_shift1 << r_shift2
-            buffer[i+1] = (packed & g_mask) >> g_shift1 << g_shift2
-            buffer[i+2] = (packed & b_mask) >> b_shift1 << b_shift2
-            i += 3
+def decode_bitfields(bits, r_mask, g_mask, b_mask, bytes_per_pixel,
+                     width, height, pitch, pitch_sign):
+    # Each channel is the bitwise OR of the contributions of the individual
+    # bytes of the little-endian pixels, which are looked up separately.
+    planes = [bits[i::bytes_per_pixel] for i in range(bytes_per_pixel)]
+    buffer = bytearray(len(planes[0]) * 3)
+    for c, mask in enumerate((r_mask, g_mask, b_mask)):
+        shift1, shift2 = get_shift(mask)
+        channel = None
+        for i, plane in enumerate(planes):
+            if not (mask >> (i * 8)) & 0xff:
+                continue
+            table = bytearray([((b << (i * 8)) & mask) >> shift1 << shift2
+                               & 0xff for b in range(256)])
+            value = plane.translate(bytes(table))
+            if channel is None:
+                channel = value
+            else:
+                channel = _or_bytes(channel, value)
+        if channel is not None:
+            buffer[c::3] = channel
 
+    rgb_pitch = 3 * (pitch // bytes_per_pixel)
     return ImageData(width, height, 'RGB', buffer, pitch_sign * rgb_pitch)
 
 def get_decoders():
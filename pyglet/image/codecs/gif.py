@@ -32,30 +32,54 @@
 # POSSIBILITY OF SUCH DAMAGE.
 # ----------------------------------------------------------------------------
 
-'''Read GIF control data.
+'''Read GIF control data, and decode GIF images and animations.
+
+`read` parses the block structure of a GIF stream, keeping the compressed
+data of each image.  `GIFImageDecoder` decompresses the images and
+composes the frames of animations lazily, one frame at a time, as they are
+first accessed.
 
 http://www.w3.org/Graphics/GIF/spec-gif89a.txt
 '''
 from __future__ import print_function
 from __future__ import division
 from builtins import object
+from builtins import range
 
 __docformat__ = 'restructuredtext'
 __version__ = '$Id$'
 
 import struct
 
-from pyglet.image.codecs import ImageDecodeException
+from pyglet.image import ImageData, Animation, AnimationFrame
+from pyglet.image.codecs import ImageDecoder, ImageDecodeException
 
 class GIFStream(object):
+    width = 0
+    height = 0
+    color_table = None
+
     def __init__(self):
         self.images = []
 
 class GIFImage(object):
     delay = None
+    disposal = 0
+    transparent_index = None
+
+    left = 0
+    top = 0
+    width = 0
+    height = 0
+    interlaced = False
+    color_table = None
+    lzw_code_size = 0
+    data = b''
 
 class GraphicsScope(object):
     delay = None
+    disposal = 0
+    transparent_index = None
 
 # Appendix A.
 LABEL_EXTENSION_INTRODUCER = 0x21
@@ -63,6 +87,11 @@ LABEL_GRAPHIC_CONTROL_EXTENSION = 0xf9
 LABEL_IMAGE_DESCRIPTOR = 0x2c
 LABEL_TRAILER = 0x3b
 
+# 23. Disposal methods
+DISPOSE_NONE = 1
+DISPOSE_BACKGROUND = 2
+DISPOSE_PREVIOUS = 3
+
 def unpack(format, file):
     size = struct.calcsize(format)
     data = file.read(size)
@@ -94,13 +123,16 @@ def read(file):
      logical_screen_height,
      fields, 
      background_color_index,
-     pixel_aspect_ratio) = unpack('HHBBB', file)
+     pixel_aspect_ratio) = unpack('<HHBBB', file)
     global_color_table_flag = fields & 0x80
     global_color_table_size = fields & 0x7
+    stream.width = logical_screen_width
+    stream.height = logical_screen_height
 
     # 19. Global color table
     if global_color_table_flag:
         global_color_table = file.read(6 << global_color_table_size)
+        stream.color_table = global_color_table
 
     # <Data>*
     graphics_scope = GraphicsScope()
@@ -131,17 +163,33 @@ def skip_data_sub_blocks(file):
         data = file.read(block_size)
         block_size = read_byte(file)
 
+def read_data_sub_blocks(file):
+    # 15. Data sub-blocks
+    blocks = []
+    block_size = read_byte(file)
+    while block_size != 0:
+        blocks.append(file.read(block_size))
+        block_size = read_byte(file)
+    return b''.join(blocks)
+
 def read_table_based_image(file, stream, graphics_scope):
     gif_image = GIFImage()
     stream.images.append(gif_image)
     gif_image.delay = graphics_scope.delay
+    gif_image.disposal = graphics_scope.disposal
+    gif_image.transparent_index = graphics_scope.transparent_index
         
     # 20. Image descriptor
     (image_left_position,
      image_top_position,
      image_width,
      image_height,
-     fields) = unpack('HHHHB', file)
+     fields) = unpack('<HHHHB', file)
+    gif_image.left = image_left_position
+    gif_image.top = image_top_position
+    gif_image.width = image_width
+    gif_image.height = image_height
+    gif_image.interlaced = bool(fields & 0x40)
 
     local_color_table_flag = fields & 0x80
     local_color_table_size = fields & 0x7
@@ -149,10 +197,13 @@ def read_table_based_image(file, stream, graphics_scope):
     # 21. Local color table
     if local_color_table_flag:
         local_color_table = file.read(6 << local_color_table_size)
+        gif_image.color_table = local_color_table
+    else:
+        gif_image.color_table = stream.color_table
 
     # 22. Table based image data
-    lzw_code_size = file.read(1)
-    skip_data_sub_blocks(file)
+    gif_image.lzw_code_size = read_byte(file)
+    gif_image.data = read_data_sub_blocks(file)
 
 def read_graphic_control_extension(file, stream, graphics_scope):
     # 23. Graphic control extension
@@ -160,9 +211,13 @@ def read_graphic_control_extension(file, stream, graphics_scope):
      fields,
      delay_time,
      transparent_color_index,
-     terminator) = unpack('BBHBB', file)
+     terminator) = unpack('<BBHBB', file)
     if block_size != 4:
         raise ImageDecodeException('Incorrect block size')
+
+    graphics_scope.disposal = (fields >> 2) & 0x7
+    if fields & 0x1:
+        graphics_scope.transparent_index = transparent_color_index
     
     if delay_time:
         # Follow Firefox/Mac behaviour: use 100ms delay for any delay
@@ -170,3 +225,260 @@ def read_graphic_control_extension(file, stream, graphics_scope):
         if delay_time <= 1:
             delay_time = 10
         graphics_scope.delay = float(delay_time) / 100
+
+def decode_lzw(data, lzw_code_size, size):
+    '''Decompress the LZW-encoded data of an image.
+
+    :Parameters:
+        `data` : bytes
+            Image data, with the data sub-blocks joined.
+        `lzw_code_size` : int
+            Minimum code size given before the image data.
+        `size` : int
+            Number of pixels in the image.
+
+    :rtype: bytes
+    :return: One color index per pixel, truncated or padded with zeros to
+        `size` bytes.
+    '''
+    if not 1 <= lzw_code_size <= 11:
+        raise ImageDecodeException('Invalid LZW code size')
+    clear_code = 1 << lzw_code_size
+    end_code = clear_code + 1
+    initial_table = [bytes(bytearray([i])) for i in range(clear_code)]
+    initial_table += [b'', b'']
+
+    table = list(initial_table)
+    code_size = lzw_code_size + 1
+    code_mask = (1 << code_size) - 1
+    prev = None
+    output = []
+    bits = 0
+    n_bits = 0
+    for byte in bytearray(data):
+        bits |= byte << n_bits
+        n_bits += 8
+        while n_bits >= code_size:
+            code = bits & code_mask
+            bits >>= code_size
+            n_bits -= code_size
+
+            if code == clear_code:
+                table = list(initial_table)
+                code_size = lzw_code_size + 1
+                code_mask = (1 << code_size) - 1
+                prev = None
+                continue
+            elif code == end_code:
+                break
+
+            if code < len(table):
+                entry = table[code]
+                if prev is not None and len(table) < 4096:
+                    table.append(prev + entry[:1])
+            elif prev is not None and code == len(table):
+                entry = prev + prev[:1]
+                if len(table) < 4096:
+                    table.append(entry)
+            else:
+                raise ImageDecodeException('Invalid LZW code')
+            output.append(entry)
+            prev = entry
+
+            if len(table) > code_mask and code_size < 12:
+                code_size += 1
+                code_mask = (1 << code_size) - 1
+        else:
+            continue
+        break
+
+    indices = b''.join(output)[:size]
+    if len(indices) < size:
+        indices += b'\0' * (size - len(indices))
+    return indices
+
+def deinterlace(indices, width, height):
+    # 24. Interlaced images store every 8th row from row 0, every 8th row from
+    # row 4, every 4th row from row 2, then every 2nd row from row 1.
+    rows = []
+    for start, step in ((0, 8), (4, 8), (2, 4), (1, 2)):
+        rows.extend(range(start, height, step))
+    result = [None] * height
+    for i, row in enumerate(rows):
+        result[row] = indices[i * width:(i + 1) * width]
+    return b''.join(result)
+
+def _get_table(values, default):
+    values = bytearray(values)
+    return bytes(values + bytearray([default]) * (256 - len(values)))
+
+def _interleave(channels):
+    data = bytearray(len(channels[0]) * len(channels))
+    for i, channel in enumerate(channels):
+        data[i::len(channels)] = channel
+    return data
+
+if hasattr(int, 'from_bytes'):
+    def _blend_row(old, new, mask):
+        # Bytes of `new` where `mask` is 0xff, and of `old` elsewhere.
+        old_value = int.from_bytes(old, 'little')
+        return (old_value ^ ((old_value ^ int.from_bytes(new, 'little')) &
+                             int.from_bytes(mask, 'little'))
+                ).to_bytes(len(old), 'little')
+else:
+    def _blend_row(old, new, mask):
+        return bytes(bytearray([n if m else o for o, n, m in zip(
+            bytearray(old), bytearray(new), bytearray(mask))]))
+
+def decode_image(gif_image):
+    '''Decode the pixels of an image in a GIF stream.
+
+    :Parameters:
+        `gif_image` : `GIFImage`
+            Image read by `read`.
+
+    :rtype: (bytes, bytes)
+    :return: The RGBA pixels of the image, from top to bottom, and a mask
+        with 0xff for each byte of an opaque pixel and 0 for each byte of a
+        transparent pixel, or None if all pixels are opaque.
+    '''
+    if gif_image.color_table is None:
+        raise ImageDecodeException('GIF image has no color table')
+    width = gif_image.width
+    height = gif_image.height
+    indices = decode_lzw(gif_image.data, gif_image.lzw_code_size,
+                         width * height)
+    if gif_image.interlaced:
+        indices = deinterlace(indices, width, height)
+
+    color_table = bytearray(gif_image.color_table)
+    channels = [indices.translate(_get_table(color_table[i::3], 0))
+                for i in range(3)]
+    alpha = bytearray([255]) * 256
+    transparent_index = gif_image.transparent_index
+    if transparent_index is not None and \
+            indices.find(bytes(bytearray([transparent_index]))) >= 0:
+        alpha[transparent_index] = 0
+        alpha = indices.translate(bytes(alpha))
+        return _interleave(channels + [alpha]), _interleave([alpha] * 4)
+    channels.append(indices.translate(bytes(alpha)))
+    return _interleave(channels), None
+
+def iter_frames(stream):
+    '''Compose the frames of a GIF stream.
+
+    Each image is drawn over the previous frame, which is first disposed of
+    as given by its graphic control extension.  Frames are composed as the
+    generator is advanced, so only the current frame is held in memory.
+
+    :Parameters:
+        `stream` : `GIFStream`
+            Stream read by `read`.
+
+    :rtype: iterator of (`ImageData`, `GIFImage`)
+    '''
+    width = stream.width
+    height = stream.height
+    pitch = width * 4
+    canvas = bytearray(pitch * height)
+    for gif_image in stream.images:
+        pixels, mask = decode_image(gif_image)
+
+        # Region of the canvas covered by the image.
+        x = min(gif_image.left, width)
+        y = min(gif_image.top, height)
+        row_size = (min(x + gif_image.width, width) - x) * 4
+        rows = min(y + gif_image.height, height) - y
+        image_pitch = gif_image.width * 4
+        offsets = [((y + row) * pitch + x * 4, row * image_pitch)
+                   for row in range(rows)]
+
+        if gif_image.disposal == DISPOSE_PREVIOUS:
+            saved = [canvas[offset:offset + row_size]
+                     for offset, _ in offsets]
+
+        for offset, image_offset in offsets:
+            new = pixels[image_offset:image_offset + row_size]
+            if mask is not None:
+                new = _blend_row(canvas[offset:offset + row_size], new,
+                                 mask[image_offset:image_offset + row_size])
+            canvas[offset:offset + row_size] = new
+
+        yield ImageData(width, height, 'RGBA', bytes(canvas), -pitch), \
+              gif_image
+
+        if gif_image.disposal == DISPOSE_BACKGROUND:
+            # Browsers restore to transparent rather than the background
+            # color.
+            for offset, _ in offsets:
+                canvas[offset:offset + row_size] = bytearray(row_size)
+        elif gif_image.disposal == DISPOSE_PREVIOUS:
+            for (offset, _), row in zip(offsets, saved):
+                canvas[offset:offset + row_size] = row
+
+class GIFAnimationFrames(object):
+    '''Sequence of the `AnimationFrame` of a GIF animation.
+
+    Frames are composed when they are first accessed, in order, and kept
+    for later accesses.
+    '''
+    #: Duration of frames without a delay, in seconds.
+    default_delay = 0.1
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._frames = []
+        self._iterator = iter_frames(stream)
+
+    def __len__(self):
+        return len(self._stream.images)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('frame index out of range')
+        while len(self._frames) <= index:
+            image, gif_image = next(self._iterator)
+            if len(self) == 1:
+                duration = None
+            else:
+                duration = gif_image.delay or self.default_delay
+            self._frames.append(AnimationFrame(image, duration))
+        return self._frames[index]
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+class GIFImageDecoder(ImageDecoder):
+    def get_file_extensions(self):
+        return ['.gif']
+
+    def get_animation_file_extensions(self):
+        return ['.gif']
+
+    def _read(self, file, filename):
+        if not file:
+            file = open(filename, 'rb')
+        stream = read(file)
+        if not stream.images:
+            raise ImageDecodeException(
+                'GIF file has no images: %r' % (filename or file))
+        return stream
+
+    def decode(self, file, filename):
+        stream = self._read(file, filename)
+        image, gif_image = next(iter_frames(stream))
+        return image
+
+    def decode_animation(self, file, filename):
+        return Animation(GIFAnimationFrames(self._read(file, filename)))
+
+def get_decoders():
+    return [GIFImageDecoder()]
+
+def get_encoders():
+    return []
@@ -33,6 +33,10 @@
 # ----------------------------------------------------------------------------
 
 '''Encoder and decoder for PNG files, using PyPNG (png.py).
+
+Non-interlaced images are decoded without PyPNG's row iterators: the image
+data is inflated with `zlib` and each scanline is unfiltered directly into a
+single buffer.
 '''
 
 __docformat__ = 'restructuredtext'
@@ -40,14 +44,295 @@ __version__ = '$Id: $'
 
 import array
 import itertools
+import zlib
 
 from pyglet.gl import *
 from pyglet.image import *
+from pyglet.image import convert
 from pyglet.image.codecs import *
 
 import pyglet.extlibs.png as pypng
 
 
+# Scanlines are unfiltered with arithmetic on Python integers holding a whole
+# scanline, one byte per 8-bit lane, where available (Python 3).
+_have_int_bytes = hasattr(int, 'from_bytes')
+
+# NumPy module, False if it is not installed, or None if not yet imported.
+_numpy = None
+
+def _get_numpy():
+    global _numpy
+    if _numpy is None:
+        try:
+            import numpy
+            _numpy = numpy
+        except ImportError:
+            _numpy = False
+    return _numpy
+
+
+class _Lanes(object):
+    # Masks for byte-wise arithmetic on scanlines of `size` bytes.
+    def __init__(self, size):
+        self.size = size
+        self.bits = size * 8
+        self.all = (1 << self.bits) - 1
+        self.low = int.from_bytes(b'\x7f' * size, 'little')
+        self.high = int.from_bytes(b'\x80' * size, 'little')
+        self.ones = int.from_bytes(b'\x01' * size, 'little')
+
+    def add(self, a, b):
+        # Add each byte of `a` to the corresponding byte of `b`, modulo 256.
+        low = self.low
+        return ((a & low) + (b & low)) ^ ((a ^ b) & self.high)
+
+
+def _undo_sub(line, unit, lanes):
+    # Prefix sum of the bytes `unit` apart, in log2(width) whole-line steps.
+    x = int.from_bytes(line, 'little')
+    shift = unit * 8
+    while shift < lanes.bits:
+        x = lanes.add(x, (x << shift) & lanes.all)
+        shift <<= 1
+    return x.to_bytes(lanes.size, 'little')
+
+
+def _undo_up(line, prev, lanes):
+    return lanes.add(int.from_bytes(line, 'little'),
+                     int.from_bytes(prev, 'little')).to_bytes(lanes.size,
+                                                              'little')
+
+
+def _undo_average(line, prev, unit):
+    row = bytearray(line)
+    for i in range(unit):
+        row[i] = (row[i] + (prev[i] >> 1)) & 0xff
+    for i in range(unit, len(row)):
+        row[i] = (row[i] + ((row[i - unit] + prev[i]) >> 1)) & 0xff
+    return row
+
+
+def _undo_paeth(line, prev, unit):
+    row = bytearray(line)
+    for i in range(unit):
+        row[i] = (row[i] + prev[i]) & 0xff
+    for i in range(unit, len(row)):
+        a = row[i - unit]
+        b = prev[i]
+        c = prev[i - unit]
+        pa = abs(b - c)
+        pb = abs(a - c)
+        pc = abs(a + b - c - c)
+        if pa <= pb and pa <= pc:
+            row[i] = (row[i] + a) & 0xff
+        elif pb <= pc:
+            row[i] = (row[i] + b) & 0xff
+        else:
+            row[i] = (row[i] + c) & 0xff
+    return row
+
+
+def _unfilter_rows(raw, height, row_bytes, unit):
+    # Undo the filter of each scanline in turn.
+    raw = memoryview(raw)
+    data = bytearray(height * row_bytes)
+    view = memoryview(data)
+    lanes = _Lanes(row_bytes)
+    prev = bytes(row_bytes)
+    src = 0
+    for dst in range(0, len(data), row_bytes):
+        filter_type = raw[src]
+        line = raw[src + 1:src + 1 + row_bytes]
+        if filter_type == 0:
+            row = line
+        elif filter_type == 1:
+            row = _undo_sub(line, unit, lanes)
+        elif filter_type == 2:
+            row = _undo_up(line, prev, lanes)
+        elif filter_type == 3:
+            row = _undo_average(line, prev, unit)
+        else:
+            row = _undo_paeth(line, prev, unit)
+        data[dst:dst + row_bytes] = row
+        prev = view[dst:dst + row_bytes]
+        src += row_bytes + 1
+    return data
+
+
+def _unfilter_diagonals(numpy, raw, height, row_bytes, unit):
+    # Undo the filters of all scanlines at once, one anti-diagonal of pixels
+    # at a time: each pixel depends only on the pixels to its left, above
+    # and above-left, which all lie on the two previous diagonals.
+    width = row_bytes // unit
+    raw = numpy.frombuffer(raw, numpy.uint8, height * (row_bytes + 1))
+    raw = raw.reshape(height, row_bytes + 1)
+    filters = raw[:, 0]
+    lines = raw[:, 1:].reshape(height * width, unit)
+
+    # Pixels are stored with a row of zeros above and a column of zeros to
+    # the left, so that the pixels on a diagonal, and their neighbours, are
+    # evenly spaced slices of the flattened array.
+    pitch = width + 1
+    line_step = max(1, width - 1)
+    pixels = numpy.zeros(((height + 1) * pitch, unit), numpy.uint8)
+    for diagonal in range(width + height - 1):
+        y0 = max(0, diagonal - width + 1)
+        y1 = min(height, diagonal + 1)
+        start = (y0 + 1) * pitch + diagonal - y0 + 1
+        stop = start + (y1 - y0 - 1) * width + 1
+        line_start = y0 * width + diagonal - y0
+
+        a = pixels[start - 1:stop - 1:width].astype(numpy.int16)
+        b = pixels[start - pitch:stop - pitch:width].astype(numpy.int16)
+        c = pixels[start - pitch - 1:stop - pitch - 1:width].astype(
+            numpy.int16)
+        f = filters[y0:y1, numpy.newaxis]
+
+        pa = numpy.abs(b - c)
+        pb = numpy.abs(a - c)
+        pc = numpy.abs(a + b - c - c)
+        paeth = numpy.where((pa <= pb) & (pa <= pc), a,
+                            numpy.where(pb <= pc, b, c))
+        predictor = numpy.select(
+            [f == 1, f == 2, f == 3, f == 4],
+            [a, b, (a + b) >> 1, paeth])
+        line_stop = line_start + (y1 - y0 - 1) * line_step + 1
+        pixels[start:stop:width] = (lines[line_start:line_stop:line_step] +
+                                    predictor.astype(numpy.uint8))
+
+    pixels = pixels.reshape(height + 1, pitch, unit)[1:, 1:]
+    return bytearray(pixels.tobytes())
+
+
+def _unfilter(raw, height, row_bytes, unit):
+    # Undo the filter of each scanline of the decompressed `raw` data into a
+    # single buffer of `height` rows of `row_bytes` bytes.
+    if len(raw) < height * (row_bytes + 1):
+        raise ImageDecodeException('Image data is truncated')
+    filters = bytearray(raw[::row_bytes + 1][:height])
+    if max(filters) > 4:
+        raise ImageDecodeException('Unknown filter type %d' % max(filters))
+
+    # The average and Paeth filters must be undone a byte at a time along
+    # each scanline; with NumPy, large images are instead undone a
+    # diagonal at a time.
+    slow_rows = filters.count(3) + filters.count(4)
+    if slow_rows * row_bytes > 128 * (row_bytes // unit + height):
+        numpy = _get_numpy()
+        if numpy:
+            return _unfilter_diagonals(numpy, raw, height, row_bytes, unit)
+    return _unfilter_rows(raw, height, row_bytes, unit)
+
+
+def _unpack_samples(data, width, height, row_bytes, bitdepth, scale):
+    # Expand samples of less than 8 bits to one byte each, multiplied by
+    # `scale`, and remove the padding at the end of each row.
+    per_byte = 8 // bitdepth
+    mask = (1 << bitdepth) - 1
+    samples = bytearray(len(data) * per_byte)
+    for i in range(per_byte):
+        shift = 8 - bitdepth * (i + 1)
+        table = bytes(bytearray([((b >> shift) & mask) * scale
+                                 for b in range(256)]))
+        samples[i::per_byte] = data.translate(table)
+    return convert.crop(samples, row_bytes * per_byte, 0, 0, width, height)
+
+
+def _interleave(channels):
+    data = bytearray(len(channels[0]) * len(channels))
+    for i, channel in enumerate(channels):
+        data[i::len(channels)] = channel
+    return data
+
+
+def _get_table(values, default):
+    values = bytearray(values)
+    return bytes(values + bytearray([default]) * (256 - len(values)))
+
+
+def _match_samples(planes, values, size):
+    # Lanes of 1 for the pixels whose byte in each plane equals the
+    # corresponding value, and 0 elsewhere.
+    match = _Lanes(size).ones
+    for plane, value in zip(planes, values):
+        table = bytearray(256)
+        table[value] = 1
+        match &= int.from_bytes(plane.translate(bytes(table)), 'little')
+    return match
+
+
+def _decode_direct(reader):
+    # Decode a non-interlaced image read up to its first IDAT chunk.  Returns
+    # the format and data of the image, with rows from top to bottom.
+    decompressor = zlib.decompressobj()
+    chunks = []
+    while True:
+        chunk_type, chunk_data = reader.chunk()
+        if chunk_type == b'IEND':
+            break
+        if chunk_type == b'IDAT':
+            chunks.append(decompressor.decompress(chunk_data))
+    chunks.append(decompressor.flush())
+
+    width = reader.width
+    height = reader.height
+    bitdepth = reader.bitdepth
+    planes = reader.planes
+    unit = max(1, bitdepth * planes // 8)
+    data = _unfilter(b''.join(chunks), height, reader.row_bytes, unit)
+
+    transparent = None
+    if bitdepth == 16 and reader.trns and not reader.colormap:
+        # Match the transparent colour on whole samples, before the least
+        # significant bytes are dropped.
+        byte_planes = [data[i::planes * 2] for i in range(planes * 2)]
+        byte_values = []
+        for value in reader.transparent:
+            byte_values.extend((value >> 8, value & 0xff))
+        transparent = _match_samples(byte_planes, byte_values,
+                                     width * height)
+
+    if bitdepth == 16:
+        # Keep the most significant byte of each sample.
+        data = data[0::2]
+    elif bitdepth < 8:
+        if reader.colormap:
+            scale = 1
+        else:
+            scale = 255 // ((1 << bitdepth) - 1)
+        data = _unpack_samples(data, width, height, reader.row_bytes,
+                               bitdepth, scale)
+
+    if reader.colormap:
+        if not reader.plte:
+            raise ImageDecodeException(
+                'Required PLTE chunk is missing in colour type 3 image.')
+        palette = bytearray(reader.plte)
+        channels = [data.translate(_get_table(palette[i::3], 0))
+                    for i in range(3)]
+        if reader.trns:
+            channels.append(data.translate(_get_table(reader.trns, 255)))
+            return 'RGBA', _interleave(channels)
+        return 'RGB', _interleave(channels)
+
+    formats = {1: 'L', 2: 'LA', 3: 'RGB', 4: 'RGBA'}
+    if not reader.trns:
+        return formats[planes], data
+
+    # Add an alpha channel that is zero for the transparent colour.
+    channels = [data[i::planes] for i in range(planes)]
+    if transparent is None:
+        values = reader.transparent
+        if bitdepth < 8:
+            values = [value * scale for value in values]
+        transparent = _match_samples(channels, values, width * height)
+    lanes = _Lanes(width * height)
+    channels.append(((transparent ^ lanes.ones) * 255).to_bytes(lanes.size,
+                                                               'little'))
+    return formats[planes + 1], _interleave(channels)
+
+
 class PNGImageDecoder(ImageDecoder):
     def get_file_extensions(self):
         return ['.png']
@@ -55,7 +340,15 @@ class PNGImageDecoder(ImageDecoder):
     def decode(self, file, filename):
         try:
             reader = pypng.Reader(file=file)
+            reader.preamble()
+            if _have_int_bytes and not reader.interlace:
+                format, data = _decode_direct(reader)
+                pitch = len(format) * reader.width
+                return ImageData(reader.width, reader.height, format, data,
+                                 -pitch)
             width, height, pixels, metadata = reader.asDirect()
+        except ImageDecodeException:
+            raise
         except Exception as e:
             raise ImageDecodeException(
                 'PyPNG cannot read %r: %s' % (filename or file, e))
@@ -73,7 +366,7 @@ class PNGImageDecoder(ImageDecoder):
         pitch = len(format) * width
 
         pixels = array.array('BH'[metadata['bitdepth']>8], itertools.chain(*pixels))
-        return ImageData(width, height, format, pixels.tostring(), -pitch)
+        return ImageData(width, height, format, pypng.tostring(pixels), -pitch)
 
 class PNGImageEncoder(ImageEncoder):
     def get_file_extensions(self):
@@ -0,0 +1,276 @@
+# ----------------------------------------------------------------------------
+# pyglet
+# Copyright (c) 2006-2008 Alex Holkner
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions 
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright 
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of pyglet nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+
+
+'''Conversion of image data between pixel formats and pitches.
+
+A converter is compiled once for each combination of image width, source and
+destination format and pitch, and cached.  Converters reorder channels with
+strided slice assignments and copy rows with slice assignments into a
+preallocated buffer, so that the per-pixel work is done by memory copies
+rather than by Python code.
+
+Image data may be given as ``bytes`` or as any other object supporting the
+buffer protocol with C-contiguous memory, such as a ctypes array, NumPy
+array, ``mmap`` or ``memoryview``; `get_buffer` gives its bytes without
+copying them.
+
+Format strings and pitches are interpreted as for `pyglet.image.ImageData`:
+each character of the format names one byte-sized component, and a negative
+pitch indicates that rows are arranged from top to bottom.
+
+:since: pyglet 1.3
+'''
+from __future__ import division
+from builtins import range
+
+__docformat__ = 'restructuredtext'
+__version__ = '$Id: $'
+
+#: Maximum number of compiled converters kept in the cache.
+MAX_CACHED_CONVERTERS = 256
+
+_converters = {}
+
+
+def get_buffer(data):
+    '''Get the bytes of image data without copying them.
+
+    :Parameters:
+        `data` : bytes
+            ``bytes``, or any object supporting the buffer protocol whose
+            memory is C-contiguous.
+
+    :rtype: bytes or memoryview
+    :return: ``data`` itself if it is ``bytes``, otherwise a one-dimensional
+        ``memoryview`` of its unsigned bytes.
+    '''
+    if isinstance(data, bytes):
+        return data
+    view = memoryview(data)
+    if not hasattr(view, 'cast'):
+        # Python 2 memoryviews cannot be reinterpreted as bytes.
+        return view.tobytes()
+    if not view.c_contiguous:
+        raise ValueError('Image data must be C-contiguous')
+    if view.ndim != 1 or view.format != 'B':
+        view = view.cast('B')
+    return view
+
+
+def to_bytes(data):
+    '''Get a copy of image data as ``bytes``.
+
+    ``bytes`` objects are returned as-is.
+
+    :Parameters:
+        `data` : bytes
+            ``bytes``, or any object supporting the buffer protocol whose
+            memory is C-contiguous.
+
+    :rtype: bytes
+    '''
+    data = get_buffer(data)
+    if isinstance(data, bytes):
+        return data
+    return data.tobytes()
+
+
+def _get_swizzle(src_format, dst_format):
+    # Source component index for each destination component.  Components
+    # missing from the source take the first source component.
+    swizzle = []
+    for c in dst_format:
+        try:
+            swizzle.append(src_format.index(c))
+        except ValueError:
+            swizzle.append(0)
+    return tuple(swizzle)
+
+
+def _copy_rows(data, n_rows, src_pitch, dst_pitch, flip):
+    # Copy each row of `data` into a new buffer with rows `dst_pitch` bytes
+    # apart, truncating or zero-padding each row, and optionally reversing
+    # the row order.
+    view = memoryview(data)
+    length = min(src_pitch, dst_pitch)
+    out = bytearray(n_rows * dst_pitch)
+    dst = 0
+    if flip:
+        rows = range((n_rows - 1) * src_pitch, -1, -src_pitch)
+    else:
+        rows = range(0, n_rows * src_pitch, src_pitch)
+    for src in rows:
+        out[dst:dst + length] = view[src:src + length]
+        dst += dst_pitch
+    return out
+
+
+def _swizzle(data, size, src_bpp, dst_bpp, swizzle):
+    # Reorder components of `size` bytes of tightly packed pixels.
+    size -= size % src_bpp
+    if src_bpp == dst_bpp:
+        # Start with a copy and only replace the components that move.
+        out = bytearray(data[:size])
+        for i, j in enumerate(swizzle):
+            if i != j:
+                out[i::dst_bpp] = data[j:size:src_bpp]
+    else:
+        out = bytearray(size // src_bpp * dst_bpp)
+        for i, j in enumerate(swizzle):
+            out[i::dst_bpp] = data[j:size:src_bpp]
+    return out
+
+
+def _compile(width, src_format, src_pitch, dst_format, dst_pitch):
+    src_bpp = len(src_format)
+    dst_bpp = len(dst_format)
+    abs_src_pitch = abs(src_pitch)
+    abs_dst_pitch = abs(dst_pitch)
+    flip = src_pitch * dst_pitch < 0
+
+    if src_format == dst_format:
+        def convert(data):
+            data = get_buffer(data)
+            n_rows = len(data) // abs_src_pitch
+            return bytes(_copy_rows(data, n_rows,
+                                    abs_src_pitch, abs_dst_pitch, flip))
+        return convert
+
+    swizzle = _get_swizzle(src_format, dst_format)
+    src_packed_pitch = width * src_bpp
+    dst_packed_pitch = width * dst_bpp
+    strip_rows = abs_src_pitch != src_packed_pitch
+    copy_rows = abs_dst_pitch != dst_packed_pitch or flip
+
+    def convert(data):
+        data = get_buffer(data)
+        n_rows = len(data) // abs_src_pitch
+        if strip_rows:
+            # Remove the padding at the end of each row before swizzling.
+            data = _copy_rows(data, n_rows,
+                              abs_src_pitch, src_packed_pitch, False)
+            size = len(data)
+        elif n_rows:
+            size = n_rows * abs_src_pitch
+        else:
+            size = len(data)
+        data = _swizzle(data, size, src_bpp, dst_bpp, swizzle)
+        if copy_rows:
+            data = _copy_rows(data, n_rows,
+                              dst_packed_pitch, abs_dst_pitch, flip)
+        return bytes(data)
+    return convert
+
+
+def get_converter(width, src_format, src_pitch, dst_format, dst_pitch):
+    '''Get a function converting image data between formats and pitches.
+
+    The returned function takes a single argument, the source data (see
+    `get_buffer`), and returns
+    the converted data as ``bytes``.  The number of rows converted is the
+    number of complete rows of ``abs(src_pitch)`` bytes in the source data.
+
+    Components of the destination format that are not present in the source
+    format are copied from the first source component.  Row padding added
+    by a longer destination pitch is filled with zero bytes.
+
+    :Parameters:
+        `width` : int
+            Width of the image, in pixels.
+        `src_format` : str
+            Format string of the source data.
+        `src_pitch` : int
+            Number of bytes per row of the source data.  Negative values
+            indicate a top-to-bottom arrangement.
+        `dst_format` : str
+            Format string of the returned data.
+        `dst_pitch` : int
+            Number of bytes per row of the returned data.  Negative values
+            indicate a top-to-bottom arrangement.
+
+    :rtype: callable
+    '''
+    key = (width, src_format, src_pitch, dst_format, dst_pitch)
+    try:
+        return _converters[key]
+    except KeyError:
+        pass
+
+    converter = _compile(width, src_format, src_pitch, dst_format, dst_pitch)
+    if len(_converters) >= MAX_CACHED_CONVERTERS:
+        _converters.clear()
+    _converters[key] = converter
+    return converter
+
+
+def convert(data, width, src_format, src_pitch, dst_format, dst_pitch):
+    '''Convert image data between formats and pitches.
+
+    See `get_converter` for a description of the parameters.
+
+    :rtype: bytes
+    '''
+    return get_converter(width, src_format, src_pitch,
+                         dst_format, dst_pitch)(data)
+
+
+def crop(data, pitch, x, y, width, height):
+    '''Copy a rectangular region out of image data.
+
+    :Parameters:
+        `data` : bytes
+            Source data (see `get_buffer`).
+        `pitch` : int
+            Number of bytes per row of the source data.  Must be positive.
+        `x` : int
+            Byte offset of the region within each row.
+        `y` : int
+            Index of the first row of the region.
+        `width` : int
+            Number of bytes per row of the region.
+        `height` : int
+            Number of rows in the region.
+
+    :rtype: bytes
+    :return: The region, with rows ``width`` bytes apart.
+    '''
+    view = memoryview(get_buffer(data))
+    height = max(0, min(height, len(view) // pitch - y))
+    out = bytearray(width * height)
+    src = y * pitch + x
+    for dst in range(0, width * height, width):
+        out[dst:dst + width] = view[src:src + width]
+        src += pitch
+    return bytes(out)
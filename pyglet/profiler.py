@@ -0,0 +1,379 @@
+# ----------------------------------------------------------------------------
+# pyglet
+# Copyright (c) 2006-2008 Alex Holkner
+# All rights reserved.
+# 
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions 
+# are met:
+#
+#  * Redistributions of source code must retain the above copyright
+#    notice, this list of conditions and the following disclaimer.
+#  * Redistributions in binary form must reproduce the above copyright 
+#    notice, this list of conditions and the following disclaimer in
+#    the documentation and/or other materials provided with the
+#    distribution.
+#  * Neither the name of pyglet nor the names of its
+#    contributors may be used to endorse or promote products
+#    derived from this software without specific prior written
+#    permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS
+# FOR A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE
+# COPYRIGHT OWNER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT,
+# INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING,
+# BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES;
+# LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT
+# LIABILITY, OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN
+# ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
+# POSSIBILITY OF SUCH DAMAGE.
+# ----------------------------------------------------------------------------
+
+
+'''Record where the time goes in each frame.
+
+The profiler records named, nested spans of time into a fixed-size ring
+buffer.  When enabled, the `pyglet.app` event loop records a ``frame`` span
+for each iteration, containing spans for the scheduled functions of the clock
+(one per function), the ``on_draw`` event and ``flip`` of each window, and
+each `pyglet.graphics.Batch.draw`.  Applications can add their own spans::
+
+    from pyglet import profiler
+
+    profiler.enable()
+
+    def update(dt):
+        with profiler.span('physics'):
+            world.step(dt)
+
+After running for a while, print the time spent in each part of the last few
+frames, or save a trace to open in ``chrome://tracing`` or Perfetto::
+
+    profiler.print_summary()
+    profiler.dump_chrome_trace('frames.json')
+
+The profiler can also be enabled before pyglet is imported with the
+``profile_frames`` option (see `pyglet.options`), or the
+``PYGLET_PROFILE_FRAMES`` environment variable.  When it is disabled, the
+cost to the instrumented code is a single attribute lookup.
+
+:since: pyglet 1.3
+'''
+from __future__ import division
+from __future__ import print_function
+from builtins import range
+from builtins import object
+
+__docformat__ = 'restructuredtext'
+__version__ = '$Id$'
+
+import json
+import sys
+import time
+
+import pyglet
+
+#: True if spans are being recorded.  Instrumented code checks this before
+#: calling `begin` and `end`.
+#:
+#: :type: bool
+enabled = False
+
+#: The `FrameProfiler` used by the module functions, or None if the profiler
+#: has never been enabled.
+#:
+#: :type: `FrameProfiler`
+profiler = None
+
+if hasattr(time, 'perf_counter'):
+    _default_time_function = time.perf_counter
+else:
+    _default_time_function = time.time
+
+
+class FrameProfiler(object):
+    '''Ring buffer of timed spans, grouped by frame.
+
+    The buffer is allocated once; when it is full, the oldest spans are
+    overwritten.
+    '''
+
+    def __init__(self, capacity=65536, time_function=_default_time_function):
+        '''Create a profiler.
+
+        :Parameters:
+            `capacity` : int
+                Maximum number of spans kept.
+            `time_function` : function
+                Function returning the current time in seconds.
+
+        '''
+        self.capacity = capacity
+        self.time = time_function
+
+        #: Number of the current frame.  Increased by `next_frame`.
+        self.frame = 0
+
+        # Parallel arrays of span names, start and end times, nesting depth
+        # and frame number.  An end time of None marks an open span.
+        self._names = [None] * capacity
+        self._starts = [0.] * capacity
+        self._ends = [None] * capacity
+        self._depths = [0] * capacity
+        self._frames = [0] * capacity
+
+        # Total number of spans begun; the next span is written at
+        # _count % capacity.
+        self._count = 0
+
+        # Numbers of the spans that are open, innermost last.
+        self._stack = []
+
+    def begin(self, name):
+        '''Begin a span, nested in any open span.
+
+        :Parameters:
+            `name` : str
+                Name of the span.
+
+        '''
+        n = self._count
+        i = n % self.capacity
+        self._names[i] = name
+        self._ends[i] = None
+        self._depths[i] = len(self._stack)
+        self._frames[i] = self.frame
+        self._stack.append(n)
+        self._count = n + 1
+        self._starts[i] = self.time()
+
+    def end(self):
+        '''End the innermost open span.
+        '''
+        ts = self.time()
+        n = self._stack.pop()
+        # The span may have been overwritten while it was open.
+        if n >= self._count - self.capacity:
+            self._ends[n % self.capacity] = ts
+
+    def span(self, name):
+        '''Record a span around a ``with`` block.
+
+        :Parameters:
+            `name` : str
+                Name of the span.
+
+        '''
+        return _Span(self, name)
+
+    def next_frame(self):
+        '''End the current frame and begin the next.
+
+        Spans left open by the previous frame (for example, because of an
+        exception) are ended.
+        '''
+        while self._stack:
+            self.end()
+        self.frame += 1
+        self.begin('frame')
+
+    def get_spans(self):
+        '''Get the recorded spans that have ended.
+
+        :rtype: list of tuple
+        :return: A list of ``(frame, name, start, end, depth)`` tuples, in the
+            order the spans began.  Times are in seconds.
+        '''
+        first = max(0, self._count - self.capacity)
+        spans = []
+        for n in range(first, self._count):
+            i = n % self.capacity
+            if self._ends[i] is not None:
+                spans.append((self._frames[i], self._names[i],
+                              self._starts[i], self._ends[i],
+                              self._depths[i]))
+        return spans
+
+    def get_frame_summary(self):
+        '''Get the time spent in each span of each recorded frame.
+
+        Nested spans are also counted in their parents.
+
+        :rtype: list of (int, dict)
+        :return: ``(frame, times)`` for each frame, oldest first, where
+            ``times`` maps span names to their total time in seconds.
+        '''
+        frames = []
+        times = None
+        for frame, name, start, end, depth in self.get_spans():
+            if times is None or frames[-1][0] != frame:
+                times = {}
+                frames.append((frame, times))
+            times[name] = times.get(name, 0.) + end - start
+        return frames
+
+    def print_summary(self, frames=10, columns=6, file=None):
+        '''Print a table of the time spent in the last frames.
+
+        Each row is a frame; the columns are the frame time and the spans
+        with the most time overall, in milliseconds.
+
+        :Parameters:
+            `frames` : int
+                Number of frames to print.
+            `columns` : int
+                Number of spans to print, besides the frame time.
+            `file` : file
+                File to print to; defaults to ``sys.stdout``.
+
+        '''
+        file = file or sys.stdout
+        summary = [f for f in self.get_frame_summary() if 'frame' in f[1]]
+        summary = summary[-frames:]
+
+        totals = {}
+        for frame, times in summary:
+            for name, t in times.items():
+                if name != 'frame':
+                    totals[name] = totals.get(name, 0.) + t
+        names = sorted(totals, key=lambda name: -totals[name])[:columns]
+
+        print('%8s %10s' % ('frame', 'total ms') +
+              ''.join(' %14s' % name[-14:] for name in names), file=file)
+        for frame, times in summary:
+            print('%8d %10.2f' % (frame, times['frame'] * 1000) +
+                  ''.join(' %14.2f' % (times.get(name, 0.) * 1000)
+                          for name in names), file=file)
+
+    def get_chrome_trace(self):
+        '''Get the recorded spans in the Chrome trace event format.
+
+        :rtype: dict
+        '''
+        events = []
+        for frame, name, start, end, depth in self.get_spans():
+            events.append({
+                'name': name,
+                'ph': 'X',
+                'ts': start * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': 0,
+                'tid': 0,
+                'args': {'frame': frame},
+            })
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def dump_chrome_trace(self, filename):
+        '''Save the recorded spans as a trace for ``chrome://tracing`` or
+        Perfetto.
+
+        :Parameters:
+            `filename` : str
+                Name of the JSON file to write.
+
+        '''
+        with open(filename, 'w') as f:
+            json.dump(self.get_chrome_trace(), f)
+
+
+class _Span(object):
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.profiler.begin(self.name)
+
+    def __exit__(self, *args):
+        self.profiler.end()
+
+
+class _NullSpan(object):
+    def __enter__(self):
+        pass
+
+    def __exit__(self, *args):
+        pass
+
+_null_span = _NullSpan()
+
+
+def enable(capacity=65536):
+    '''Begin recording spans.
+
+    A `FrameProfiler` is created the first time the profiler is enabled, and
+    kept when it is disabled.
+
+    :Parameters:
+        `capacity` : int
+            Maximum number of spans kept.
+
+    '''
+    global enabled, profiler
+    if profiler is None:
+        profiler = FrameProfiler(capacity)
+    enabled = True
+
+def disable():
+    '''Stop recording spans.
+    '''
+    global enabled
+    enabled = False
+
+def begin(name):
+    '''Begin a span, if the profiler is enabled.  See `FrameProfiler.begin`.
+    '''
+    if enabled:
+        profiler.begin(name)
+
+def end():
+    '''End the innermost span, if the profiler is enabled.  See
+    `FrameProfiler.end`.
+    '''
+    if enabled:
+        profiler.end()
+
+def span(name):
+    '''Record a span around a ``with`` block, if the profiler is enabled.
+    See `FrameProfiler.span`.
+    '''
+    if enabled:
+        return profiler.span(name)
+    return _null_span
+
+def next_frame():
+    '''Begin the next frame, if the profiler is enabled.  Called by the
+    `pyglet.app` event loop; applications with their own loop should call it
+    once per frame.
+    '''
+    if enabled:
+        profiler.next_frame()
+
+def print_summary(frames=10, columns=6, file=None):
+    '''Print a table of the time spent in the last frames.  See
+    `FrameProfiler.print_summary`.
+    '''
+    if profiler is not None:
+        profiler.print_summary(frames, columns, file)
+
+def dump_chrome_trace(filename):
+    '''Save the recorded spans as a trace for ``chrome://tracing`` or
+    Perfetto.  See `FrameProfiler.dump_chrome_trace`.
+    '''
+    if profiler is not None:
+        profiler.dump_chrome_trace(filename)
+
+def get_func_name(func):
+    '''Get a name for a span around a call to `func`.
+
+    :rtype: str
+    '''
+    name = getattr(func, '__qualname__', None) or getattr(func, '__name__',
+                                                           None)
+    return name or repr(func)
+
+if pyglet.options['profile_frames']:
+    enable()
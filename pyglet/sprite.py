@@ -92,15 +92,33 @@ however a sprite can belong to at most one batch.  See the documentation for
 `pyglet.graphics` for more details on batched rendering, and grouping of
 sprites within batches.
 
+Instanced sprites
+=================
+
+When thousands of sprites change every frame, use `InstancedSprite` in place
+of `Sprite`.  It has the same interface, but sprites in the same batch and
+texture are stored as records of a shared `SpriteArray`, and the corners of
+all of them are computed in one vectorized pass when the batch is drawn.
+Instanced sprites must belong to a batch.  NumPy is required.
+
+If the sprites' positions are already held in arrays, a `SpriteBatch` is
+faster still: it exposes the position, rotation, scale, opacity, color and
+visibility of a fixed number of sprites as NumPy arrays that can be assigned
+all at once.
+
 :since: pyglet 1.1
 """
 
 __docformat__ = 'restructuredtext'
 __version__ = '$Id$'
 
+import ctypes
+import heapq
+import itertools
 import math
 import sys
 import warnings
+import weakref
 
 from pyglet.gl import *
 from pyglet import clock
@@ -108,6 +126,11 @@ from pyglet import event
 from pyglet import graphics
 from pyglet import image
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 _is_epydoc = hasattr(sys, 'is_epydoc') and sys.is_epydoc
 
 
@@ -153,6 +176,10 @@ class SpriteGroup(graphics.Group):
         glPopAttrib()
         glDisable(self.texture.target)
 
+    def get_state_key(self):
+        return (self.__class__, self.texture.target, self.texture.id,
+                self.blend_src, self.blend_dest)
+
     def __repr__(self):
         return '%s(%r)' % (self.__class__.__name__, self.texture)
 
@@ -170,6 +197,230 @@ class SpriteGroup(graphics.Group):
                      self.blend_src, self.blend_dest))
 
 
+class _AnimationCohort(object):
+    # Sprites showing the same frame of the same animation, due to change
+    # frame in the same slot of time.
+    __slots__ = ['animation', 'frame_index', 'slot', 'next_ts', 'sprites']
+
+    def __init__(self, animation, frame_index, slot, next_ts):
+        self.animation = animation
+        self.frame_index = frame_index
+        self.slot = slot
+        self.next_ts = next_ts
+        self.sprites = set()
+
+
+class AnimationManager(object):
+    """Advances the frames of animated sprites.
+
+    Rather than scheduling a clock function for every animated sprite, the
+    manager groups sprites that show the same frame of the same animation
+    and are due to change frame at the same time, and schedules a single
+    clock function for the earliest group.  Frame changes are rounded up to
+    a multiple of `quantum` (a display frame by default), so that sprites
+    started at slightly different times still share a group.  When the
+    clock function is called, the texture coordinates of every sprite in a
+    due group are replaced together, so the cost of animation depends on
+    the number of groups rather than the number of animated sprites.
+
+    Sprites use the module's `animation_manager` automatically;
+    applications do not usually need to use this class directly.
+
+    :since: pyglet 1.3
+    """
+
+    def __init__(self, clock=None, quantum=1 / 60.):
+        """Create an animation manager.
+
+        :Parameters:
+            `clock` : `pyglet.clock.Clock`
+                Clock to schedule frame changes on.  If None, the default
+                clock at the time each change is scheduled is used.
+            `quantum` : float
+                Interval, in seconds, that frame changes are rounded up to.
+
+        """
+        self._clock = clock
+        self.quantum = quantum
+        self._heap = []
+        self._cohorts = {}
+        self._counter = itertools.count()
+        self._scheduled_clock = None
+        self._scheduled_ts = None
+
+    def _get_clock(self):
+        return self._clock or clock.get_default()
+
+    def _join(self, sprite, animation, frame_index, next_ts):
+        # Allow for rounding error, so that exact multiples are not rounded
+        # up to the next slot.
+        slot = int(math.ceil(next_ts / self.quantum - 1e-6))
+        key = (id(animation), frame_index, slot)
+        cohort = self._cohorts.get(key)
+        if cohort is None:
+            next_ts = slot * self.quantum
+            cohort = _AnimationCohort(animation, frame_index, slot, next_ts)
+            self._cohorts[key] = cohort
+            heapq.heappush(self._heap,
+                           (next_ts, next(self._counter), cohort))
+        cohort.sprites.add(sprite)
+        sprite._animation_cohort = cohort
+
+    def add(self, sprite, duration):
+        """Change the sprite to the next frame of its animation after
+        `duration` seconds.
+
+        :Parameters:
+            `sprite` : `Sprite`
+                Sprite showing frame ``sprite._frame_index`` of
+                ``sprite._animation``.
+            `duration` : float
+                Time until the next frame, in seconds.
+
+        """
+        self.remove(sprite)
+        clock_ = self._get_clock()
+        self._join(sprite, sprite._animation, sprite._frame_index,
+                   clock_.get_schedule_time() + duration)
+        self._schedule(clock_)
+
+    def remove(self, sprite):
+        """Stop animating a sprite.
+
+        :Parameters:
+            `sprite` : `Sprite`
+                Sprite previously passed to `add`.
+
+        """
+        cohort = sprite._animation_cohort
+        if cohort is not None:
+            cohort.sprites.discard(sprite)
+            sprite._animation_cohort = None
+
+    def _schedule(self, clock_):
+        # Drop groups that have no sprites left.
+        heap = self._heap
+        while heap and not heap[0][2].sprites:
+            cohort = heapq.heappop(heap)[2]
+            self._remove_cohort(cohort)
+        if heap:
+            next_ts = heap[0][0]
+        else:
+            next_ts = None
+
+        if (next_ts == self._scheduled_ts and
+                clock_ is self._scheduled_clock):
+            return
+        if self._scheduled_clock is not None:
+            self._scheduled_clock.unschedule(self._tick)
+        self._scheduled_clock = self._scheduled_ts = None
+        if next_ts is not None:
+            clock_.schedule_once(self._tick,
+                                 max(0, next_ts - clock_.get_schedule_time()))
+            self._scheduled_clock = clock_
+            self._scheduled_ts = next_ts
+
+    def _remove_cohort(self, cohort):
+        key = (id(cohort.animation), cohort.frame_index, cohort.slot)
+        if self._cohorts.get(key) is cohort:
+            del self._cohorts[key]
+
+    def _tick(self, dt):
+        clock_ = self._scheduled_clock
+        self._scheduled_clock = self._scheduled_ts = None
+        ts = clock_.get_schedule_time()
+
+        # Advance only the groups due now; groups rescheduled without delay
+        # are advanced on the next tick.
+        heap = self._heap
+        due = []
+        while heap and heap[0][0] <= ts:
+            cohort = heapq.heappop(heap)[2]
+            self._remove_cohort(cohort)
+            due.append(cohort)
+
+        for cohort in due:
+            self._advance(cohort, ts)
+        self._schedule(clock_)
+
+    def _advance(self, cohort, ts):
+        animation = cohort.animation
+        sprites = list(cohort.sprites)
+        frame_index = cohort.frame_index + 1
+        if frame_index >= len(animation.frames):
+            frame_index = 0
+            for sprite in sprites:
+                sprite.dispatch_event('on_animation_end')
+            # Skip sprites deleted or given another image by a handler.
+            sprites = [sprite for sprite in sprites
+                       if sprite._animation_cohort is cohort]
+
+        frame = animation.frames[frame_index]
+        texture = frame.image.get_texture()
+        for sprite in sprites:
+            sprite._animation_cohort = None
+            sprite._frame_index = frame_index
+        _set_textures(sprites, texture)
+
+        if frame.duration is not None:
+            # Keep timing regular, unless late by more than a frame.
+            next_ts = max(cohort.next_ts + frame.duration, ts)
+            for sprite in sprites:
+                self._join(sprite, animation, frame_index, next_ts)
+        else:
+            for sprite in sprites:
+                sprite.dispatch_event('on_animation_end')
+
+
+def _set_textures(sprites, texture):
+    # Show `texture` on every sprite.  Sprites whose vertex lists share a
+    # domain, or whose records share a `SpriteArray`, have their texture
+    # coordinates replaced together; sprites that need a new group (because
+    # the texture is a different one) are changed one at a time.
+    domains = {}
+    sprite_arrays = {}
+    for sprite in sprites:
+        if sprite._texture.id != texture.id:
+            sprite._set_texture(texture)
+        elif type(sprite)._set_texture is Sprite._set_texture:
+            sprite._texture = texture
+            domain = sprite._vertex_list.domain
+            domains.setdefault(domain, []).append(sprite._vertex_list.start)
+        elif type(sprite)._set_texture is InstancedSprite._set_texture:
+            sprite._texture = texture
+            sprite_arrays.setdefault(sprite._sprite_array, []).append(
+                sprite._index)
+        else:
+            sprite._set_texture(texture)
+
+    tex_coords = texture.tex_coords
+    for domain, starts in domains.items():
+        attribute = domain.attribute_names['tex_coords']
+        region = attribute.get_region(attribute.buffer, 0,
+                                      domain.allocator.capacity)
+        if numpy is not None and isinstance(region.array, ctypes.Array):
+            array = numpy.ctypeslib.as_array(region.array)
+            indices = (numpy.array(starts)[:, None] * attribute.count +
+                       numpy.arange(len(tex_coords)))
+            array[indices] = tex_coords
+        else:
+            array = region.array
+            size = len(tex_coords)
+            for start in starts:
+                start *= attribute.count
+                array[start:start + size] = tex_coords
+        region.invalidate()
+
+    for sprite_array, indices in sprite_arrays.items():
+        sprite_array.set_images(indices, texture)
+
+
+#: The `AnimationManager` used by sprites.
+#:
+#: :since: pyglet 1.3
+animation_manager = AnimationManager()
+
+
 class Sprite(event.EventDispatcher):
     """Instance of an on-screen image.
 
@@ -178,6 +429,7 @@ class Sprite(event.EventDispatcher):
 
     _batch = None
     _animation = None
+    _animation_cohort = None
     _rotation = 0
     _opacity = 255
     _rgb = (255, 255, 255)
@@ -230,9 +482,8 @@ class Sprite(event.EventDispatcher):
             self._animation = img
             self._frame_index = 0
             self._texture = img.frames[0].image.get_texture()
-            self._next_dt = img.frames[0].duration
-            if self._next_dt:
-                clock.schedule_once(self._animate, self._next_dt)
+            if img.frames[0].duration:
+                animation_manager.add(self, img.frames[0].duration)
         else:
             self._texture = img.get_texture()
 
@@ -256,7 +507,7 @@ class Sprite(event.EventDispatcher):
         sprite is garbage.
         """
         if self._animation:
-            clock.unschedule(self._animate)
+            animation_manager.remove(self)
         self._vertex_list.delete()
         self._vertex_list = None
         self._texture = None
@@ -264,25 +515,6 @@ class Sprite(event.EventDispatcher):
         # Easy way to break circular reference, speeds up GC
         self._group = None
 
-    def _animate(self, dt):
-        self._frame_index += 1
-        if self._frame_index >= len(self._animation.frames):
-            self._frame_index = 0
-            self.dispatch_event('on_animation_end')
-            if self._vertex_list is None:
-                return  # Deleted in event handler.
-
-        frame = self._animation.frames[self._frame_index]
-        self._set_texture(frame.image.get_texture())
-
-        if frame.duration is not None:
-            duration = frame.duration - (self._next_dt - dt)
-            duration = min(max(0, duration), frame.duration)
-            clock.schedule_once(self._animate, duration)
-            self._next_dt = duration
-        else:
-            self.dispatch_event('on_animation_end')
-
     @property
     def batch(self):
         """Graphics batch.
@@ -344,16 +576,15 @@ class Sprite(event.EventDispatcher):
     @image.setter
     def image(self, img):
         if self._animation is not None:
-            clock.unschedule(self._animate)
+            animation_manager.remove(self)
             self._animation = None
 
         if isinstance(img, image.Animation):
             self._animation = img
             self._frame_index = 0
             self._set_texture(img.frames[0].image.get_texture())
-            self._next_dt = img.frames[0].duration
-            if self._next_dt:
-                clock.schedule_once(self._animate, self._next_dt)
+            if img.frames[0].duration:
+                animation_manager.add(self, img.frames[0].duration)
         else:
             self._set_texture(img.get_texture())
         self._update_position()
@@ -652,4 +883,705 @@ class Sprite(event.EventDispatcher):
             :event:
             """
 
-Sprite.register_event_type('on_animation_end')
\ No newline at end of file
+Sprite.register_event_type('on_animation_end')
+
+class SpriteArrayGroup(SpriteGroup):
+    """Rendering group of a `SpriteArray`.
+
+    Before its state is set, the group brings the vertex data of the array
+    up to date.  Each array has its own group, so the group only compares
+    equal to itself.
+    """
+
+    def __init__(self, sprite_array, texture, blend_src, blend_dest,
+                 parent=None):
+        super(SpriteArrayGroup, self).__init__(texture, blend_src, blend_dest,
+                                               parent)
+        self.sprite_array = sprite_array
+
+    def set_state(self):
+        self.sprite_array.update_vertices()
+        super(SpriteArrayGroup, self).set_state()
+
+    def get_state_key(self):
+        # The state must be set for every array, so that its vertices are
+        # updated; never elide it.
+        return None
+
+    __eq__ = object.__eq__
+    __hash__ = object.__hash__
+
+
+class SpriteArray(object):
+    """Per-batch storage of instanced sprites.
+
+    An array holds one record per sprite (position, rotation, scale,
+    visibility, color and texture region) in NumPy arrays, and a single
+    vertex list of four vertices per record.  Changing a sprite writes only
+    its record; the vertices of all sprites in the array are recomputed in
+    one vectorized pass when the batch is next drawn.
+
+    Arrays are created and shared automatically by `InstancedSprite`; one
+    array exists for each batch, parent group, texture (usually an atlas),
+    blend mode, ``subpixel`` flag and usage.  Requires NumPy.
+
+    :Ivariables:
+        `transforms` : numpy record array
+            Fields ``x``, ``y``, ``rotation``, ``scale`` and ``visible`` of
+            each record.
+        `images` : numpy record array
+            Fields ``anchor_x``, ``anchor_y``, ``width`` and ``height`` of
+            the image of each record.
+        `colors` : numpy array
+            RGBA color of each record, shape ``(capacity, 4)``.
+        `tex_coords` : numpy array
+            Texture coordinates of the four vertices of each record, shape
+            ``(capacity, 12)``.
+        `used` : numpy array
+            True for records that belong to a sprite.
+
+    :since: pyglet 1.3
+    """
+
+    _initial_capacity = 16
+
+    def __init__(self, batch, texture, blend_src, blend_dest, group=None,
+                 subpixel=False, usage='dynamic', capacity=None):
+        """Create an empty sprite array.
+
+        :Parameters:
+            `batch` : `Batch`
+                Batch to add the vertices to.
+            `texture` : `Texture`
+                Texture containing the images of every sprite in the array.
+            `blend_src` : int
+                OpenGL blend source mode.
+            `blend_dest` : int
+                OpenGL blend destination mode.
+            `group` : `Group`
+                Optional parent group.
+            `subpixel` : bool
+                Allow floating-point vertex coordinates.
+            `usage` : str
+                Vertex buffer object usage hint for the vertex data.
+            `capacity` : int
+                Initial number of records.
+
+        """
+        if numpy is None:
+            raise ImportError('SpriteArray requires NumPy')
+
+        self.subpixel = subpixel
+        self.group = SpriteArrayGroup(self, texture, blend_src, blend_dest,
+                                      group)
+
+        capacity = max(capacity or 0, self._initial_capacity)
+        self.transforms = numpy.zeros(capacity, dtype=[
+            ('x', 'f8'), ('y', 'f8'), ('rotation', 'f8'), ('scale', 'f8'),
+            ('visible', '?')])
+        self.images = numpy.zeros(capacity, dtype=[
+            ('anchor_x', 'f8'), ('anchor_y', 'f8'),
+            ('width', 'f8'), ('height', 'f8')])
+        self.colors = numpy.zeros((capacity, 4), dtype='u1')
+        self.tex_coords = numpy.zeros((capacity, 12), dtype='f4')
+        self.used = numpy.zeros(capacity, dtype='?')
+        self._free = list(range(capacity - 1, -1, -1))
+
+        if subpixel:
+            vertex_format = 'v2f/%s' % usage
+        else:
+            vertex_format = 'v2i/%s' % usage
+        self.vertex_list = batch.add(capacity * 4, GL_QUADS, self.group,
+                                     vertex_format, 'c4B', 't3f')
+
+        self._vertices_dirty = True
+        self._colors_dirty = True
+        self._tex_coords_dirty = True
+
+    @property
+    def capacity(self):
+        """Number of records the array can hold before it grows.
+
+        :type: int
+        """
+        return len(self.used)
+
+    def __len__(self):
+        return self.capacity - len(self._free)
+
+    def _grow(self):
+        capacity = self.capacity
+        new_capacity = capacity * 2
+        for name in ('transforms', 'images', 'colors', 'tex_coords', 'used'):
+            old = getattr(self, name)
+            new = numpy.zeros((new_capacity,) + old.shape[1:], old.dtype)
+            new[:capacity] = old
+            setattr(self, name, new)
+        self._free.extend(range(new_capacity - 1, capacity - 1, -1))
+        self.vertex_list.resize(new_capacity * 4)
+        self.invalidate()
+
+    def alloc(self):
+        """Allocate a record.
+
+        The record is invisible until its transform is set.
+
+        :rtype: int
+        :return: Index of the record.
+        """
+        if not self._free:
+            self._grow()
+        index = self._free.pop()
+        self.used[index] = True
+        return index
+
+    def free(self, index):
+        """Free a record previously returned by `alloc`.
+
+        :Parameters:
+            `index` : int
+                Index of the record.
+
+        If the array was created by `get` and this was its last record,
+        the array is deleted.
+
+        """
+        self.used[index] = False
+        self.transforms[index] = (0, 0, 0, 0, False)
+        self._free.append(index)
+        self._vertices_dirty = True
+        if self._key is not None and not len(self):
+            self.delete()
+
+    def draw(self, index):
+        """Draw a single record, outside of the batch.
+
+        :Parameters:
+            `index` : int
+                Index of the record.
+
+        """
+        vertex_list = self.vertex_list
+        self.group.set_state_recursive()
+        vertex_list.domain.draw(
+            GL_QUADS, _VertexRange(vertex_list.start + index * 4, 4))
+        self.group.unset_state_recursive()
+
+    def invalidate(self):
+        """Recompute all vertex data when the batch is next drawn."""
+        self._vertices_dirty = True
+        self._colors_dirty = True
+        self._tex_coords_dirty = True
+
+    def set_image(self, index, texture):
+        """Set the image of a record.
+
+        :Parameters:
+            `index` : int
+                Index of the record.
+            `texture` : `Texture`
+                Image to display; must be within the texture of the array.
+
+        """
+        self.images[index] = (texture.anchor_x, texture.anchor_y,
+                              texture.width, texture.height)
+        self.tex_coords[index] = texture.tex_coords
+        self._vertices_dirty = True
+        self._tex_coords_dirty = True
+
+    def set_images(self, indices, texture):
+        """Set the same image on several records.
+
+        :Parameters:
+            `indices` : sequence of int
+                Indices of the records.
+            `texture` : `Texture`
+                Image to display; must be within the texture of the array.
+
+        """
+        indices = numpy.asarray(indices)
+        self.images[indices] = (texture.anchor_x, texture.anchor_y,
+                                texture.width, texture.height)
+        self.tex_coords[indices] = texture.tex_coords
+        self._vertices_dirty = True
+        self._tex_coords_dirty = True
+
+    def get_vertices(self):
+        """Compute the vertex positions of every record.
+
+        Unused and invisible records have all four vertices at the origin.
+        Vertices are truncated to integers unless the array is ``subpixel``,
+        as for `Sprite`.
+
+        :rtype: numpy array of shape ``(capacity, 8)``
+        """
+        transforms = self.transforms
+        images = self.images
+        scale = transforms['scale']
+        x1 = -images['anchor_x'] * scale
+        y1 = -images['anchor_y'] * scale
+        x2 = x1 + images['width'] * scale
+        y2 = y1 + images['height'] * scale
+        x = transforms['x']
+        y = transforms['y']
+
+        r = -numpy.radians(transforms['rotation'])
+        cr = numpy.cos(r)
+        sr = numpy.sin(r)
+
+        vertices = numpy.empty((self.capacity, 8))
+        vertices[:, 0] = x1 * cr - y1 * sr + x
+        vertices[:, 1] = x1 * sr + y1 * cr + y
+        vertices[:, 2] = x2 * cr - y1 * sr + x
+        vertices[:, 3] = x2 * sr + y1 * cr + y
+        vertices[:, 4] = x2 * cr - y2 * sr + x
+        vertices[:, 5] = x2 * sr + y2 * cr + y
+        vertices[:, 6] = x1 * cr - y2 * sr + x
+        vertices[:, 7] = x1 * sr + y2 * cr + y
+        vertices[~(transforms['visible'] & self.used)] = 0
+        if not self.subpixel:
+            vertices = vertices.astype(numpy.int32)
+        return vertices
+
+    def update_vertices(self):
+        """Write changed records to the vertex list.
+
+        This is called automatically before the batch draws the array.
+        """
+        if self._vertices_dirty:
+            _copy_to_array(self.vertex_list.vertices, self.get_vertices())
+            self._vertices_dirty = False
+        if self._colors_dirty:
+            _copy_to_array(self.vertex_list.colors,
+                           numpy.repeat(self.colors, 4, axis=0))
+            self._colors_dirty = False
+        if self._tex_coords_dirty:
+            _copy_to_array(self.vertex_list.tex_coords, self.tex_coords)
+            self._tex_coords_dirty = False
+
+    def delete(self):
+        """Remove the array's vertex list from its batch."""
+        self.vertex_list.delete()
+        self.vertex_list = None
+        if self._key is not None:
+            batch, key = self._batch_ref(), self._key
+            self._key = None
+            arrays = self._arrays.get(batch)
+            if arrays is not None and arrays.get(key) is self:
+                del arrays[key]
+                if not arrays:
+                    del self._arrays[batch]
+
+    # Batch and key under which `get` shares the array.
+    _batch_ref = None
+    _key = None
+
+    _arrays = weakref.WeakKeyDictionary()
+
+    @classmethod
+    def get(cls, batch, texture, blend_src, blend_dest, group=None,
+            subpixel=False, usage='dynamic'):
+        """Get the shared array for sprites with the given state, creating
+        it if necessary.
+
+        The parameters are as for the constructor.
+
+        :rtype: `SpriteArray`
+        """
+        key = (texture.target, texture.id, blend_src, blend_dest, group,
+               subpixel, usage)
+        arrays = cls._arrays.setdefault(batch, {})
+        try:
+            return arrays[key]
+        except KeyError:
+            sprite_array = cls(batch, texture, blend_src, blend_dest, group,
+                               subpixel, usage)
+            sprite_array._batch_ref = weakref.ref(batch)
+            sprite_array._key = key
+            arrays[key] = sprite_array
+            return sprite_array
+
+
+class _VertexRange(object):
+    # Vertices within a vertex list, in the form accepted by
+    # `pyglet.graphics.vertexdomain.VertexDomain.draw`.
+    __slots__ = ['start', 'count']
+
+    def __init__(self, start, count):
+        self.start = start
+        self.count = count
+
+
+def _copy_to_array(array, data):
+    # Copy a NumPy array into a vertex list attribute array, which may be a
+    # ctypes array or (with the graphics_numpy option) a NumPy view.
+    if not isinstance(array, numpy.ndarray):
+        array = numpy.ctypeslib.as_array(array)
+    array[...] = numpy.reshape(data, array.shape)
+
+
+class InstancedSprite(Sprite):
+    """A sprite stored as a record of a shared `SpriteArray`.
+
+    The interface is that of `Sprite`, but changing the position, rotation,
+    scale, color or visibility only writes the sprite's record; the corners
+    of all sprites in the array are computed together when the batch is
+    drawn.  This is much faster when many sprites change every frame.
+
+    Instanced sprites must belong to a batch, but can also be drawn
+    individually with `draw`.  Sprites whose images are in the same texture (for
+    example, a `pyglet.image.atlas.TextureAtlas` or a
+    `pyglet.image.ImageGrid`) share an array.  Requires NumPy.
+
+    :since: pyglet 1.3
+    """
+
+    _sprite_array = None
+    _index = None
+
+    def __init__(self,
+                 img, x=0, y=0,
+                 blend_src=GL_SRC_ALPHA,
+                 blend_dest=GL_ONE_MINUS_SRC_ALPHA,
+                 batch=None,
+                 group=None,
+                 usage='dynamic',
+                 subpixel=False):
+        """Create an instanced sprite.
+
+        The parameters are as for `Sprite`, but `batch` is required.
+        """
+        assert batch is not None, 'InstancedSprite requires a batch'
+        super(InstancedSprite, self).__init__(img, x, y, blend_src,
+                                              blend_dest, batch, group,
+                                              usage, subpixel)
+
+    def __del__(self):
+        try:
+            if self._sprite_array is not None:
+                self._sprite_array.free(self._index)
+        except (AttributeError, TypeError):
+            # Modules may already be torn down at interpreter exit.
+            pass
+
+    def delete(self):
+        if self._animation:
+            animation_manager.remove(self)
+        self._sprite_array.free(self._index)
+        self._sprite_array = None
+        self._texture = None
+        self._group = None
+
+    @property
+    def batch(self):
+        """Graphics batch.
+
+        The sprite can be moved to another batch, but not removed from its
+        batch.
+
+        :type: `Batch`
+        """
+        return self._batch
+
+    @batch.setter
+    def batch(self, batch):
+        assert batch is not None, 'InstancedSprite requires a batch'
+        if self._batch == batch:
+            return
+        self._sprite_array.free(self._index)
+        self._batch = batch
+        self._create_vertex_list()
+
+    @property
+    def group(self):
+        """Parent graphics group.
+
+        :type: `Group`
+        """
+        return self._group.parent
+
+    @group.setter
+    def group(self, group):
+        if self._group.parent == group:
+            return
+        self._group = SpriteGroup(self._texture,
+                                  self._group.blend_src,
+                                  self._group.blend_dest,
+                                  group)
+        self._sprite_array.free(self._index)
+        self._create_vertex_list()
+
+    def _set_texture(self, texture):
+        if texture.id is not self._texture.id:
+            self._group = SpriteGroup(texture,
+                                      self._group.blend_src,
+                                      self._group.blend_dest,
+                                      self._group.parent)
+            self._sprite_array.free(self._index)
+            self._texture = texture
+            self._create_vertex_list()
+        else:
+            self._texture = texture
+            self._sprite_array.set_image(self._index, texture)
+
+    def _create_vertex_list(self):
+        group = self._group
+        self._sprite_array = SpriteArray.get(
+            self._batch, self._texture, group.blend_src, group.blend_dest,
+            group.parent, self._subpixel, self._usage)
+        self._index = self._sprite_array.alloc()
+        self._sprite_array.set_image(self._index, self._texture)
+        self._update_position()
+        self._update_color()
+
+    def _update_position(self):
+        sprite_array = self._sprite_array
+        sprite_array.transforms[self._index] = (
+            self._x, self._y, self._rotation, self._scale, self._visible)
+        sprite_array._vertices_dirty = True
+
+    def _update_color(self):
+        sprite_array = self._sprite_array
+        r, g, b = self._rgb
+        sprite_array.colors[self._index] = (r, g, b, int(self._opacity))
+        sprite_array._colors_dirty = True
+
+    def draw(self):
+        """Draw the sprite at its current position.
+
+        Drawing the batch is much more efficient when there are many
+        sprites.
+        """
+        self._sprite_array.draw(self._index)
+
+
+class SpriteBatch(object):
+    """A fixed number of sprites updated together from arrays.
+
+    All sprites are drawn from images in one texture (usually an atlas, or a
+    `pyglet.image.ImageGrid`).  Instead of sprite objects, the batch exposes
+    the position, rotation, scale, opacity, color and visibility of every
+    sprite as NumPy arrays; assigning a whole array (or a scalar, which is
+    broadcast) updates all sprites, and their quads are recomputed in one
+    vectorized pass when the graphics batch is next drawn::
+
+        sprites = SpriteBatch(ball_image, 10000, batch=batch)
+        sprites.x = positions[:, 0]
+        sprites.y = positions[:, 1]
+        sprites.visible = positions[:, 1] > 0
+
+    The arrays returned by the properties are views.  After modifying them in
+    place, call `invalidate`.
+
+    Requires NumPy.
+
+    :since: pyglet 1.3
+    """
+
+    def __init__(self, images, count=None,
+                 blend_src=GL_SRC_ALPHA,
+                 blend_dest=GL_ONE_MINUS_SRC_ALPHA,
+                 batch=None,
+                 group=None,
+                 usage='dynamic',
+                 subpixel=False):
+        """Create sprites in a graphics batch.
+
+        :Parameters:
+            `images` : `AbstractImage` or sequence of `AbstractImage`
+                The image of every sprite, or a sequence with the image of
+                each sprite.  All images must be in the same texture.
+            `count` : int
+                Number of sprites; required if `images` is a single image.
+            `blend_src` : int
+                OpenGL blend source mode.
+            `blend_dest` : int
+                OpenGL blend destination mode.
+            `batch` : `Batch`
+                Batch to add the sprites to.
+            `group` : `Group`
+                Optional parent group of the sprites.
+            `usage` : str
+                Vertex buffer object usage hint, one of ``"none"``,
+                ``"stream"``, ``"dynamic"`` (default) or ``"static"``.
+            `subpixel` : bool
+                Allow floating-point coordinates for the sprites.
+
+        """
+        assert batch is not None, 'SpriteBatch requires a batch'
+        if isinstance(images, image.AbstractImage):
+            assert count is not None, 'count is required for a single image'
+            texture = images.get_texture()
+            textures = [texture] * count
+        else:
+            count = len(images)
+            if not count:
+                raise ValueError('SpriteBatch requires at least one image')
+            textures = [img.get_texture() for img in images]
+            texture = textures[0]
+
+        self._count = count
+        self._sprite_array = SpriteArray(batch, texture, blend_src,
+                                         blend_dest, group, subpixel, usage,
+                                         capacity=count)
+        for i in range(count):
+            self._sprite_array.alloc()
+        transforms = self._sprite_array.transforms
+        transforms['scale'] = 1.
+        transforms['visible'] = True
+        self._sprite_array.colors[:] = 255
+        self.set_images(range(count), textures)
+
+    def __len__(self):
+        return self._count
+
+    def delete(self):
+        """Remove the sprites from their batch."""
+        self._sprite_array.delete()
+        self._sprite_array = None
+
+    def invalidate(self):
+        """Recompute every sprite when the batch is next drawn.
+
+        Call this after modifying the arrays returned by the properties in
+        place.
+        """
+        self._sprite_array.invalidate()
+
+    def set_images(self, indices, images):
+        """Change the images of some sprites.
+
+        :Parameters:
+            `indices` : sequence of int
+                Indices of the sprites to change.
+            `images` : sequence of `AbstractImage`
+                The new image of each sprite; they must be in the same
+                texture as the existing images.
+
+        """
+        sprite_array = self._sprite_array
+        texture_id = sprite_array.group.texture.id
+        for index, img in zip(indices, images):
+            texture = img.get_texture()
+            assert texture.id == texture_id, \
+                'All images of a SpriteBatch must be in the same texture'
+            sprite_array.set_image(index, texture)
+
+    def _get_transform(self, name):
+        return self._sprite_array.transforms[name][:self._count]
+
+    def _set_transform(self, name, value):
+        self._sprite_array.transforms[name][:self._count] = value
+        self._sprite_array._vertices_dirty = True
+
+    @property
+    def x(self):
+        """X coordinate of each sprite.
+
+        :type: numpy array of float
+        """
+        return self._get_transform('x')
+
+    @x.setter
+    def x(self, x):
+        self._set_transform('x', x)
+
+    @property
+    def y(self):
+        """Y coordinate of each sprite.
+
+        :type: numpy array of float
+        """
+        return self._get_transform('y')
+
+    @y.setter
+    def y(self, y):
+        self._set_transform('y', y)
+
+    @property
+    def rotation(self):
+        """Clockwise rotation of each sprite, in degrees.
+
+        :type: numpy array of float
+        """
+        return self._get_transform('rotation')
+
+    @rotation.setter
+    def rotation(self, rotation):
+        self._set_transform('rotation', rotation)
+
+    @property
+    def scale(self):
+        """Scaling factor of each sprite.
+
+        :type: numpy array of float
+        """
+        return self._get_transform('scale')
+
+    @scale.setter
+    def scale(self, scale):
+        self._set_transform('scale', scale)
+
+    @property
+    def visible(self):
+        """Mask of the sprites that are drawn.
+
+        :type: numpy array of bool
+        """
+        return self._get_transform('visible')
+
+    @visible.setter
+    def visible(self, visible):
+        self._set_transform('visible', visible)
+
+    def update(self, x=None, y=None, rotation=None, scale=None):
+        """Change several of the position, rotation and scale arrays at once.
+
+        :Parameters:
+            `x` : array of float
+                X coordinate of each sprite.
+            `y` : array of float
+                Y coordinate of each sprite.
+            `rotation` : array of float
+                Clockwise rotation of each sprite, in degrees.
+            `scale` : array of float
+                Scaling factor of each sprite.
+
+        """
+        transforms = self._sprite_array.transforms
+        count = self._count
+        if x is not None:
+            transforms['x'][:count] = x
+        if y is not None:
+            transforms['y'][:count] = y
+        if rotation is not None:
+            transforms['rotation'][:count] = rotation
+        if scale is not None:
+            transforms['scale'][:count] = scale
+        self._sprite_array._vertices_dirty = True
+
+    @property
+    def opacity(self):
+        """Blend opacity of each sprite, from 0 to 255.
+
+        :type: numpy array of uint8
+        """
+        return self._sprite_array.colors[:self._count, 3]
+
+    @opacity.setter
+    def opacity(self, opacity):
+        self._sprite_array.colors[:self._count, 3] = opacity
+        self._sprite_array._colors_dirty = True
+
+    @property
+    def color(self):
+        """Blend color of each sprite, as rows of (red, green, blue).
+
+        :type: numpy array of uint8, shape ``(count, 3)``
+        """
+        return self._sprite_array.colors[:self._count, :3]
+
+    @color.setter
+    def color(self, rgb):
+        self._sprite_array.colors[:self._count, :3] = rgb
+        self._sprite_array._colors_dirty = True
@@ -537,6 +537,9 @@ class TextLayoutGroup(graphics.Group):
     def unset_state(self):
         glPopAttrib()
 
+    def get_state_key(self):
+        return self.__class__
+
 class ScrollableTextLayoutGroup(graphics.Group):
     '''Top-level rendering group for `ScrollableTextLayout`.
 
@@ -655,6 +658,9 @@ class TextLayoutForegroundGroup(graphics.OrderedGroup):
 
     # unset_state not needed, as parent group will pop enable bit
 
+    def get_state_key(self):
+        return self.__class__
+
 class TextLayoutForegroundDecorationGroup(graphics.OrderedGroup):
     '''Rendering group for decorative elements (e.g., glyph underlines) in all
     text layouts.
@@ -666,6 +672,9 @@ class TextLayoutForegroundDecorationGroup(graphics.OrderedGroup):
 
     # unset_state not needed, as parent group will pop enable bit
 
+    def get_state_key(self):
+        return self.__class__
+
 class TextLayoutTextureGroup(graphics.Group):
     '''Rendering group for a glyph texture in all text layouts.
 
@@ -684,6 +693,9 @@ class TextLayoutTextureGroup(graphics.Group):
     # unset_state not needed, as next group will either bind a new texture or
     # pop enable bit.
 
+    def get_state_key(self):
+        return (self.__class__, self.texture.id)
+
     def __hash__(self):
         return hash((self.texture.id, self.parent))
 
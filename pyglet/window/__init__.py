@@ -129,6 +129,7 @@ __docformat__ = 'restructuredtext'
 __version__ = '$Id$'
 
 import sys
+from collections import deque
 
 import pyglet
 from pyglet import gl
@@ -378,12 +379,19 @@ class BaseWindow(with_metaclass(_WindowMetaclass, EventDispatcher)):
     #: You can prevent redundant redraws by setting this variable to ``False``
     #: in the window's `on_draw` handler, and setting it to True again in
     #: response to any events that actually do require a window contents
-    #: update.
+    #: update.  With `pyglet.app.EventLoop.redraw_invalid_only`, the event
+    #: loop clears it after each redraw.
     #:
     #: :type: bool
     #: :since: pyglet 1.1
     invalid = True
 
+    #: Number of times the `pyglet.app` event loop has drawn the window.
+    #:
+    #: :type: int
+    #: :since: pyglet 1.3
+    redraw_count = 0
+
     #: Legacy invalidation flag introduced in pyglet 1.2: set by all event
     #: dispatches that go to non-empty handlers.  The default 1.2 event loop
     #: will therefore redraw after any handled event or scheduled function.
@@ -419,6 +427,24 @@ class BaseWindow(with_metaclass(_WindowMetaclass, EventDispatcher)):
     _enable_event_queue = True    # overridden by EventLoop.
     _allow_dispatch_event = False # controlled by dispatch_events stack frame
 
+    #: If True, consecutive mouse motion or drag events are merged into one
+    #: event, with the latest position and the summed ``dx`` and ``dy``.
+    #: Drag events are merged only if their buttons and modifiers are the
+    #: same.  Initialised from ``pyglet.options['coalesce_mouse_motion']``.
+    #:
+    #: :since: pyglet 1.3
+    #: :type: bool
+    coalesce_mouse_motion = False
+
+    #: Number of mouse motion and drag events that were merged into another
+    #: event by `coalesce_mouse_motion`.  The event loop resets it to 0 after
+    #: drawing the window, so in `on_draw` it is the number of events
+    #: coalesced in the current frame.
+    #:
+    #: :since: pyglet 1.3
+    #: :type: int
+    coalesced_event_count = 0
+
     # Class attributes
 
     _default_width = 640
@@ -499,7 +525,8 @@ class BaseWindow(with_metaclass(_WindowMetaclass, EventDispatcher)):
 
         """
         EventDispatcher.__init__(self)
-        self._event_queue = []
+        self._event_queue = deque()
+        self.coalesce_mouse_motion = pyglet.options['coalesce_mouse_motion']
 
         if not display:
             display = get_platform().get_default_display()
@@ -1212,6 +1239,16 @@ class BaseWindow(with_metaclass(_WindowMetaclass, EventDispatcher)):
             if EventDispatcher.dispatch_event(self, *args) != False:
                 self._legacy_invalid = True
         else:
+            if (self.coalesce_mouse_motion and self._event_queue and
+                    args[0] in ('on_mouse_motion', 'on_mouse_drag')):
+                last = self._event_queue[-1]
+                # Arguments are (x, y, dx, dy), followed by buttons and
+                # modifiers for a drag.
+                if last[0] == args[0] and last[5:] == args[5:]:
+                    self._event_queue[-1] = (args[:3] +
+                        (last[3] + args[3], last[4] + args[4]) + args[5:])
+                    self.coalesced_event_count += 1
+                    return
             self._event_queue.append(args)
 
     def dispatch_events(self):
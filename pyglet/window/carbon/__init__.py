@@ -46,6 +46,7 @@ import unicodedata
 import warnings
 
 import pyglet
+from pyglet.gl import lib as gl_lib
 from pyglet.window import WindowException, \
     BaseWindow, MouseCursor, DefaultMouseCursor, _PlatformEventHandler
 from pyglet.window import key
@@ -293,6 +294,7 @@ class CarbonWindow(BaseWindow):
         self.draw_mouse_cursor()
         if self.context:
             self.context.flip()
+            gl_lib.end_frame('Window.flip')
 
     def _get_vsync(self):
         if self.context:
@@ -313,7 +315,7 @@ class CarbonWindow(BaseWindow):
 
         self._allow_dispatch_event = True
         while self._event_queue:
-            EventDispatcher.dispatch_event(self, *self._event_queue.pop(0))
+            EventDispatcher.dispatch_event(self, *self._event_queue.popleft())
 
         e = EventRef()
         result = carbon.ReceiveNextEvent(0, c_void_p(), 0, True, byref(e))
@@ -336,7 +338,7 @@ class CarbonWindow(BaseWindow):
 
     def dispatch_pending_events(self):
         while self._event_queue:
-            EventDispatcher.dispatch_event(self, *self._event_queue.pop(0))
+            EventDispatcher.dispatch_event(self, *self._event_queue.popleft())
 
     def set_caption(self, caption):
         self._caption = caption
@@ -532,6 +534,8 @@ class CarbonWindow(BaseWindow):
         return CarbonMouseCursor(themes[name])
 
     def set_icon(self, *images):
+        from pyglet.image.convert import to_bytes
+
         # Only use the biggest image
         image = images[0]
         size = image.width * image.height
@@ -544,7 +548,7 @@ class CarbonWindow(BaseWindow):
         format = 'ARGB'
         pitch = -len(format) * image.width
 
-        data = image.get_data(format, pitch)
+        data = to_bytes(image.get_data(format, pitch))
         provider = carbon.CGDataProviderCreateWithData(
             None, data, len(data), None)
 
@@ -45,6 +45,7 @@ from ctypes import *
 
 import pyglet
 from pyglet import gl
+from pyglet.gl import lib as gl_lib
 from pyglet.window import BaseWindow, WindowException
 from pyglet.window import MouseCursor, DefaultMouseCursor
 from pyglet.event import EventDispatcher
@@ -291,6 +292,7 @@ class CocoaWindow(BaseWindow):
         self.draw_mouse_cursor()
         if self.context:
             self.context.flip()
+            gl_lib.end_frame('Window.flip')
 
     def dispatch_events(self):
         self._allow_dispatch_event = True
@@ -324,7 +326,7 @@ class CocoaWindow(BaseWindow):
 
     def dispatch_pending_events(self):
         while self._event_queue:
-            event = self._event_queue.pop(0)
+            event = self._event_queue.popleft()
             EventDispatcher.dispatch_event(self, *event)
 
     def set_caption(self, caption):
@@ -333,6 +335,8 @@ class CocoaWindow(BaseWindow):
             self._nswindow.setTitle_(get_NSString(caption))
 
     def set_icon(self, *images):
+        from pyglet.image.convert import to_bytes
+
         # Only use the biggest image from the list.
         max_image = images[0]
         for img in images:
@@ -343,7 +347,7 @@ class CocoaWindow(BaseWindow):
         image = max_image.get_image_data()
         format = 'ARGB'
         bytesPerRow = len(format) * image.width
-        data = image.get_data(format, -bytesPerRow)
+        data = to_bytes(image.get_data(format, -bytesPerRow))
 
         # Use image data to create a data provider.
         # Using CGDataProviderCreateWithData crashes PyObjC 2.2b3, so we create
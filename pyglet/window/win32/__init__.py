@@ -49,6 +49,7 @@ if compat_platform not in ('cygwin', 'win32'):
     raise ImportError('Not a win32 platform.')
 
 import pyglet
+from pyglet.gl import lib as gl_lib
 from pyglet.window import BaseWindow, \
     WindowException, MouseCursor, DefaultMouseCursor, _PlatformEventHandler, \
     _ViewEventHandler
@@ -311,6 +312,7 @@ class Win32Window(BaseWindow):
     def flip(self):
         self.draw_mouse_cursor()
         self.context.flip()
+        gl_lib.end_frame('Window.flip')
 
     def set_location(self, x, y):
         x, y = self._client_to_window_pos(x, y)
@@ -499,6 +501,8 @@ class Win32Window(BaseWindow):
         return Win32MouseCursor(cursor)
 
     def set_icon(self, *images):
+        from pyglet.image.convert import to_bytes
+
         # XXX Undocumented AFAICT, but XP seems happy to resize an image
         # of any size, so no scaling necessary.
 
@@ -538,7 +542,7 @@ class Win32Window(BaseWindow):
                 byref(dataptr), None, 0)
             _user32.ReleaseDC(None, hdc)
 
-            data = image.get_data(format, pitch)
+            data = to_bytes(image.get_data(format, pitch))
             memmove(dataptr, data, len(data))
 
             mask = _gdi32.CreateBitmap(image.width, image.height, 1, 1, None)
@@ -602,7 +606,7 @@ class Win32Window(BaseWindow):
 
     def dispatch_pending_events(self):
         while self._event_queue:
-            event = self._event_queue.pop(0)
+            event = self._event_queue.popleft()
             if type(event[0]) is str:
                 # pyglet event
                 EventDispatcher.dispatch_event(self, *event)
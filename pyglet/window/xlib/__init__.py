@@ -43,6 +43,7 @@ import unicodedata
 import warnings
 
 import pyglet
+from pyglet.gl import lib as gl_lib
 from pyglet.window import WindowException, NoSuchDisplayException, \
     MouseCursorException, MouseCursor, \
     DefaultMouseCursor, ImageMouseCursor, BaseWindow, _PlatformEventHandler, \
@@ -498,6 +499,7 @@ class XlibWindow(BaseWindow):
         # TODO canvas.flip?
         if self.context:
             self.context.flip()
+            gl_lib.end_frame('Window.flip')
 
         self._sync_resize()
 
@@ -733,6 +735,8 @@ class XlibWindow(BaseWindow):
         return XlibMouseCursor(cursor)
 
     def set_icon(self, *images):
+        from pyglet.image.convert import to_bytes
+
         # Careful!  XChangeProperty takes an array of long when data type
         # is 32-bit (but long can be 64 bit!), so pad high bytes of format if
         # necessary.
@@ -752,7 +756,7 @@ class XlibWindow(BaseWindow):
             s = c_buffer(sizeof(c_ulong) * 2)
             memmove(s, cast((c_ulong * 2)(image.width, image.height), 
                             POINTER(c_ubyte)), len(s))
-            data += s.raw + image.get_data(format, pitch)
+            data += s.raw + to_bytes(image.get_data(format, pitch))
         buffer = (c_ubyte * len(data))()
         memmove(buffer, data, len(data))
         atom = xlib.XInternAtom(self._x_display, asbytes('_NET_WM_ICON'), False)
@@ -880,7 +884,7 @@ class XlibWindow(BaseWindow):
 
     def dispatch_pending_events(self):
         while self._event_queue:
-            EventDispatcher.dispatch_event(self, *self._event_queue.pop(0))
+            EventDispatcher.dispatch_event(self, *self._event_queue.popleft())
 
         # Dispatch any context-related events
         if self._lost_context:
@@ -1088,9 +1092,27 @@ class XlibWindow(BaseWindow):
     def _event_key(self, ev):
         return self._event_key_view(ev)
 
+    def _coalesce_motion(self, ev):
+        # Replace ev with the last of any motion events queued directly after
+        # it for the same window and button state.  dx and dy are measured
+        # from the last dispatched position, so the skipped events are
+        # included in them.
+        if not self.coalesce_mouse_motion or self._applied_mouse_exclusive:
+            return
+        next_ev = xlib.XEvent()
+        while xlib.XEventsQueued(self._x_display, xlib.QueuedAlready):
+            xlib.XPeekEvent(self._x_display, byref(next_ev))
+            if (next_ev.type != xlib.MotionNotify or
+                next_ev.xany.window != ev.xany.window or
+                next_ev.xmotion.state != ev.xmotion.state):
+                break
+            xlib.XNextEvent(self._x_display, byref(ev))
+            self.coalesced_event_count += 1
+
     @ViewEventHandler
     @XlibEventHandler(xlib.MotionNotify)
     def _event_motionnotify_view(self, ev):
+        self._coalesce_motion(ev)
         x = ev.xmotion.x
         y = self.height - ev.xmotion.y
 
@@ -1142,6 +1164,7 @@ class XlibWindow(BaseWindow):
     def _event_motionnotify(self, ev):
         # Window motion looks for drags that are outside the view but within
         # the window.
+        self._coalesce_motion(ev)
         buttons = 0
         if ev.xmotion.state & xlib.Button1MotionMask:
             buttons |= mouse.LEFT
@@ -0,0 +1,13 @@
+"""
+Benchmarks for CPU-side hot paths.
+
+These modules are collected by pytest like any other test, using small
+workloads so that they finish quickly.  Each can also be run directly with a
+larger workload to produce meaningful timings.
+
+`tests.benchmark.suite` times all hot paths and compares the results with
+stored JSON baselines to detect regressions::
+
+    python -m tests.benchmark.suite --save
+    python -m tests.benchmark.suite
+"""
@@ -0,0 +1,573 @@
+"""
+Benchmark suite for CPU-side hot paths, with stored baselines.
+
+Each benchmark times a number of operations on one hot path and reports the
+throughput in operations per second, and the peak memory allocated by Python
+while it runs (with ``tracemalloc``, on Python 3.4 or later).  None of the
+benchmarks need a display or a GPU, except text layout, which is skipped when
+there is no GL context.
+
+Results can be saved as a JSON baseline, and later runs compared with it::
+
+    python -m tests.benchmark.suite --save
+    python -m tests.benchmark.suite --tolerance 0.1
+    python -m tests.benchmark.suite clock event
+
+A benchmark regresses if its throughput falls below the baseline by more than
+the tolerance; the exit status is then 1.  Baselines are specific to the
+machine they were recorded on.
+"""
+from __future__ import division
+from __future__ import print_function
+
+import argparse
+import io
+import json
+import os
+import random
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+import pyglet
+# Importing pyglet.gl (which the image codecs do) would otherwise create a
+# shadow window, and fail when there is no display.
+pyglet.options['shadow_window'] = False
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+
+#: Default file for baselines.
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), 'baselines.json')
+
+if hasattr(time, 'perf_counter'):
+    _timer = time.perf_counter
+else:
+    _timer = time.time
+
+
+class SkipBenchmark(Exception):
+    """Raised by a benchmark that cannot run in this environment."""
+
+
+class Benchmark(object):
+    """A named benchmark.
+
+    `setup` is called with the number of operations, and returns a function
+    that performs them.  Only the returned function is timed.
+    """
+    def __init__(self, name, setup, n):
+        self.name = name
+        self.setup = setup
+        self.n = n
+
+    def run(self, scale=1., repeat=3):
+        """Run the benchmark, returning a dict of results."""
+        n = max(1, int(self.n * scale))
+        best = None
+        for i in range(repeat):
+            func = self.setup(n)
+            start = _timer()
+            func()
+            elapsed = _timer() - start
+            if best is None or elapsed < best:
+                best = elapsed
+
+        peak_memory = None
+        if tracemalloc is not None:
+            func = self.setup(n)
+            tracemalloc.start()
+            try:
+                func()
+                peak_memory = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+
+        return {
+            'n': n,
+            'seconds': best,
+            'ops_per_sec': n / max(best, 1e-9),
+            'peak_memory': peak_memory,
+        }
+
+
+BENCHMARKS = []
+
+
+def benchmark(name, n):
+    """Decorator registering a benchmark setup function."""
+    def decorator(setup):
+        BENCHMARKS.append(Benchmark(name, setup, n))
+        return setup
+    return decorator
+
+
+def _read_data(*path):
+    with open(os.path.join(DATA_DIR, *path), 'rb') as f:
+        return f.read()
+
+
+# Benchmarks
+# ----------------------------------------------------------------------------
+
+@benchmark('graphics.allocator.churn', 50000)
+def _allocator_churn(n):
+    from pyglet.graphics import allocation
+
+    rand = random.Random(0)
+    sizes = [rand.choice((4, 4, 4, 6, 8, 16)) for i in range(n)]
+
+    def run():
+        rand = random.Random(0)
+        allocator = allocation.Allocator(1 << 20)
+        live = []
+        for size in sizes:
+            live.append((allocator.alloc(size), size))
+            if len(live) > 1000:
+                start, size = live.pop(rand.randrange(len(live)))
+                allocator.dealloc(start, size)
+    return run
+
+
+@benchmark('graphics.batch.add', 5000)
+def _batch_add(n):
+    from pyglet import graphics
+    from pyglet.gl import GL_QUADS
+
+    vertices = [0., 0., 32., 0., 32., 32., 0., 32.]
+    tex_coords = [0., 0., 0., 1., 0., 0., 1., 1., 0., 0., 1., 0.]
+
+    def run():
+        batch = graphics.Batch()
+        for i in range(n):
+            batch.add(4, GL_QUADS, None,
+                      ('v2f/none', vertices), ('t3f/none', tex_coords))
+    return run
+
+
+@benchmark('graphics.batch.add_many', 5000)
+def _batch_add_many(n):
+    from pyglet import graphics
+    from pyglet.gl import GL_QUADS
+
+    vertices = [0., 0., 32., 0., 32., 32., 0., 32.] * n
+    tex_coords = [0., 0., 0., 1., 0., 0., 1., 1., 0., 0., 1., 0.] * n
+
+    def run():
+        batch = graphics.Batch()
+        batch.add_many(n, 4, GL_QUADS, None,
+                       ('v2f/none', vertices), ('t3f/none', tex_coords))
+    return run
+
+
+def _sprite_benchmark(sprite_class):
+    def setup(n):
+        from pyglet import graphics, image, sprite
+        from pyglet.gl import GL_TEXTURE_2D
+
+        if sprite_class != 'Sprite':
+            try:
+                import numpy
+            except ImportError:
+                raise SkipBenchmark('requires NumPy')
+
+        texture = image.Texture(64, 64, GL_TEXTURE_2D, 1)
+        region = texture.get_region(0, 0, 16, 16)
+        batch = graphics.Batch()
+        if sprite_class == 'SpriteBatch':
+            sprites = sprite.SpriteBatch(region, n, batch=batch,
+                                         subpixel=True)
+            x = numpy.arange(n) % 640
+            y = numpy.arange(n) // 640
+
+            def run():
+                sprites.update(x=x + 1, y=y, rotation=1)
+                sprites._sprite_array.update_vertices()
+            return run
+
+        cls = getattr(sprite, sprite_class)
+        sprites = [cls(region, x=i % 640, y=i // 640, batch=batch,
+                       subpixel=True)
+                   for i in range(n)]
+
+        def run():
+            for i, s in enumerate(sprites):
+                s.update(x=i % 640 + 1, y=i // 640, rotation=1)
+            if sprite_class == 'InstancedSprite':
+                sprites[0]._sprite_array.update_vertices()
+        return run
+    return setup
+
+
+def _register_sprites():
+    for name in ('Sprite', 'InstancedSprite', 'SpriteBatch'):
+        benchmark('sprite.update.%s' % name, 5000)(_sprite_benchmark(name))
+
+_register_sprites()
+
+
+@benchmark('text.runlist.set_run', 2000)
+def _runlist_set_run(n):
+    from pyglet.text import runlist
+
+    rand = random.Random(0)
+    ranges = []
+    for i in range(n):
+        start = rand.randrange(2000)
+        ranges.append((start, start + rand.randrange(1, 50), i % 7))
+
+    def run():
+        runs = runlist.RunList(2000, None)
+        for start, end, value in ranges:
+            runs.set_run(start, end, value)
+    return run
+
+
+@benchmark('text.runlist.insert_delete', 20000)
+def _runlist_insert_delete(n):
+    from pyglet.text import runlist
+
+    rand = random.Random(0)
+    positions = [rand.randrange(1000) for i in range(n)]
+
+    def run():
+        runs = runlist.RunList(1000, None)
+        for i in range(0, 1000, 10):
+            runs.set_run(i, i + 5, i)
+        for pos in positions:
+            runs.insert(pos, 5)
+            runs.delete(pos, pos + 5)
+    return run
+
+
+@benchmark('text.document.insert', 5000)
+def _document_insert(n):
+    from pyglet.text import document
+
+    styles = [{'bold': True}, {'italic': True}, {'color': (255, 0, 0, 255)},
+              {}]
+
+    def run():
+        rand = random.Random(0)
+        doc = document.FormattedDocument('')
+        for i in range(n):
+            doc.insert_text(rand.randrange(len(doc.text) + 1), 'word ',
+                            styles[i % 4])
+    return run
+
+
+@benchmark('text.layout.flow', 200)
+def _layout_flow(n):
+    from pyglet import gl
+    from pyglet.text import document, layout
+
+    if gl.current_context is None:
+        raise SkipBenchmark('requires a GL context for fonts')
+
+    doc = document.UnformattedDocument(' '.join(['lorem ipsum dolor'] * 200))
+    text_layout = layout.TextLayout(doc, width=400, multiline=True)
+
+    def run():
+        for i in range(n):
+            text_layout.width = 300 + i % 2 * 100
+    return run
+
+
+@benchmark('image.convert.rgba_bgra', 20)
+def _image_convert(n):
+    from pyglet import image
+
+    data = bytes(bytearray(range(256))) * (64 * 4 // 4)
+    img = image.ImageData(64, 64, 'RGBA', data)
+
+    def run():
+        for i in range(n):
+            img.get_data('BGRA', 64 * 4)
+    return run
+
+
+@benchmark('image.convert.rgb_pad_flip', 200)
+def _image_convert_pad_flip(n):
+    from pyglet import image
+
+    data = bytes(bytearray(range(256))) * (256 * 3)
+    img = image.ImageData(256, 256, 'RGB', data)
+
+    def run():
+        for i in range(n):
+            img.get_data('RGB', -(256 * 3 + 1))
+    return run
+
+
+@benchmark('image.convert.rgb_flip', 200)
+def _image_convert_flip(n):
+    from pyglet import image
+
+    data = bytes(bytearray(range(256))) * (256 * 3)
+    img = image.ImageData(256, 256, 'RGB', data)
+
+    def run():
+        for i in range(n):
+            img.get_data('RGB', -256 * 3)
+    return run
+
+
+def _decode_benchmark(decoder_class, filename):
+    def setup(n):
+        data = _read_data('images', filename)
+        decoder = decoder_class()
+
+        def run():
+            for i in range(n):
+                decoder.decode(io.BytesIO(data), filename)
+        return run
+    return setup
+
+
+def _register_decoders():
+    from pyglet.image.codecs.bmp import BMPImageDecoder
+    from pyglet.image.codecs.png import PNGImageDecoder
+
+    for name, n in (('rgba.png', 3), ('rgb_8bpp.png', 10), ('la.png', 5)):
+        benchmark('image.png.decode.%s' % name, n)(
+            _decode_benchmark(PNGImageDecoder, name))
+    for name, n in (('rgb_8bpp.bmp', 3), ('rgb_24bpp.bmp', 50),
+                    ('rgba_32bpp.bmp', 50), ('rgb_16bpp.bmp', 3)):
+        benchmark('image.bmp.decode.%s' % name, n)(
+            _decode_benchmark(BMPImageDecoder, name))
+
+_register_decoders()
+
+
+@benchmark('clock.schedule_once', 50000)
+def _clock_schedule(n):
+    from pyglet import clock
+
+    rand = random.Random(0)
+    delays = [rand.uniform(0, 1) for i in range(n)]
+    callbacks = [lambda dt: None for i in range(n)]
+
+    def run():
+        time_value = [0.]
+        c = clock.Clock(time_function=lambda: time_value[0])
+        for callback, delay in zip(callbacks, delays):
+            c.schedule_once(callback, delay)
+        for callback in callbacks[::2]:
+            c.unschedule(callback)
+        while time_value[0] < 1.:
+            time_value[0] += 1 / 60.
+            c.tick()
+    return run
+
+
+@benchmark('clock.schedule_interval_soft', 5000)
+def _clock_schedule_soft(n):
+    from pyglet import clock
+
+    callbacks = [lambda dt: None for i in range(n)]
+
+    def run():
+        c = clock.Clock(time_function=lambda: 0.)
+        for callback in callbacks:
+            c.schedule_interval_soft(callback, 1.)
+    return run
+
+
+@benchmark('clock.tick', 20000)
+def _clock_tick(n):
+    from pyglet import clock
+
+    def run():
+        time_value = [0.]
+        c = clock.Clock(time_function=lambda: time_value[0])
+        for i in range(20):
+            c.schedule(lambda dt: None)
+            c.schedule_interval(lambda dt: None, 0.05 + i * 0.01)
+        for i in range(n):
+            time_value[0] += 1 / 60.
+            c.tick()
+    return run
+
+
+@benchmark('event.dispatch_event', 200000)
+def _event_dispatch(n):
+    from pyglet import event
+
+    class Dispatcher(event.EventDispatcher):
+        def on_motion(self, x, y):
+            pass
+    Dispatcher.register_event_type('on_motion')
+    Dispatcher.register_event_type('on_other')
+
+    dispatcher = Dispatcher()
+    for i in range(4):
+        dispatcher.push_handlers(on_other=lambda: None)
+        dispatcher.push_handlers(on_motion=lambda x, y: None)
+
+    def run():
+        dispatch_event = dispatcher.dispatch_event
+        for i in range(n):
+            dispatch_event('on_motion', i, i)
+    return run
+
+
+@benchmark('media.wave.decode', 200)
+def _wave_decode(n):
+    from pyglet.media.sources.riff import WaveSource
+
+    data = _read_data('media', 'alert.wav')
+
+    def run():
+        for i in range(n):
+            source = WaveSource('alert.wav', file=io.BytesIO(data))
+            while source.get_audio_data(4096):
+                pass
+    return run
+
+
+@benchmark('media.procedural.sine', 10)
+def _procedural_decode(n):
+    from pyglet.media.sources import procedural
+
+    def run():
+        for i in range(n):
+            source = procedural.Sine(0.5)
+            while source.get_audio_data(4096):
+                pass
+    return run
+
+
+# Running and comparing
+# ----------------------------------------------------------------------------
+
+def select(names=None):
+    """Get the benchmarks whose names start with any of the given names."""
+    if not names:
+        return list(BENCHMARKS)
+    return [b for b in BENCHMARKS
+            if any(b.name.startswith(name) for name in names)]
+
+
+def run_benchmarks(benchmarks, scale=1., repeat=3, file=None):
+    """Run benchmarks, returning a dict of results by name.
+
+    Skipped benchmarks are reported to `file` and omitted from the results.
+    """
+    results = {}
+    for b in benchmarks:
+        try:
+            results[b.name] = b.run(scale, repeat)
+        except SkipBenchmark as e:
+            if file is not None:
+                print('%-36s skipped: %s' % (b.name, e), file=file)
+    return results
+
+
+def compare(results, baselines, tolerance=0.2):
+    """Compare results with baselines.
+
+    Results are only compared with baselines recorded with the same number
+    of operations (that is, the same ``--scale``); throughput at a different
+    workload size mostly reflects setup and timer overhead.
+
+    :return: A dict of ``(ratio, status)`` by benchmark name, where ratio is
+        the throughput relative to the baseline (or None), and status is one
+        of ``'new'``, ``'incomparable'``, ``'ok'``, ``'faster'`` and
+        ``'regressed'``.
+    """
+    comparison = {}
+    for name, result in results.items():
+        baseline = baselines.get(name)
+        if baseline is None:
+            comparison[name] = None, 'new'
+            continue
+        if baseline.get('n') != result.get('n'):
+            comparison[name] = None, 'incomparable'
+            continue
+        ratio = result['ops_per_sec'] / baseline['ops_per_sec']
+        if ratio < 1 - tolerance:
+            status = 'regressed'
+        elif ratio > 1 + tolerance:
+            status = 'faster'
+        else:
+            status = 'ok'
+        comparison[name] = ratio, status
+    return comparison
+
+
+def load_baselines(filename):
+    """Load baselines saved by `save_baselines`, or {} if there are none."""
+    if not os.path.exists(filename):
+        return {}
+    with open(filename) as f:
+        return json.load(f)['benchmarks']
+
+
+def save_baselines(filename, results, baselines=None):
+    """Save results as baselines, keeping other existing baselines."""
+    benchmarks = dict(baselines or {})
+    benchmarks.update(results)
+    with open(filename, 'w') as f:
+        json.dump({
+            'python': sys.version.split()[0],
+            'pyglet': pyglet.version,
+            'platform': sys.platform,
+            'benchmarks': benchmarks,
+        }, f, indent=2, sort_keys=True)
+
+
+def print_report(results, comparison, file=None):
+    file = file or sys.stdout
+    print('%-36s %14s %10s %10s  %s' % (
+        'benchmark', 'ops/s', 'baseline', 'peak KiB', 'status'), file=file)
+    for name in sorted(results):
+        result = results[name]
+        ratio, status = comparison[name]
+        if result['peak_memory'] is None:
+            peak = '-'
+        else:
+            peak = '%.0f' % (result['peak_memory'] / 1024)
+        print('%-36s %14.0f %10s %10s  %s' % (
+            name, result['ops_per_sec'],
+            '-' if ratio is None else '%+.0f%%' % ((ratio - 1) * 100),
+            peak, status), file=file)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run pyglet benchmarks and compare with baselines.')
+    parser.add_argument('names', nargs='*',
+                        help='run only benchmarks starting with these names')
+    parser.add_argument('--baseline', default=BASELINE_FILE,
+                        help='baseline JSON file (default: %(default)s)')
+    parser.add_argument('--save', action='store_true',
+                        help='save the results as baselines')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed fractional slowdown (default: 0.2)')
+    parser.add_argument('--scale', type=float, default=1.,
+                        help='multiply the number of operations')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='number of timed runs; the best is kept')
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines(args.baseline)
+    results = run_benchmarks(select(args.names), args.scale, args.repeat,
+                             sys.stdout)
+    comparison = compare(results, baselines, args.tolerance)
+    print_report(results, comparison)
+
+    if args.save:
+        save_baselines(args.baseline, results, baselines)
+        print('Saved baselines to %s' % args.baseline)
+        return 0
+
+    regressed = [name for name, (ratio, status) in comparison.items()
+                 if status == 'regressed']
+    return 1 if regressed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
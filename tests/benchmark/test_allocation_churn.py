@@ -0,0 +1,59 @@
+"""
+Checks `pyglet.graphics.allocation` under the churn of the
+``graphics.allocator.churn`` benchmark in `tests.benchmark.suite`: many live
+regions of sprite-like sizes, some of which are replaced every frame.
+"""
+import random
+
+from pyglet.graphics import allocation
+
+SIZES = (4, 4, 4, 4, 6, 8)
+
+
+def _nearest_pow2(v):
+    p = 1
+    while p < v:
+        p <<= 1
+    return p
+
+
+def _alloc(allocator, size):
+    # Grow the way VertexDomain._safe_alloc does.
+    try:
+        return allocator.alloc(size)
+    except allocation.AllocatorMemoryException as e:
+        allocator.set_capacity(_nearest_pow2(e.requested_capacity))
+        return allocator.alloc(size)
+
+
+def churn(allocator_class, live_count, frames, churn_per_frame, seed=1):
+    rand = random.Random(seed)
+    allocator = allocator_class(16)
+    regions = []
+    for i in range(live_count):
+        size = rand.choice(SIZES)
+        regions.append((_alloc(allocator, size), size))
+    for frame in range(frames):
+        for i in range(churn_per_frame):
+            index = rand.randrange(live_count)
+            start, size = regions[index]
+            allocator.dealloc(start, size)
+            size = rand.choice(SIZES)
+            regions[index] = (_alloc(allocator, size), size)
+        allocator.get_allocated_regions()
+    return allocator, regions
+
+
+def test_allocation_churn():
+    for allocator_class in (allocation.LinearAllocator, allocation.Allocator):
+        allocator, regions = churn(allocator_class, 2000, 10, 100)
+        # Live regions must not overlap, and the allocator must account for
+        # exactly the space they use.
+        regions = sorted(regions)
+        for (start, size), (next_start, _) in zip(regions, regions[1:]):
+            assert start + size <= next_start
+        assert (allocator.capacity - allocator.get_free_size() ==
+                sum(size for start, size in regions))
+
+        starts, sizes = allocator.get_allocated_regions()
+        assert sum(sizes) == sum(size for start, size in regions)
@@ -0,0 +1,36 @@
+"""
+Checks that `pyglet.graphics.Batch.add_many`, timed by the
+``graphics.batch.add_many`` benchmark in `tests.benchmark.suite`, creates the
+same vertex lists as one `Batch.add` call per list.
+"""
+from pyglet import graphics
+from pyglet.gl import GL_QUADS
+
+
+def tile_data(n):
+    vertices = []
+    tex_coords = []
+    for i in range(n):
+        x = (i % 256) * 32.
+        y = (i // 256) * 32.
+        vertices.extend((x, y, x + 32., y, x + 32., y + 32., x, y + 32.))
+        tex_coords.extend((0., 0., 0., 1., 0., 0., 1., 1., 0., 0., 1., 0.))
+    return vertices, tex_coords
+
+
+def test_bulk_creation():
+    n = 1000
+    vertices, tex_coords = tile_data(n)
+    batch = graphics.Batch()
+    each_lists = [batch.add(4, GL_QUADS, None,
+                            ('v2f/none', vertices[i * 8:(i + 1) * 8]),
+                            ('t3f/none', tex_coords[i * 12:(i + 1) * 12]))
+                  for i in range(n)]
+    many_lists = graphics.Batch().add_many(n, 4, GL_QUADS, None,
+                                           ('v2f/none', vertices),
+                                           ('t3f/none', tex_coords))
+
+    assert len(each_lists) == len(many_lists)
+    for each_list, many_list in zip(each_lists, many_lists):
+        assert list(each_list.vertices) == list(many_list.vertices)
+        assert list(each_list.tex_coords) == list(many_list.tex_coords)
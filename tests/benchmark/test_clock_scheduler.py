@@ -0,0 +1,31 @@
+"""
+Checks a `pyglet.clock.Clock` with the many timers of the ``clock``
+benchmarks in `tests.benchmark.suite`: one-shot timers at random delays, half
+of them unscheduled, then soft interval timers.
+"""
+import random
+
+from pyglet import clock
+
+
+def test_clock_scheduler():
+    n = 2000
+    rand = random.Random(0)
+    time_value = [0.]
+    c = clock.Clock(time_function=lambda: time_value[0])
+    c.tick()
+    called = []
+    callbacks = [lambda dt, i=i: called.append(i) for i in range(n)]
+
+    for callback in callbacks:
+        c.schedule_once(callback, rand.uniform(0, 10))
+    for callback in callbacks[::2]:
+        c.unschedule(callback)
+    while time_value[0] < 11:
+        time_value[0] += 1 / 60.
+        c.tick()
+    assert sorted(called) == list(range(1, n, 2))
+
+    for callback in callbacks:
+        c.schedule_interval_soft(callback, 1.)
+    assert len(c._sorted_times) == n
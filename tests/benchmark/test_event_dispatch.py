@@ -0,0 +1,67 @@
+"""
+Checks that `pyglet.event.EventDispatcher.dispatch_event`, timed by the
+``event.dispatch_event`` benchmark in `tests.benchmark.suite`, calls the same
+handlers as the uncached implementation of pyglet 1.2, which searched the
+handler stack on every call.
+"""
+from pyglet import event
+
+
+class _Dispatcher(event.EventDispatcher):
+    def on_mouse_motion(self, x, y, dx, dy):
+        pass
+
+_Dispatcher.register_event_type('on_mouse_motion')
+_Dispatcher.register_event_type('on_draw')
+
+
+def dispatch_uncached(dispatcher, event_type, *args):
+    invoked = False
+    for frame in list(dispatcher._event_stack):
+        handler = frame.get(event_type, None)
+        if handler:
+            try:
+                invoked = True
+                if handler(*args):
+                    return event.EVENT_HANDLED
+            except TypeError:
+                dispatcher._raise_dispatch_exception(event_type, args, handler)
+    if hasattr(dispatcher, event_type):
+        try:
+            invoked = True
+            if getattr(dispatcher, event_type)(*args):
+                return event.EVENT_HANDLED
+        except TypeError:
+            dispatcher._raise_dispatch_exception(
+                event_type, args, getattr(dispatcher, event_type))
+    if invoked:
+        return event.EVENT_UNHANDLED
+    return False
+
+
+def create_dispatcher(calls):
+    def on_mouse_motion(x, y, dx, dy):
+        calls.append(x)
+
+    def on_draw():
+        pass
+
+    dispatcher = _Dispatcher()
+    for i in range(4):
+        dispatcher.push_handlers(on_draw=on_draw)
+        dispatcher.push_handlers(on_mouse_motion=on_mouse_motion)
+    return dispatcher
+
+
+def test_event_dispatch():
+    cached_calls = []
+    dispatcher = create_dispatcher(cached_calls)
+    for i in range(100):
+        dispatcher.dispatch_event('on_mouse_motion', i, 0, 1, 1)
+
+    uncached_calls = []
+    dispatcher = create_dispatcher(uncached_calls)
+    for i in range(100):
+        dispatch_uncached(dispatcher, 'on_mouse_motion', i, 0, 1, 1)
+
+    assert cached_calls == uncached_calls
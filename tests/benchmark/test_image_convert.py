@@ -0,0 +1,55 @@
+"""
+Checks that the compiled converters of `pyglet.image.convert`, timed by the
+``image.convert`` benchmarks in `tests.benchmark.suite`, give the same
+results as the regular expression substitutions used by pyglet 1.2.
+"""
+import re
+
+from pyglet.image import convert
+
+
+def convert_regex(data, width, src_format, src_pitch, dst_format, dst_pitch):
+    # Component swizzle, row padding and row reversal of pyglet 1.2 (only
+    # the cases needed by this benchmark).
+    if src_format != dst_format:
+        repl = b''.join([('\\%d' % (src_format.index(c) + 1)).encode()
+                         for c in dst_format])
+        pattern = re.compile(b'(.)' * len(src_format), re.DOTALL)
+        data = pattern.sub(repl, data)
+    if dst_pitch != src_pitch:
+        diff = abs(dst_pitch) - abs(src_pitch)
+        if diff > 0:
+            pattern = re.compile(
+                ('(%s)' % ('.' * abs(src_pitch))).encode(), re.DOTALL)
+            data = pattern.sub(b'\\1' + b'\0' * diff, data)
+        if src_pitch * dst_pitch < 0:
+            rows = re.findall(b'.' * abs(dst_pitch), data, re.DOTALL)
+            rows.reverse()
+            data = b''.join(rows)
+    return data
+
+
+def convert_compiled(data, width, src_format, src_pitch,
+                     dst_format, dst_pitch):
+    return convert.convert(data, width, src_format, src_pitch,
+                           dst_format, dst_pitch)
+
+
+CONVERSIONS = [
+    ('swizzle', 'RGBA', 'BGRA', 0, 1),
+    ('flip', 'RGBA', 'RGBA', 0, -1),
+    ('pad+flip', 'RGB', 'RGB', 1, -1),
+]
+
+
+def test_image_convert():
+    size = 64
+    data = bytes(bytearray(range(256))) * (size * size * 4 // 256)
+    for name, src_format, dst_format, pad, sign in CONVERSIONS:
+        src_pitch = size * len(src_format)
+        dst_pitch = sign * (size * len(dst_format) + pad)
+        src_data = data[:src_pitch * size]
+        assert (convert_compiled(src_data, size, src_format, src_pitch,
+                                 dst_format, dst_pitch) ==
+                convert_regex(src_data, size, src_format, src_pitch,
+                              dst_format, dst_pitch))
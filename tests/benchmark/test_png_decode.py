@@ -0,0 +1,68 @@
+"""
+Checks that `pyglet.image.codecs.png.PNGImageDecoder`, timed by the
+``image.png`` benchmarks in `tests.benchmark.suite`, decodes scanlines using
+each of the PNG filter types like the PyPNG ``asDirect`` path of pyglet 1.2.
+"""
+import array
+import io
+import itertools
+import random
+import struct
+import zlib
+
+import pyglet.extlibs.png as pypng
+from pyglet.image.codecs.png import PNGImageDecoder
+
+FILTERS = [
+    ('none', [0]),
+    ('sub', [1]),
+    ('up', [2]),
+    ('average', [3]),
+    ('paeth', [4]),
+]
+
+
+def create_png(size, filter_types):
+    # RGBA image of smooth gradients and noise, with the given filter types
+    # applied to successive scanlines.
+    rand = random.Random(0)
+    rows = []
+    for y in range(size):
+        row = array.array('B')
+        for x in range(size):
+            row.extend((x & 0xff, y & 0xff, (x + y) & 0xff,
+                        rand.randint(0, 255)))
+        rows.append(row)
+
+    raw = bytearray()
+    prev = None
+    for y, row in enumerate(rows):
+        filter_type = filter_types[y % len(filter_types)]
+        raw.extend(pypng.filter_scanline(filter_type, row, 4, prev))
+        prev = row
+
+    header = struct.pack('!2I5B', size, size, 8, 6, 0, 0, 0)
+    file = io.BytesIO()
+    pypng.write_chunks(file, [(b'IHDR', header),
+                              (b'IDAT', zlib.compress(bytes(raw))),
+                              (b'IEND', b'')])
+    return file.getvalue(), b''.join([pypng.tostring(row) for row in rows])
+
+
+def decode_pypng(data):
+    reader = pypng.Reader(file=io.BytesIO(data))
+    width, height, pixels, metadata = reader.asDirect()
+    pixels = array.array('B', itertools.chain(*pixels))
+    return pypng.tostring(pixels)
+
+
+def decode_pyglet(data):
+    image = PNGImageDecoder().decode(io.BytesIO(data), 'benchmark.png')
+    return bytes(image.get_data('RGBA', -image.width * 4))
+
+
+def test_png_decode():
+    for name, filter_types in FILTERS:
+        data, pixels = create_png(32, filter_types)
+        assert decode_pypng(data) == pixels
+        assert decode_pyglet(data) == pixels
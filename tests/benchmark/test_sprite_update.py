@@ -0,0 +1,49 @@
+"""
+Checks that `pyglet.sprite.InstancedSprite` and `pyglet.sprite.SpriteBatch`,
+timed by the ``sprite.update`` benchmarks in `tests.benchmark.suite`, compute
+the same vertices as `pyglet.sprite.Sprite` when every sprite is moved and
+rotated.  Textures are created without a GL context.
+"""
+import pytest
+
+from pyglet import graphics, image, sprite
+from pyglet.gl import GL_TEXTURE_2D
+
+
+def move(sprite_class, region, count, frames):
+    batch = graphics.Batch()
+    sprites = [sprite_class(region, x=i % 640, y=i // 640, batch=batch,
+                            subpixel=True)
+               for i in range(count)]
+    for frame in range(frames):
+        for i, s in enumerate(sprites):
+            s.update(x=i % 640 + frame, y=i // 640, rotation=frame)
+
+    if sprite_class is sprite.InstancedSprite:
+        sprites[0]._sprite_array.update_vertices()
+        vertices = sprites[0]._sprite_array.vertex_list.vertices
+        return [vertices[s._index * 8:(s._index + 1) * 8] for s in sprites]
+    return [s._vertex_list.vertices[:] for s in sprites]
+
+
+def move_batch(region, count, frames):
+    import numpy
+    sprites = sprite.SpriteBatch(region, count, batch=graphics.Batch(),
+                                 subpixel=True)
+    x = numpy.arange(count) % 640
+    y = numpy.arange(count) // 640
+    for frame in range(frames):
+        sprites.update(x=x + frame, y=y, rotation=frame)
+    sprites._sprite_array.update_vertices()
+    vertices = sprites._sprite_array.vertex_list.vertices
+    return [vertices[i * 8:(i + 1) * 8] for i in range(count)]
+
+
+def test_sprite_update():
+    numpy = pytest.importorskip('numpy')
+    texture = image.Texture(64, 64, GL_TEXTURE_2D, 1)
+    region = texture.get_region(0, 0, 16, 16)
+    expected = numpy.array(move(sprite.Sprite, region, 100, 3))
+    for vertices in (move(sprite.InstancedSprite, region, 100, 3),
+                     move_batch(region, 100, 3)):
+        assert numpy.allclose(numpy.array(vertices), expected, atol=1e-3)
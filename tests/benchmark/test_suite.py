@@ -0,0 +1,57 @@
+"""
+Checks that every benchmark of `tests.benchmark.suite` runs, with a tiny
+workload, and that results are compared with baselines correctly.
+"""
+import os
+import shutil
+import tempfile
+
+from tests.benchmark import suite
+
+
+def test_run_all():
+    results = suite.run_benchmarks(suite.BENCHMARKS, scale=0.001, repeat=1)
+    assert results
+    for name, result in results.items():
+        assert result['ops_per_sec'] > 0
+        assert result['n'] >= 1
+
+
+def test_select():
+    names = [b.name for b in suite.select(['clock', 'event.'])]
+    assert names == ['clock.schedule_once', 'clock.schedule_interval_soft',
+                     'clock.tick', 'event.dispatch_event']
+
+
+def test_compare():
+    baselines = {'a': {'ops_per_sec': 100.}, 'b': {'ops_per_sec': 100.},
+                 'c': {'ops_per_sec': 100.}}
+    results = {'a': {'ops_per_sec': 85.}, 'b': {'ops_per_sec': 75.},
+               'c': {'ops_per_sec': 130.}, 'd': {'ops_per_sec': 1.}}
+    comparison = suite.compare(results, baselines, tolerance=0.2)
+    assert comparison['a'] == (0.85, 'ok')
+    assert comparison['b'] == (0.75, 'regressed')
+    assert comparison['c'] == (1.3, 'faster')
+    assert comparison['d'] == (None, 'new')
+
+
+def test_compare_different_n():
+    baselines = {'a': {'ops_per_sec': 100., 'n': 1000}}
+    results = {'a': {'ops_per_sec': 10000., 'n': 10}}
+    comparison = suite.compare(results, baselines)
+    assert comparison['a'] == (None, 'incomparable')
+
+
+def test_save_and_load_baselines():
+    directory = tempfile.mkdtemp()
+    try:
+        filename = os.path.join(directory, 'baselines.json')
+        assert suite.load_baselines(filename) == {}
+        first = {'a': {'ops_per_sec': 1., 'peak_memory': None}}
+        suite.save_baselines(filename, first)
+        second = {'b': {'ops_per_sec': 2., 'peak_memory': 1024}}
+        suite.save_baselines(filename, second, suite.load_baselines(filename))
+        baselines = suite.load_baselines(filename)
+    finally:
+        shutil.rmtree(directory)
+    assert baselines == dict(first, **second)
@@ -19,7 +19,7 @@ class Region(object):
 
 class RegionAllocator(object):
     def __init__(self, capacity):
-        self.allocator = allocation.Allocator(capacity)
+        self.allocator = fixture.allocator_class(capacity)
         self.regions = []
 
     def check_region(self, region):
@@ -142,6 +142,8 @@ class RegionAllocator(object):
     capacity = property(lambda self: self.allocator.capacity)
 
 class AllocationTestCase(unittest.TestCase):
+    allocator_class = allocation.Allocator
+
     def setUp(self):
         global fixture
         fixture = self
@@ -425,3 +427,43 @@ class AllocationTestCase(unittest.TestCase):
             allocator.dealloc(region) 
         self.assertTrue(allocator.get_free_size() == allocator.capacity)
 
+    def test_alloc_reuses_smallest_gap(self):
+        allocator = RegionAllocator(100)
+        regions = [allocator.alloc(size) for size in (4, 8, 4, 4, 4)]
+        allocator.dealloc(regions[1])
+        allocator.dealloc(regions[3])
+        region = allocator.alloc(4)
+        if self.allocator_class is allocation.Allocator:
+            self.assertEqual(region.start, regions[3].start)
+        self.assertEqual(allocator.get_free_size(), 100 - 16)
+
+    def test_fragmentation(self):
+        allocator = RegionAllocator(16)
+        regions = [allocator.alloc(4) for i in range(3)]
+        allocator.dealloc(regions[1])
+        self.assertEqual(allocator.allocator.get_fragmented_free_size(), 4)
+        self.assertAlmostEqual(allocator.allocator.get_fragmentation(), 0.5)
+        self.assertAlmostEqual(allocator.allocator.get_usage(), 0.5)
+
+    def test_random_churn(self):
+        random.seed(2)
+        allocator = RegionAllocator(1)
+        regions = []
+        for i in range(300):
+            r = random.random()
+            if regions and r < .4:
+                region = random.choice(regions)
+                allocator.dealloc(region)
+                regions.remove(region)
+            elif regions and r < .6:
+                allocator.force_realloc(random.choice(regions),
+                                        random.randint(1, 12))
+            else:
+                regions.append(allocator.force_alloc(random.randint(1, 12)))
+        for region in regions:
+            allocator.dealloc(region)
+        self.assertTrue(allocator.get_free_size() == allocator.capacity)
+
+
+class LinearAllocationTestCase(AllocationTestCase):
+    allocator_class = allocation.LinearAllocator
@@ -0,0 +1,95 @@
+"""Tests elision of redundant state changes in a batch's draw list.
+
+Vertex lists use the ``none`` usage and the draw list is inspected rather than
+executed, so no GL context is required.
+"""
+import unittest
+
+from pyglet import graphics
+from pyglet.gl import GL_POINTS
+
+
+class StateGroup(graphics.Group):
+    def __init__(self, state, parent=None):
+        super(StateGroup, self).__init__(parent)
+        self.state = state
+
+    def set_state(self):
+        pass
+
+    def unset_state(self):
+        pass
+
+    def get_state_key(self):
+        return (self.__class__, self.state)
+
+
+class UnkeyedGroup(StateGroup):
+    def get_state_key(self):
+        return None
+
+
+class BatchDrawListTestCase(unittest.TestCase):
+    def get_calls(self, batch):
+        batch._update_draw_list()
+        calls = []
+        for func in batch._draw_list:
+            name = getattr(func, '__name__', None)
+            if name in ('set_state', 'unset_state'):
+                calls.append((name, func.__self__))
+            else:
+                calls.append('draw')
+        return calls
+
+    def add(self, batch, group):
+        return batch.add(1, GL_POINTS, group, 'v2f/none')
+
+    def test_equal_siblings(self):
+        batch = graphics.Batch()
+        parent = graphics.OrderedGroup(0)
+        a = StateGroup('texture', graphics.OrderedGroup(0, parent))
+        b = StateGroup('texture', graphics.OrderedGroup(1, parent))
+        self.add(batch, a)
+        self.add(batch, b)
+
+        self.assertEqual(self.get_calls(batch), [
+            ('set_state', a), 'draw', 'draw', ('unset_state', b)])
+        self.assertEqual(batch.state_changes, 2)
+        # Four ordered groups with no state, and one unset/set pair.
+        self.assertEqual(batch.state_changes_elided, 8)
+        self.assertEqual(batch.draw_calls, 2)
+
+    def test_different_siblings(self):
+        batch = graphics.Batch()
+        a = StateGroup('a', graphics.OrderedGroup(0))
+        b = StateGroup('b', graphics.OrderedGroup(1))
+        self.add(batch, a)
+        self.add(batch, b)
+
+        self.assertEqual(self.get_calls(batch), [
+            ('set_state', a), 'draw', ('unset_state', a),
+            ('set_state', b), 'draw', ('unset_state', b)])
+        self.assertEqual(batch.state_changes, 4)
+
+    def test_unkeyed_siblings(self):
+        batch = graphics.Batch()
+        a = UnkeyedGroup('a', graphics.OrderedGroup(0))
+        b = UnkeyedGroup('a', graphics.OrderedGroup(1))
+        self.add(batch, a)
+        self.add(batch, b)
+
+        self.assertEqual(self.get_calls(batch), [
+            ('set_state', a), 'draw', ('unset_state', a),
+            ('set_state', b), 'draw', ('unset_state', b)])
+        self.assertEqual(batch.state_changes, 4)
+
+    def test_equal_parents(self):
+        batch = graphics.Batch()
+        a = StateGroup('child', StateGroup('parent', graphics.OrderedGroup(0)))
+        b = StateGroup('child', StateGroup('parent', graphics.OrderedGroup(1)))
+        self.add(batch, a)
+        self.add(batch, b)
+
+        self.assertEqual(self.get_calls(batch), [
+            ('set_state', a.parent), ('set_state', a), 'draw', 'draw',
+            ('unset_state', b), ('unset_state', b.parent)])
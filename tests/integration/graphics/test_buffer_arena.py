@@ -0,0 +1,143 @@
+"""Tests sub-allocation of buffers from a shared `BufferArena`.
+
+Buffers are created with ``vbo=False`` (and domains with the ``none`` usage)
+so that the arena pages are vertex arrays in system memory.
+"""
+from builtins import range
+import ctypes
+import unittest
+
+from pyglet.graphics import vertexbuffer, vertexdomain
+from pyglet.gl import GL_ARRAY_BUFFER, GL_DYNAMIC_DRAW, GL_STATIC_DRAW
+
+
+def read(buffer):
+    region = buffer.get_region(0, buffer.size,
+                               ctypes.POINTER(ctypes.c_ubyte * buffer.size))
+    return list(region.array)
+
+
+def write(buffer, values):
+    data = (ctypes.c_ubyte * len(values))(*values)
+    buffer.set_data_region(data, 0, len(values))
+
+
+class BufferArenaTestCase(unittest.TestCase):
+    def setUp(self):
+        self.arena = vertexbuffer.BufferArena(page_size=256)
+
+    def create_buffer(self, size, usage=GL_DYNAMIC_DRAW):
+        return self.arena.create_buffer(size, usage=usage, vbo=False)
+
+    def test_shared_page(self):
+        a = self.create_buffer(40)
+        b = self.create_buffer(40)
+        self.assertEqual(len(self.arena.pages), 1)
+        self.assertEqual((a.offset, b.offset), (0, 48))
+        page_ptr = self.arena.pages[0].buffer.ptr
+        self.assertEqual(b.ptr, page_ptr + 48)
+
+        write(a, [1] * 40)
+        write(b, [2] * 40)
+        self.assertEqual(read(a), [1] * 40)
+        self.assertEqual(read(b), [2] * 40)
+
+    def test_usage_pages(self):
+        buffers = [self.create_buffer(16),
+                   self.create_buffer(16, usage=GL_STATIC_DRAW)]
+        self.assertEqual(len(self.arena.pages), 2)
+
+    def test_large_buffer(self):
+        buffer = self.create_buffer(1000)
+        self.assertEqual(self.arena.pages[0].buffer.size, 1008)
+        self.assertEqual(read(buffer), [0] * 1000)
+
+    def test_resize_in_place(self):
+        buffer = self.create_buffer(32)
+        write(buffer, list(range(32)))
+        buffer.resize(64)
+        self.assertEqual(buffer.offset, 0)
+        self.assertEqual(read(buffer)[:32], list(range(32)))
+
+    def test_resize_moves(self):
+        a = self.create_buffer(32)
+        b = self.create_buffer(32)
+        write(a, list(range(32)))
+        a.resize(64)
+        self.assertEqual(a.offset, 64)
+        self.assertEqual(read(a)[:32], list(range(32)))
+        self.assertEqual(read(b), [0] * 32)
+
+    def test_resize_new_page(self):
+        a = self.create_buffer(128)
+        b = self.create_buffer(128)
+        write(a, list(range(128)))
+        a.resize(200)
+        self.assertEqual(len(self.arena.pages), 2)
+        self.assertEqual(read(a)[:128], list(range(128)))
+
+    def test_delete(self):
+        a = self.create_buffer(200)
+        b = self.create_buffer(200)
+        self.assertEqual(len(self.arena.pages), 2)
+        a.delete()
+        self.assertEqual(len(self.arena.pages), 1)
+        del b
+        self.assertEqual(self.arena.pages, [])
+
+    def test_report(self):
+        buffer = self.create_buffer(64)
+        self.assertTrue('used=64' in self.arena.get_report())
+
+
+class ArenaDomainTestCase(unittest.TestCase):
+    def setUp(self):
+        self.use_arena = vertexdomain.VertexDomain.use_arena
+        vertexdomain.VertexDomain.use_arena = True
+
+    def tearDown(self):
+        vertexdomain.VertexDomain.use_arena = self.use_arena
+
+    def test_domains_share_arena(self):
+        domains = [vertexdomain.create_domain('v2f/none', 'c4B/none')
+                   for i in range(10)]
+        arena = domains[0].arena
+        self.assertTrue(arena is vertexbuffer.get_buffer_arena())
+        pages = set(id(attribute.buffer._page)
+                    for domain in domains for attribute in domain.attributes)
+        self.assertEqual(len(pages), 1)
+
+    def test_vertex_lists(self):
+        domain = vertexdomain.create_indexed_domain('v2f/none', 'c4B/none')
+        other = vertexdomain.create_domain('v2f/none')
+        vertex_lists = []
+        for i in range(20):
+            vertex_list = domain.create(4, 6)
+            vertex_list.vertices = [float(i)] * 8
+            vertex_list.colors = [i] * 16
+            vertex_list.indices = [vertex_list.start] * 6
+            vertex_lists.append(vertex_list)
+            other.create(4).vertices = [-1.] * 8
+        for i, vertex_list in enumerate(vertex_lists):
+            self.assertEqual(list(vertex_list.vertices), [float(i)] * 8)
+            self.assertEqual(list(vertex_list.colors), [i] * 16)
+            self.assertEqual(list(vertex_list.indices),
+                             [vertex_list.start] * 6)
+
+    def test_growth(self):
+        domain = vertexdomain.create_domain('v2f/none')
+        domain.create(100)
+        self.assertEqual(domain.allocator.capacity, 128)
+        self.assertEqual(domain.get_memory_usage(), (800, 1024))
+
+    def test_compact(self):
+        domain = vertexdomain.create_domain('v2f/none')
+        vertex_lists = [domain.create(4) for i in range(50)]
+        for i, vertex_list in enumerate(vertex_lists):
+            vertex_list.vertices = [float(i)] * 8
+        for vertex_list in vertex_lists[:40]:
+            vertex_list.delete()
+        domain.compact()
+        self.assertEqual(domain.allocator.capacity, 64)
+        for i, vertex_list in enumerate(vertex_lists[40:]):
+            self.assertEqual(list(vertex_list.vertices), [float(i + 40)] * 8)
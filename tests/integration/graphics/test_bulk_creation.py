@@ -0,0 +1,94 @@
+"""Tests creation of many vertex lists at once with `Batch.add_many` and
+`Batch.add_indexed_many`.
+"""
+from builtins import range
+import ctypes
+import unittest
+
+from pyglet import graphics
+from pyglet.gl import GL_QUADS, GL_TRIANGLES
+
+
+class BulkCreationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.batch = graphics.Batch()
+
+    def test_add_many(self):
+        vertices = [float(i) for i in range(3 * 4 * 2)]
+        colors = [i for i in range(3 * 4 * 3)]
+        vertex_lists = self.batch.add_many(3, 4, GL_QUADS, None,
+                                           ('v2f/none', vertices),
+                                           ('c3B/none', colors))
+        self.assertEqual(len(vertex_lists), 3)
+        domain = vertex_lists[0].domain
+        self.assertEqual(domain.allocator.get_allocated_regions(), ([0], [12]))
+        for i, vertex_list in enumerate(vertex_lists):
+            self.assertTrue(vertex_list.domain is domain)
+            self.assertEqual(vertex_list.get_size(), 4)
+            self.assertEqual(list(vertex_list.vertices),
+                             vertices[i * 8:(i + 1) * 8])
+            self.assertEqual(list(vertex_list.colors),
+                             colors[i * 12:(i + 1) * 12])
+
+    def test_add_many_ctypes(self):
+        vertices = (ctypes.c_float * 16)(*range(16))
+        vertex_lists = self.batch.add_many(2, 4, GL_QUADS, None,
+                                           ('v2f/none', vertices))
+        self.assertEqual(list(vertex_lists[1].vertices),
+                         [float(i) for i in range(8, 16)])
+
+    def test_add_many_static(self):
+        vertex_lists = self.batch.add_many(2, 1, GL_QUADS, None,
+                                           ('v2f/static', [1, 2, 3, 4]),
+                                           ('c3B/static', [5, 6, 7, 8, 9, 10]))
+        self.assertEqual(list(vertex_lists[1].vertices), [3., 4.])
+        self.assertEqual(list(vertex_lists[1].colors), [8, 9, 10])
+
+    def test_add_many_delete(self):
+        vertex_lists = self.batch.add_many(4, 4, GL_QUADS, None, 'v2f/none')
+        vertex_lists[1].delete()
+        domain = vertex_lists[0].domain
+        self.assertEqual(domain.allocator.get_allocated_regions(),
+                         ([0, 8], [4, 8]))
+        vertex_lists[2].resize(8)
+        self.assertEqual(vertex_lists[2].get_size(), 8)
+
+    def test_add_many_migrate(self):
+        vertex_lists = self.batch.add_many(2, 1, GL_QUADS, None,
+                                           ('v2f/none', [1, 2, 3, 4]))
+        group = graphics.Group()
+        self.batch.migrate(vertex_lists[1], GL_QUADS, group, self.batch)
+        self.assertFalse(vertex_lists[1].domain is vertex_lists[0].domain)
+        self.assertEqual(list(vertex_lists[1].vertices), [3., 4.])
+        self.assertEqual(list(vertex_lists[0].vertices), [1., 2.])
+
+    def test_add_many_empty(self):
+        self.assertEqual(self.batch.add_many(0, 4, GL_QUADS, None,
+                                             ('v2f/none', [])), [])
+
+    def test_add_indexed_many(self):
+        # Offset the new lists from the start of the domain.
+        self.batch.add_indexed(2, GL_TRIANGLES, None, [0, 1], 'v2f/none')
+        indices = [0, 1, 2, 0, 2, 3] * 3
+        vertex_lists = self.batch.add_indexed_many(3, 4, GL_TRIANGLES, None,
+                                                   indices, 'v2f/none')
+        for vertex_list in vertex_lists:
+            start = vertex_list.start
+            self.assertEqual(list(vertex_list.indices),
+                             [start + i for i in (0, 1, 2, 0, 2, 3)])
+        self.assertEqual([v.start for v in vertex_lists], [2, 6, 10])
+        self.assertEqual([v.index_start for v in vertex_lists], [2, 8, 14])
+
+    def test_add_indexed_many_numpy(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest('NumPy is not installed')
+        indices = numpy.tile([0, 1, 2, 0, 2, 3], 2)
+        vertices = numpy.arange(16, dtype=numpy.float32).reshape(2, 8)
+        vertex_lists = self.batch.add_indexed_many(2, 4, GL_TRIANGLES, None,
+                                                   indices,
+                                                   ('v2f/none', vertices))
+        self.assertEqual(list(vertex_lists[1].indices), [4, 5, 6, 4, 6, 7])
+        self.assertEqual(list(vertex_lists[1].vertices),
+                         [float(i) for i in range(8, 16)])
@@ -0,0 +1,139 @@
+"""Tests compaction of vertex domains.
+
+Attributes use the ``none`` usage so that the domains are backed by vertex
+arrays in system memory.
+"""
+from builtins import range
+import gc
+import random
+import unittest
+import weakref
+
+from pyglet.graphics import vertexdomain
+
+
+class VertexDomainCompactionTestCase(unittest.TestCase):
+    def create_lists(self, domain, n, *index_count):
+        vertex_lists = []
+        for i in range(n):
+            vertex_list = domain.create(4, *index_count)
+            vertex_list.vertices[:] = [float(i)] * 8
+            vertex_list.colors[:] = [i] * 12
+            vertex_lists.append(vertex_list)
+        return vertex_lists
+
+    def check_lists(self, vertex_lists, values):
+        for vertex_list, i in zip(vertex_lists, values):
+            self.assertEqual(list(vertex_list.vertices), [float(i)] * 8)
+            self.assertEqual(list(vertex_list.colors), [i] * 12)
+
+    def test_compact(self):
+        domain = vertexdomain.create_domain('v2f/none', 'c3B/none')
+        vertex_lists = self.create_lists(domain, 10)
+        for vertex_list in vertex_lists[::2]:
+            vertex_list.delete()
+        live = vertex_lists[1::2]
+        self.assertEqual(len(domain.allocator.get_allocated_regions()[0]), 5)
+
+        domain.compact()
+        self.assertEqual(domain.allocator.get_allocated_regions(), ([0], [20]))
+        self.assertEqual([v.start for v in live], [0, 4, 8, 12, 16])
+        self.assertEqual(domain.allocator.capacity, 32)
+        self.check_lists(live, range(1, 10, 2))
+
+    def test_compact_indexed(self):
+        domain = vertexdomain.create_indexed_domain('v2f/none', 'c3B/none')
+        vertex_lists = self.create_lists(domain, 10, 6)
+        for vertex_list in vertex_lists:
+            vertex_list.indices[:] = [vertex_list.start + i
+                                      for i in (0, 1, 2, 0, 2, 3)]
+        for vertex_list in vertex_lists[:5]:
+            vertex_list.delete()
+        live = vertex_lists[5:]
+
+        domain.compact()
+        self.assertEqual(domain.index_allocator.get_allocated_regions(),
+                         ([0], [30]))
+        self.check_lists(live, range(5, 10))
+        for vertex_list in live:
+            self.assertEqual(list(vertex_list.indices),
+                             [vertex_list.start + i
+                              for i in (0, 1, 2, 0, 2, 3)])
+
+    def test_needs_compact(self):
+        domain = vertexdomain.create_domain('v2f/none', 'c3B/none')
+        domain.compact_threshold = 0.5
+        vertex_lists = self.create_lists(domain, 16)
+        self.assertFalse(domain._needs_compact())
+        for vertex_list in vertex_lists[:12]:
+            vertex_list.delete()
+        self.assertTrue(domain._needs_compact())
+
+        domain.compact_threshold = None
+        self.assertFalse(domain._needs_compact())
+
+    def test_compaction_disabled_by_default(self):
+        domain = vertexdomain.create_domain('v2f/none', 'c3B/none')
+        vertex_lists = self.create_lists(domain, 16)
+        for vertex_list in vertex_lists[:12]:
+            vertex_list.delete()
+        self.assertFalse(domain._needs_compact())
+
+    def test_churn_at_capacity(self):
+        # Deleting and recreating a few lists each frame in a full domain
+        # must not compact it every frame.
+        domain = vertexdomain.create_domain('v2f/none', 'c3B/none')
+        domain.compact_threshold = 0.5
+        vertex_lists = self.create_lists(domain, 1024)
+        self.assertEqual(domain.allocator.capacity, 4096)
+        rand = random.Random(0)
+        compactions = 0
+        for frame in range(100):
+            for i in range(5):
+                vertex_lists.pop(rand.randrange(len(vertex_lists))).delete()
+            if domain._needs_compact():
+                domain.compact()
+                compactions += 1
+            vertex_lists.extend(self.create_lists(domain, 5))
+        self.assertEqual(compactions, 0)
+
+        # Deleting most of the lists still compacts, leaving room at the end.
+        for vertex_list in vertex_lists[:768]:
+            vertex_list.delete()
+        self.assertTrue(domain._needs_compact())
+        domain.compact()
+        self.assertGreater(domain.allocator.capacity, 256 * 4)
+
+    def test_compact_then_create(self):
+        domain = vertexdomain.create_domain('v2f/none', 'c3B/none')
+        vertex_lists = self.create_lists(domain, 8)
+        for vertex_list in vertex_lists[:4]:
+            vertex_list.delete()
+        domain.compact()
+        vertex_lists = vertex_lists[4:] + self.create_lists(domain, 8)
+        self.check_lists(vertex_lists[:4], range(4, 8))
+        self.check_lists(vertex_lists[4:], range(8))
+
+    def test_vertex_lists_not_kept_alive(self):
+        domain = vertexdomain.create_domain('v2f/none', 'c3B/none')
+        vertex_list = self.create_lists(domain, 1)[0]
+        ref = weakref.ref(vertex_list)
+        del vertex_list
+        self.assertTrue(ref() is None)
+
+    def test_compact_with_unknown_lists(self):
+        # Lists dropped without being deleted still hold their vertices,
+        # which must not be overwritten.
+        domain = vertexdomain.create_domain('v2f/none', 'c3B/none')
+        domain.compact_threshold = 0.5
+        vertex_lists = self.create_lists(domain, 16)
+        for vertex_list in vertex_lists[:12]:
+            vertex_list.delete()
+        del vertex_lists[12]
+        gc.collect()
+        self.assertTrue(domain._needs_compact())
+        domain.compact()
+        self.assertFalse(domain._needs_compact())
+        self.check_lists(vertex_lists[12:], range(13, 16))
+        self.assertEqual(domain.allocator.get_allocated_regions(),
+                         ([48], [16]))
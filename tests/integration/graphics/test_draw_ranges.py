@@ -0,0 +1,54 @@
+"""Tests caching of the ranges used to draw a whole vertex domain.
+"""
+from builtins import range
+import unittest
+
+from pyglet.graphics import vertexdomain
+
+
+class DrawRangesTestCase(unittest.TestCase):
+    def test_ranges_cached(self):
+        domain = vertexdomain.create_domain('v2f/none')
+        vertex_lists = [domain.create(4) for i in range(4)]
+
+        primcount, starts, sizes = domain._get_draw_ranges()
+        self.assertEqual((primcount, list(starts), list(sizes)),
+                         (1, [0], [16]))
+        self.assertEqual(domain.range_rebuild_count, 1)
+
+        # No change to the domain: the same arrays are returned.
+        self.assertTrue(domain._get_draw_ranges()[1] is starts)
+        self.assertEqual(domain.range_rebuild_count, 1)
+
+        vertex_lists[1].delete()
+        primcount, starts, sizes = domain._get_draw_ranges()
+        self.assertEqual((primcount, list(starts), list(sizes)),
+                         (2, [0, 8], [4, 8]))
+        self.assertEqual(domain.range_rebuild_count, 2)
+
+    def test_ranges_rebuilt_after_compact(self):
+        domain = vertexdomain.create_domain('v2f/none')
+        vertex_lists = [domain.create(4) for i in range(4)]
+        vertex_lists[1].delete()
+        self.assertEqual(domain._get_draw_ranges()[0], 2)
+
+        domain.compact()
+        primcount, starts, sizes = domain._get_draw_ranges()
+        self.assertEqual((primcount, list(starts), list(sizes)),
+                         (1, [0], [12]))
+
+    def test_indexed_ranges(self):
+        domain = vertexdomain.create_indexed_domain('v2f/none')
+        vertex_lists = [domain.create(4, 6) for i in range(3)]
+        vertex_lists[1].delete()
+
+        primcount, starts, sizes = domain._get_draw_ranges()
+        ptr = domain.index_buffer.ptr
+        size = domain.index_element_size
+        self.assertEqual(primcount, 2)
+        self.assertEqual(list(starts), [ptr, ptr + 12 * size])
+        self.assertEqual(list(sizes), [6, 6])
+        self.assertEqual(domain.range_rebuild_count, 1)
+
+        domain._get_draw_ranges()
+        self.assertEqual(domain.range_rebuild_count, 1)
@@ -0,0 +1,73 @@
+"""Tests NumPy views of vertex list attributes.
+"""
+from builtins import range
+import unittest
+
+import pytest
+
+from pyglet.graphics import vertexdomain
+
+numpy = pytest.importorskip('numpy')
+
+
+class NumpyArraysTestCase(unittest.TestCase):
+    def create_domain(self, *formats):
+        domain = vertexdomain.create_domain(*formats)
+        domain.numpy_arrays = True
+        return domain
+
+    def test_contiguous(self):
+        domain = self.create_domain('v2f/none', 'c4B/none')
+        domain.create(2)
+        vertex_list = domain.create(3)
+
+        vertices = vertex_list.vertices
+        self.assertTrue(isinstance(vertices, numpy.ndarray))
+        self.assertEqual(vertices.shape, (6,))
+        self.assertEqual(vertices.dtype, numpy.float32)
+
+        vertices[:] = numpy.arange(6)
+        region = domain.attribute_names['vertices'].get_region(
+            domain.attribute_names['vertices'].buffer, vertex_list.start, 3)
+        self.assertEqual(list(region.array), [0., 1., 2., 3., 4., 5.])
+
+        vertex_list.colors = [255] * 12
+        self.assertEqual(list(vertex_list.colors), [255] * 12)
+
+    def test_interleaved(self):
+        domain = self.create_domain('v2f/static', 'c4B/static')
+        vertex_list = domain.create(4)
+
+        # Interleaved attributes keep flat indexing, as without NumPy.
+        vertex_list.vertices[:] = list(range(8))
+        self.assertEqual(vertex_list.vertices[:][::2], [0., 2., 4., 6.])
+        vertex_list.colors[:] = numpy.array([1, 2, 3, 4] * 4)
+        self.assertEqual(list(vertex_list.colors[:4]), [1, 2, 3, 4])
+
+        # get_numpy_region views them with a row per vertex.
+        attribute = domain.attribute_names['vertices']
+        region = attribute.get_numpy_region(attribute.buffer,
+                                            vertex_list.start, 4)
+        self.assertEqual(region.array.shape, (4, 2))
+        region.array[:, 1] = 10
+        self.assertEqual(list(vertex_list.vertices[:]),
+                         [0., 10., 2., 10., 4., 10., 6., 10.])
+
+    def test_indices(self):
+        domain = vertexdomain.create_indexed_domain('v2f/none')
+        domain.numpy_arrays = True
+        vertex_list = domain.create(4, 6)
+        vertex_list.indices[:] = numpy.array([0, 1, 2, 0, 2, 3]) + \
+            vertex_list.start
+        self.assertTrue(isinstance(vertex_list.indices, numpy.ndarray))
+        region = domain.get_index_region(vertex_list.index_start, 6)
+        self.assertEqual(list(region.array),
+                         [vertex_list.start + i for i in (0, 1, 2, 0, 2, 3)])
+
+    def test_views_follow_resize(self):
+        domain = self.create_domain('v2f/none')
+        vertex_list = domain.create(2)
+        vertex_list.vertices[:] = [1, 2, 3, 4]
+        for i in range(10):
+            domain.create(4)
+        self.assertEqual(vertex_list.vertices.tolist(), [1, 2, 3, 4])
@@ -0,0 +1,38 @@
+"""Tests that text layouts work with NumPy views of vertex lists enabled.
+"""
+import unittest
+
+import pytest
+
+from pyglet import graphics
+from pyglet.graphics import vertexdomain
+from pyglet.text import document
+from pyglet.text import layout
+from pyglet import window
+
+numpy = pytest.importorskip('numpy')
+
+
+class NumpyArraysLayoutTestCase(unittest.TestCase):
+    def setUp(self):
+        self.numpy_arrays = vertexdomain.VertexDomain.numpy_arrays
+        vertexdomain.VertexDomain.numpy_arrays = True
+        self.window = window.Window(visible=False)
+
+    def tearDown(self):
+        self.window.close()
+        vertexdomain.VertexDomain.numpy_arrays = self.numpy_arrays
+
+    def test_move_layout(self):
+        batch = graphics.Batch()
+        text_layout = layout.TextLayout(
+            document.UnformattedDocument('hello world'), batch=batch)
+        vertex_list = text_layout._vertex_lists[0]
+        vertices = list(vertex_list.vertices[:])
+
+        text_layout.x = 10
+        text_layout.y = 20
+        moved = list(vertex_list.vertices[:])
+        self.assertEqual(moved[0::2], [x + 10 for x in vertices[0::2]])
+        self.assertEqual(moved[1::2], [y + 20 for y in vertices[1::2]])
+        batch.draw()
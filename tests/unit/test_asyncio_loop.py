@@ -0,0 +1,79 @@
+"""Tests running the pyglet event loop on an asyncio event loop.
+
+No windows are opened; the loop is driven by the clock and by events posted
+from another thread.
+"""
+import threading
+import unittest
+
+from pyglet import app, clock, compat_platform, event
+
+try:
+    import asyncio
+    from pyglet.app.asyncio_loop import AsyncioEventLoop
+except ImportError:
+    asyncio = None
+
+
+class _Dispatcher(event.EventDispatcher):
+    pass
+
+_Dispatcher.register_event_type('on_test')
+
+
+@unittest.skipIf(asyncio is None, 'Requires asyncio')
+@unittest.skipIf(compat_platform not in ('linux', 'linux2'), 'Requires X11')
+class AsyncioEventLoopTestCase(unittest.TestCase):
+    def setUp(self):
+        self.old_windows = app.windows
+        app.windows = app.WeakSet()
+        self.loop = asyncio.new_event_loop()
+        self.event_loop = AsyncioEventLoop(self.loop)
+        self.event_loop.clock = clock.Clock()
+
+    def tearDown(self):
+        app.windows = self.old_windows
+        self.loop.close()
+
+    def test_scheduled_exit(self):
+        calls = []
+
+        def update(dt):
+            calls.append(dt)
+            if len(calls) == 3:
+                self.event_loop.exit()
+        self.event_loop.clock.schedule_interval(update, 0.01)
+        self.event_loop.run()
+        self.assertEqual(len(calls), 3)
+        self.assertFalse(self.event_loop.is_running)
+
+    def test_posted_event(self):
+        dispatcher = _Dispatcher()
+
+        @dispatcher.event
+        def on_test(value):
+            self.event_loop.exit()
+            self.value = value
+
+        def post():
+            app.platform_event_loop.post_event(dispatcher, 'on_test', 42)
+        timer = threading.Timer(0.05, post)
+        timer.start()
+        self.event_loop.run()
+        timer.join()
+        self.assertEqual(self.value, 42)
+
+    def test_next_frame(self):
+        frames = []
+
+        def on_frame(future):
+            frames.append(len(frames))
+            if len(frames) < 3:
+                self.event_loop.next_frame().add_done_callback(on_frame)
+            else:
+                self.event_loop.exit()
+
+        exit_future = self.event_loop.start()
+        self.event_loop.next_frame().add_done_callback(on_frame)
+        self.loop.run_until_complete(exit_future)
+        self.assertEqual(frames, [0, 1, 2])
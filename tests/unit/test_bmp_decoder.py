@@ -0,0 +1,78 @@
+"""Tests the palette and bitfield decoding of `pyglet.image.codecs.bmp`."""
+import io
+import struct
+import unittest
+
+from pyglet.image.codecs import bmp
+
+
+def create_bmp(width, height, bitcount, bits, palette=(), masks=None):
+    # Version 3 bitmap with the given palette of (r, g, b) entries or
+    # BI_BITFIELDS masks.
+    if masks:
+        compression = bmp.BI_BITFIELDS
+        extra = struct.pack('<3I', *masks)
+    else:
+        compression = bmp.BI_RGB
+        extra = b''.join([struct.pack('<4B', b, g, r, 0)
+                          for r, g, b in palette])
+    offset = 14 + 40 + len(extra)
+    info = struct.pack('<I2i2H2I2i2I', 40, width, height, 1, bitcount,
+                       compression, len(bits), 0, 0, len(palette), 0)
+    header = struct.pack('<2sI2HI', b'BM', offset + len(bits), 0, 0, offset)
+    return header + info + extra + bits
+
+
+def decode(data):
+    image = bmp.BMPImageDecoder().decode(io.BytesIO(data), 'test.bmp')
+    return image.format, image.pitch, bytes(image.get_data(image.format,
+                                                           image.pitch))
+
+
+PALETTE = [(10, 11, 12), (20, 21, 22), (30, 31, 32)]
+
+
+class BMPDecoderTestCase(unittest.TestCase):
+    def test_1bit(self):
+        data = create_bmp(3, 1, 1, b'\xa0\0\0\0', PALETTE[:2])
+        format, pitch, pixels = decode(data)
+        self.assertEqual((format, pitch), ('RGB', 96))
+        self.assertEqual(pixels[:12],
+                         bytes(bytearray([20, 21, 22, 10, 11, 12,
+                                          20, 21, 22, 10, 11, 12])))
+
+    def test_4bit(self):
+        data = create_bmp(3, 1, 4, b'\x12\x00\0\0', PALETTE)
+        format, pitch, pixels = decode(data)
+        self.assertEqual((format, pitch), ('RGB', 24))
+        self.assertEqual(pixels[:9], bytes(bytearray([20, 21, 22, 30, 31, 32,
+                                                      10, 11, 12])))
+
+    def test_8bit_top_down(self):
+        data = create_bmp(2, -2, 8, b'\x00\x01\0\0\x02\x00\0\0', PALETTE)
+        format, pitch, pixels = decode(data)
+        self.assertEqual((format, pitch), ('RGB', -12))
+        self.assertEqual(pixels[:6] + pixels[12:18], bytes(bytearray(
+            [10, 11, 12, 20, 21, 22, 30, 31, 32, 10, 11, 12])))
+
+    def test_16bit_bitfields(self):
+        # RGB 565: white, pure red, pure green and pure blue.
+        bits = struct.pack('<4H', 0xffff, 0xf800, 0x07e0, 0x001f)
+        data = create_bmp(4, 1, 16, bits, masks=(0xf800, 0x07e0, 0x001f))
+        format, pitch, pixels = decode(data)
+        self.assertEqual((format, pitch), ('RGB', 12))
+        self.assertEqual(pixels, bytes(bytearray([0xf8, 0xfc, 0xf8,
+                                                  0xf8, 0, 0,
+                                                  0, 0xfc, 0,
+                                                  0, 0, 0xf8])))
+
+    def test_32bit_bitfields(self):
+        bits = struct.pack('<2I', 0x00123456, 0x00abcdef)
+        data = create_bmp(2, 1, 32, bits,
+                          masks=(0x00ff0000, 0x0000ff00, 0x000000ff))
+        self.assertEqual(decode(data)[2], bytes(bytearray(
+            [0x12, 0x34, 0x56, 0xab, 0xcd, 0xef])))
+
+    def test_truncated(self):
+        data = create_bmp(4, 4, 8, b'\0' * 16, PALETTE)
+        self.assertRaises(bmp.ImageDecodeException, decode, data[:-1])
@@ -222,6 +222,128 @@ class ClockTestCase(unittest.TestCase):
         self.assertEqual(self.callback_c.call_count, 1)
         self.assertEqual(self.callback_d.call_count, 1)
 
+    def test_get_schedule_time(self):
+        self.time = 1
+        self.clock.tick()
+        self.time = 1.1
+        self.assertEqual(self.clock.get_schedule_time(), 1)
+        self.time = 2
+        self.assertEqual(self.clock.get_schedule_time(), 2)
+
+    def test_schedule_once_order(self):
+        calls = []
+        for delay in (3, 1, 2, 1.5, 0.5):
+            self.clock.schedule_once(lambda dt, d=delay: calls.append(d), delay)
+        self.advance_clock(4)
+        self.assertEqual(calls, [0.5, 1, 1.5, 2, 3])
+
+    def test_unschedule_many(self):
+        callbacks = [mock.Mock() for i in range(200)]
+        for i, callback in enumerate(callbacks):
+            self.clock.schedule_once(callback, 1 + i * 0.001)
+        for callback in callbacks[::2]:
+            self.clock.unschedule(callback)
+        self.advance_clock(2)
+        for i, callback in enumerate(callbacks):
+            self.assertEqual(callback.call_count, i % 2)
+        self.assertEqual(self.clock.get_sleep_time(True), None)
+
+    def test_get_sleep_time_skips_unscheduled(self):
+        self.clock.schedule_once(self.callback_a, 1)
+        self.clock.schedule_once(self.callback_b, 2)
+        self.clock.unschedule(self.callback_a)
+        self.assertEqual(self.clock.get_sleep_time(True), 2)
+
+    def test_schedule_interval_soft_spread(self):
+        call_times = {}
+        def record(name):
+            return lambda dt: call_times.setdefault(name, self.time)
+        self.clock.schedule_interval(record('a'), 1)
+        self.clock.schedule_interval_soft(record('b'), 1)
+        self.clock.schedule_interval_soft(record('c'), 1)
+        self.advance_clock(2)
+        self.assertEqual(len(call_times), 3)
+        self.assertEqual(len(set(call_times.values())), 3)
+
+    def test_sorted_times_follow_schedule(self):
+        # The times used by schedule_interval_soft are updated in place as
+        # items fire, are rescheduled and are unscheduled.
+        def live_times():
+            return sorted(entry[0]
+                          for entry in self.clock._schedule_interval_items
+                          if entry[2].func is not pyglet.clock._dummy_schedule_func)
+        self.clock.schedule_interval(self.callback_a, 0.5)
+        self.clock.schedule_once(self.callback_b, 0.7)
+        self.clock.schedule_interval_soft(self.callback_c, 0.5)
+        self.clock.schedule_once(self.callback_d, 2)
+        self.assertEqual(self.clock._sorted_times, live_times())
+        self.advance_clock(1)
+        self.assertEqual(self.clock._sorted_times, live_times())
+        self.clock.unschedule(self.callback_a)
+        self.clock.unschedule(self.callback_d)
+        self.assertEqual(self.clock._sorted_times, live_times())
+        self.assertEqual(len(self.clock._sorted_times), 1)
+
+    def test_unschedule_inside_tick_not_counted(self):
+        # Items unscheduled by a callback have already left the heap, so
+        # they must not count towards rebuilding it.
+        def unschedule_all(dt):
+            for callback in callbacks:
+                self.clock.unschedule(callback)
+        callbacks = [mock.Mock() for i in range(100)]
+        self.clock.schedule_once(unschedule_all, 1)
+        for callback in callbacks:
+            self.clock.schedule_once(callback, 1)
+        self.advance_clock(2)
+        for callback in callbacks:
+            self.assertEqual(callback.call_count, 0)
+        self.assertEqual(self.clock._cancelled_count, 0)
+
+    def tick_frames(self, frame_times):
+        self.clock.update_time()
+        for dt in frame_times:
+            self.time += dt
+            self.clock.update_time()
+
+    def test_get_fps(self):
+        self.tick_frames([0.01] * 100)
+        self.assertAlmostEqual(self.clock.get_fps(), 100)
+        self.assertEqual(len(self.clock.times), 60)
+
+    def test_frame_history_limit(self):
+        class SmallHistoryClock(pyglet.clock.Clock):
+            FRAME_HISTORY = 10
+        self.clock = SmallHistoryClock(time_function=lambda: self.time)
+        self.clock.set_fps_limit(5)
+        self.tick_frames(list(range(1, 21)))
+        self.assertEqual(self.clock.get_frame_times(), list(range(11, 21)))
+        self.assertEqual(self.clock.times, [20, 19, 18, 17, 16])
+        self.assertAlmostEqual(self.clock.get_fps(), 5. / 90)
+
+    def test_frame_stats(self):
+        self.tick_frames([0.01] * 97 + [0.02, 0.03, 0.1])
+        stats = self.clock.get_frame_stats()
+        self.assertEqual(stats['frames'], 100)
+        self.assertAlmostEqual(stats['p50'], 0.01)
+        self.assertAlmostEqual(stats['p95'], 0.01)
+        self.assertAlmostEqual(stats['p99'], 0.03)
+        self.assertAlmostEqual(stats['worst'], 0.1)
+        self.assertAlmostEqual(self.clock.get_frame_time_percentile(98), 0.02)
+
+    def test_frame_stats_empty(self):
+        stats = self.clock.get_frame_stats()
+        self.assertEqual(stats['frames'], 0)
+        self.assertEqual(stats['worst'], 0)
+
+    def test_frame_budget(self):
+        self.tick_frames([0.01, 0.05])
+        self.clock.set_frame_budget(0.02, self.callback_a)
+        self.assertEqual(self.clock.get_frame_stats()['over_budget'], 1)
+        self.tick_frames([0.03, 0.01])
+        self.assertEqual(self.clock.get_frame_stats()['over_budget'], 2)
+        self.assertEqual(self.callback_a.call_count, 1)
+        self.assertAlmostEqual(self.callback_a.call_args[0][0], 0.03)
+
     @unittest.skip('Requires changes to the clock')
     def test_get_interval(self):
         self.assertEqual(self.clock.get_interval(), 0)
@@ -0,0 +1,61 @@
+"""Tests the dirty range tracking used by `MappableVertexBufferObject`.
+"""
+import unittest
+
+from pyglet.graphics.vertexbuffer import DirtyRanges
+
+
+class DirtyRangesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.ranges = DirtyRanges(merge_gap=16, max_ranges=4)
+
+    def check(self, *expected):
+        self.assertEqual(list(self.ranges), list(expected))
+
+    def test_empty(self):
+        self.check()
+        self.assertEqual(self.ranges.get_size(), 0)
+
+    def test_disjoint(self):
+        self.ranges.add(1000, 1032)
+        self.ranges.add(0, 32)
+        self.check((0, 32), (1000, 1032))
+        self.assertEqual(self.ranges.get_size(), 64)
+
+    def test_contained(self):
+        self.ranges.add(0, 100)
+        self.ranges.add(10, 20)
+        self.ranges.add(0, 100)
+        self.check((0, 100))
+
+    def test_merge_overlapping(self):
+        self.ranges.add(0, 32)
+        self.ranges.add(100, 132)
+        self.ranges.add(20, 110)
+        self.check((0, 132))
+
+    def test_merge_gap(self):
+        self.ranges.add(0, 32)
+        self.ranges.add(48, 64)
+        self.check((0, 64))
+        self.ranges.add(200, 232)
+        self.ranges.add(100, 184)
+        self.check((0, 64), (100, 232))
+
+    def test_merge_spans_several(self):
+        for start in (0, 100, 200, 300):
+            self.ranges.add(start, start + 10)
+        self.ranges.add(50, 250)
+        self.check((0, 10), (50, 250), (300, 310))
+
+    def test_max_ranges(self):
+        for start in (0, 100, 150, 300, 500):
+            self.ranges.add(start, start + 10)
+        # The closest pair is merged.
+        self.check((0, 10), (100, 160), (300, 310), (500, 510))
+
+    def test_clear(self):
+        self.ranges.add(0, 32)
+        self.ranges.clear()
+        self.check()
+        self.assertEqual(len(self.ranges), 0)
@@ -0,0 +1,60 @@
+"""Tests which windows `pyglet.app.EventLoop.idle` redraws.
+
+Windows are replaced by stand-ins that record their redraws.
+"""
+import unittest
+
+from pyglet import app, clock
+
+
+class _Window(object):
+    invalid = True
+    _legacy_invalid = True
+    coalesced_event_count = 0
+    redraw_count = 0
+
+    def switch_to(self):
+        pass
+
+    def dispatch_event(self, event_type):
+        pass
+
+    def flip(self):
+        pass
+
+
+class EventLoopRedrawTestCase(unittest.TestCase):
+    def setUp(self):
+        self.time = 0.
+        self.old_windows = app.windows
+        app.windows = app.WeakSet()
+        self.windows = [_Window() for i in range(3)]
+        for window in self.windows:
+            app.windows.add(window)
+        self.event_loop = app.EventLoop()
+        self.event_loop.clock = clock.Clock(time_function=lambda: self.time)
+        self.event_loop.clock.schedule_interval(lambda dt: None, 0.01)
+
+    def tearDown(self):
+        app.windows = self.old_windows
+
+    def idle(self):
+        self.time += 0.02
+        self.event_loop.idle()
+        return [window.redraw_count for window in self.windows]
+
+    def test_redraw_all(self):
+        self.idle()
+        for window in self.windows:
+            window.invalid = False
+        self.assertEqual(self.idle(), [2, 2, 2])
+
+    def test_redraw_invalid_only(self):
+        self.event_loop.redraw_invalid_only = True
+        self.assertEqual(self.idle(), [1, 1, 1])
+        self.assertFalse(any(window.invalid for window in self.windows))
+        self.assertEqual(self.idle(), [1, 1, 1])
+        self.windows[1].invalid = True
+        self.assertEqual(self.idle(), [1, 2, 1])
+        self.windows[2]._legacy_invalid = True
+        self.assertEqual(self.idle(), [1, 2, 2])
@@ -110,3 +110,59 @@ class EventTestCase(unittest.TestCase):
     def test_dispatch_event_not_setup(self):
         with self.assertRaises(NoHandlerException):
             self.d.dispatch_event('mock_event')
+
+    def test_dispatch_after_set_handler(self):
+        self.d.register_event_type('mock_event')
+        self.assertEqual(self.d.dispatch_event('mock_event'), False)
+        handler = mock.Mock(return_value=EVENT_HANDLED)
+        self.d.set_handler('mock_event', handler)
+        self.assertEqual(self.d.dispatch_event('mock_event'), EVENT_HANDLED)
+        self.assertEqual(handler.call_count, 1)
+
+    def test_dispatch_after_push_and_pop_handlers(self):
+        self.d.register_event_type('mock_event')
+        lower = mock.Mock(return_value=EVENT_UNHANDLED)
+        upper = mock.Mock(return_value=EVENT_HANDLED)
+        self.d.push_handlers(mock_event=lower)
+        self.d.dispatch_event('mock_event')
+        self.d.push_handlers(mock_event=upper)
+        self.d.dispatch_event('mock_event')
+        self.assertEqual((lower.call_count, upper.call_count), (1, 1))
+        self.d.pop_handlers()
+        self.d.dispatch_event('mock_event')
+        self.assertEqual((lower.call_count, upper.call_count), (2, 1))
+
+    def test_dispatch_after_remove_handler(self):
+        self.d.register_event_type('mock_event')
+        handler = mock.Mock(return_value=EVENT_UNHANDLED)
+        self.d.push_handlers(mock_event=handler)
+        self.d.dispatch_event('mock_event')
+        self.d.remove_handler('mock_event', handler)
+        self.assertEqual(self.d.dispatch_event('mock_event'), False)
+        self.d.push_handlers(mock_event=handler)
+        self.d.dispatch_event('mock_event')
+        self.d.remove_handlers(mock_event=handler)
+        self.assertEqual(self.d.dispatch_event('mock_event'), False)
+        self.assertEqual(handler.call_count, 2)
+
+    def test_remove_handler_during_dispatch(self):
+        self.d.register_event_type('mock_event')
+        lower = mock.Mock(return_value=EVENT_UNHANDLED)
+        upper = mock.Mock(side_effect=lambda: self.d.remove_handler('mock_event', lower))
+        self.d.push_handlers(mock_event=lower)
+        self.d.push_handlers(mock_event=upper)
+        self.assertEqual(self.d.dispatch_event('mock_event'), EVENT_UNHANDLED)
+        self.assertEqual((lower.call_count, upper.call_count), (0, 1))
+
+    def test_push_handlers_during_dispatch(self):
+        # As in pyglet 1.2, frames pushed by a handler are not visited until
+        # the next dispatch.
+        self.d.register_event_type('mock_event')
+        pushed = mock.Mock(return_value=EVENT_HANDLED)
+        lower = mock.Mock(return_value=EVENT_UNHANDLED)
+        upper = mock.Mock(side_effect=lambda: self.d.push_handlers(mock_event=pushed))
+        self.d.push_handlers(mock_event=lower)
+        self.d.push_handlers(mock_event=upper)
+        self.d.dispatch_event('mock_event')
+        self.assertEqual((pushed.call_count, lower.call_count, upper.call_count),
+                         (0, 1, 1))
@@ -0,0 +1,174 @@
+"""Tests the LZW decoding and frame composition of `pyglet.image.codecs.gif`."""
+import io
+import os
+import random
+import struct
+import unittest
+
+from pyglet.image.codecs import gif
+
+test_data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                             '..', 'data', 'images'))
+
+
+def encode_lzw(indices, lzw_code_size):
+    # Plain LZW encoder with variable code size, emitting a clear code first.
+    clear_code = 1 << lzw_code_size
+    table = dict((bytes(bytearray([i])), i) for i in range(clear_code))
+    next_code = clear_code + 2
+    code_size = lzw_code_size + 1
+    codes = [(clear_code, code_size)]
+    prefix = b''
+    for i in bytearray(indices):
+        entry = prefix + bytes(bytearray([i]))
+        if entry in table:
+            prefix = entry
+            continue
+        codes.append((table[prefix], code_size))
+        if next_code < 4096:
+            table[entry] = next_code
+            next_code += 1
+            if next_code > 1 << code_size and code_size < 12:
+                code_size += 1
+        prefix = bytes(bytearray([i]))
+    if prefix:
+        codes.append((table[prefix], code_size))
+    codes.append((clear_code + 1, code_size))
+
+    bits = 0
+    n_bits = 0
+    for code, size in codes:
+        bits |= code << n_bits
+        n_bits += size
+    data = bytearray()
+    for i in range((n_bits + 7) // 8):
+        data.append((bits >> (i * 8)) & 0xff)
+    return bytes(data)
+
+
+def create_gif(width, height, color_table, images):
+    # `images` is a list of (left, top, width, height, indices, disposal,
+    # transparent_index) tuples.
+    data = bytearray(b'GIF89a')
+    data += struct.pack('<HHBBB', width, height, 0x81, 0, 0)
+    data += bytearray(color_table) + bytearray(12 - len(color_table))
+    for left, top, w, h, indices, disposal, transparent in images:
+        fields = disposal << 2
+        if transparent is not None:
+            fields |= 1
+        data += struct.pack('<BBBBHBB', 0x21, 0xf9, 4, fields, 5,
+                            transparent or 0, 0)
+        data += struct.pack('<BHHHHBB', 0x2c, left, top, w, h, 0, 2)
+        lzw = encode_lzw(indices, 2)
+        for i in range(0, len(lzw), 255):
+            block = lzw[i:i + 255]
+            data += bytearray([len(block)]) + block
+        data += b'\0'
+    data += b'\x3b'
+    return bytes(data)
+
+
+def get_rows(image):
+    # Rows of RGBA pixels from top to bottom.
+    data = image.get_data('RGBA', -image.width * 4)
+    pitch = image.width * 4
+    return [bytes(bytearray(data[y * pitch:(y + 1) * pitch]))
+            for y in range(image.height)]
+
+
+COLORS = [10, 11, 12, 20, 21, 22, 30, 31, 32, 40, 41, 42]
+
+
+def rgba(*indices):
+    data = bytearray()
+    for i in indices:
+        if i is None:
+            data += bytearray(4)
+        else:
+            data += bytearray(COLORS[i * 3:i * 3 + 3] + [255])
+    return bytes(data)
+
+
+class GIFDecoderTestCase(unittest.TestCase):
+    def decode_animation(self, data):
+        return gif.GIFImageDecoder().decode_animation(io.BytesIO(data),
+                                                      'test.gif')
+
+    def test_lzw(self):
+        rand = random.Random(0)
+        for lzw_code_size, n in ((2, 100), (8, 10000), (3, 20000)):
+            indices = bytes(bytearray([rand.randint(0, (1 << lzw_code_size) - 1)
+                                       for i in range(n)]))
+            self.assertEqual(gif.decode_lzw(encode_lzw(indices, lzw_code_size),
+                                            lzw_code_size, n), indices)
+
+    def test_lzw_repeated(self):
+        indices = b'\1' * 5000
+        self.assertEqual(gif.decode_lzw(encode_lzw(indices, 2), 2, 5000),
+                         indices)
+
+    def test_lzw_truncated(self):
+        data = encode_lzw(b'\1\2\3', 2)
+        self.assertEqual(gif.decode_lzw(data, 2, 5), b'\1\2\3\0\0')
+
+    def test_lzw_invalid_code(self):
+        # Clear code followed by code 7, which is not in the table.
+        self.assertRaises(gif.ImageDecodeException, gif.decode_lzw,
+                          bytes(bytearray([0x3c, 0])), 2, 4)
+
+    def test_deinterlace(self):
+        rows = [bytes(bytearray([y])) for y in range(10)]
+        stored = [rows[y] for y in (0, 8, 4, 2, 6, 1, 3, 5, 7, 9)]
+        self.assertEqual(gif.deinterlace(b''.join(stored), 1, 10),
+                         b''.join(rows))
+
+    def test_single_frame(self):
+        data = create_gif(2, 2, COLORS,
+                          [(0, 0, 2, 2, b'\0\1\2\3', 0, None)])
+        animation = self.decode_animation(data)
+        self.assertEqual(len(animation.frames), 1)
+        self.assertIsNone(animation.frames[0].duration)
+        self.assertEqual(get_rows(animation.frames[0].image),
+                         [rgba(0, 1), rgba(2, 3)])
+
+    def test_transparency_and_disposal(self):
+        data = create_gif(3, 1, COLORS, [
+            (0, 0, 3, 1, b'\0\0\0', 0, None),
+            (1, 0, 2, 1, b'\1\3', gif.DISPOSE_PREVIOUS, 3),
+            (0, 0, 1, 1, b'\2', gif.DISPOSE_BACKGROUND, None),
+            (2, 0, 1, 1, b'\3', 0, 3),
+        ])
+        frames = self.decode_animation(data).frames
+        self.assertEqual(len(frames), 4)
+        self.assertEqual(get_rows(frames[0].image), [rgba(0, 0, 0)])
+        self.assertEqual(get_rows(frames[1].image), [rgba(0, 1, 0)])
+        self.assertEqual(get_rows(frames[2].image), [rgba(2, 0, 0)])
+        self.assertEqual(get_rows(frames[3].image), [rgba(None, 0, 0)])
+        self.assertEqual(frames[1].duration, 0.05)
+
+    def test_lazy_frames(self):
+        data = create_gif(1, 1, COLORS,
+                          [(0, 0, 1, 1, b'\0', 0, None)] * 3)
+        frames = self.decode_animation(data).frames
+        self.assertEqual(len(frames), 3)
+        self.assertEqual(len(frames._frames), 0)
+        frames[1]
+        self.assertEqual(len(frames._frames), 2)
+        self.assertEqual(len(list(frames)), 3)
+        self.assertRaises(IndexError, frames.__getitem__, 3)
+
+    def test_files(self):
+        for filename in ('8bpp.gif', 'dinosaur.gif'):
+            with open(os.path.join(test_data_dir, filename), 'rb') as f:
+                data = f.read()
+            stream = gif.read(io.BytesIO(data))
+            animation = self.decode_animation(data)
+            self.assertEqual(len(animation.frames), len(stream.images))
+            for frame in animation.frames:
+                self.assertEqual((frame.image.width, frame.image.height),
+                                 (stream.width, stream.height))
+
+    def test_no_images(self):
+        data = create_gif(1, 1, COLORS, [])
+        self.assertRaises(gif.ImageDecodeException, self.decode_animation,
+                          data)
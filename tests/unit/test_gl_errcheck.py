@@ -0,0 +1,105 @@
+"""Tests the deferred error checking and call counting of `pyglet.gl.lib`."""
+import unittest
+
+from pyglet import gl
+from pyglet.gl import lib
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+
+class _Context(object):
+    _gl_begin = False
+
+
+def glFoo():
+    pass
+
+
+def glBar():
+    pass
+
+
+class DeferredErrorCheckTestCase(unittest.TestCase):
+    def setUp(self):
+        self.errors = []
+        self.checks = 0
+        self.patches = [
+            mock.patch.object(gl, 'current_context', _Context()),
+            mock.patch.object(gl, 'glGetError', self.get_error),
+            mock.patch.object(gl, 'gluErrorString',
+                              lambda error: b'invalid enumerant'),
+            mock.patch.object(lib, '_debug_gl_deferred', True),
+            mock.patch.object(lib, '_debug_gl_check_interval', 0),
+            mock.patch.object(lib, '_debug_gl_trace', False),
+        ]
+        for patch in self.patches:
+            patch.start()
+        lib._call_history.clear()
+        lib.end_frame()
+        self.checks = 0
+
+    def tearDown(self):
+        for patch in reversed(self.patches):
+            patch.stop()
+        lib._call_history.clear()
+
+    def get_error(self):
+        self.checks += 1
+        if self.errors:
+            return self.errors.pop(0)
+        return 0
+
+    def call(self, func, *args):
+        return lib.errcheck(None, func, args)
+
+    def test_deferred_does_not_check_each_call(self):
+        for i in range(10):
+            self.call(glFoo, i)
+        self.assertEqual(self.checks, 0)
+        lib.check_error()
+        self.assertEqual(self.checks, 1)
+
+    def test_deferred_error_reports_recent_calls(self):
+        self.call(glFoo, 1)
+        lib.check_error()
+        self.call(glBar, 2, 3)
+        self.errors.append(0x500)
+        with self.assertRaises(gl.GLException) as cm:
+            lib.check_error('Batch.draw')
+        msg = str(cm.exception)
+        self.assertIn('invalid enumerant (detected at Batch.draw)', msg)
+        self.assertIn('glBar(2, 3)', msg)
+        self.assertNotIn('glFoo', msg)
+
+    def test_error_enables_per_call_checking(self):
+        self.errors.append(0x500)
+        self.assertRaises(gl.GLException, lib.check_error)
+        self.assertFalse(lib._debug_gl_deferred)
+
+        self.call(glFoo)
+        self.assertEqual(self.checks, 2)
+        self.errors.append(0x500)
+        self.assertRaises(gl.GLException, self.call, glBar)
+
+    def test_check_interval(self):
+        lib._debug_gl_check_interval = 4
+        for i in range(9):
+            self.call(glFoo)
+        self.assertEqual(self.checks, 2)
+
+    def test_no_check_inside_glbegin(self):
+        gl.current_context._gl_begin = True
+        lib.check_error()
+        self.assertEqual(self.checks, 0)
+
+    def test_frame_call_count(self):
+        for i in range(5):
+            self.call(glFoo)
+        self.assertEqual(lib.get_call_count(), 5)
+        lib.end_frame()
+        self.assertEqual(lib.get_call_count(), 0)
+        self.assertEqual(lib.get_frame_call_count(), 5)
+        self.assertEqual(self.checks, 1)
@@ -0,0 +1,92 @@
+"""Tests the pixel format conversions of `pyglet.image.convert`."""
+import ctypes
+import unittest
+
+from pyglet import image
+from pyglet.image import convert
+
+
+# 2x2 image, bottom row first: red, green / blue, white
+RGBA = bytes(bytearray([255, 0, 0, 10,     0, 255, 0, 20,
+                        0, 0, 255, 30,     255, 255, 255, 40]))
+
+
+class ConvertTestCase(unittest.TestCase):
+    def test_swizzle(self):
+        self.assertEqual(convert.convert(RGBA, 2, 'RGBA', 8, 'BGRA', 8),
+                         bytes(bytearray([0, 0, 255, 10,     0, 255, 0, 20,
+                                          255, 0, 0, 30,     255, 255, 255, 40])))
+
+    def test_drop_and_missing_components(self):
+        self.assertEqual(convert.convert(RGBA, 2, 'RGBA', 8, 'A', 2),
+                         bytes(bytearray([10, 20, 30, 40])))
+        self.assertEqual(convert.convert(RGBA, 2, 'RGBA', 8, 'LA', 4),
+                         bytes(bytearray([255, 10, 0, 20, 0, 30, 255, 40])))
+
+    def test_flip(self):
+        self.assertEqual(convert.convert(RGBA, 2, 'RGBA', 8, 'RGBA', -8),
+                         RGBA[8:] + RGBA[:8])
+
+    def test_pitch(self):
+        padded = convert.convert(RGBA, 2, 'RGBA', 8, 'RGB', 8)
+        self.assertEqual(padded,
+                         bytes(bytearray([255, 0, 0, 0, 255, 0, 0, 0,
+                                          0, 0, 255, 255, 255, 255, 0, 0])))
+        self.assertEqual(convert.convert(padded, 2, 'RGB', 8, 'RGB', -6),
+                         bytes(bytearray([0, 0, 255, 255, 255, 255,
+                                          255, 0, 0, 0, 255, 0])))
+
+    def test_converter_cached(self):
+        self.assertIs(convert.get_converter(2, 'RGBA', 8, 'BGRA', -8),
+                      convert.get_converter(2, 'RGBA', 8, 'BGRA', -8))
+
+    def test_crop(self):
+        self.assertEqual(convert.crop(RGBA, 8, 4, 1, 4, 1), RGBA[12:])
+        self.assertEqual(convert.crop(RGBA, 8, 0, 1, 8, 5), RGBA[8:])
+
+
+class ImageDataConvertTestCase(unittest.TestCase):
+    def test_get_data(self):
+        img = image.ImageData(2, 2, 'RGBA', RGBA)
+        self.assertEqual(img.get_data('RGBA', 8), RGBA)
+        self.assertEqual(img.get_data('ARGB', -8),
+                         bytes(bytearray([30, 0, 0, 255,   40, 255, 255, 255,
+                                          10, 255, 0, 0,   20, 0, 255, 0])))
+
+    def test_region(self):
+        region = image.ImageData(2, 2, 'RGBA', RGBA).get_region(1, 0, 1, 2)
+        self.assertEqual(region.get_data('RGBA', 4), RGBA[4:8] + RGBA[12:])
+
+
+class BufferDataTestCase(unittest.TestCase):
+    def test_memoryview(self):
+        data = memoryview(bytearray(RGBA))
+        img = image.ImageData(2, 2, 'RGBA', data)
+        self.assertIs(img.get_data('RGBA', 8), data)
+        self.assertEqual(img.get_data('RGBA', -8), RGBA[8:] + RGBA[:8])
+        self.assertEqual(img.data, RGBA)
+
+    def test_gl_data_not_copied(self):
+        data = bytearray(RGBA)
+        gl_data = image._get_gl_data(data)
+        self.assertEqual(ctypes.addressof(gl_data),
+                         ctypes.addressof(ctypes.c_char.from_buffer(data)))
+        self.assertIs(image._get_gl_data(RGBA), RGBA)
+
+    def test_readonly_gl_data(self):
+        gl_data = image._get_gl_data(memoryview(RGBA))
+        self.assertEqual(bytes(bytearray(gl_data)), RGBA)
+
+    def test_numpy(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest('NumPy not installed')
+        array = numpy.frombuffer(RGBA, numpy.uint8).reshape(2, 2, 4).copy()
+        img = image.ImageData(2, 2, 'RGBA', array)
+        self.assertIs(img.get_data('RGBA', 8), array)
+        self.assertEqual(img.get_data('BGRA', 8),
+                         convert.convert(RGBA, 2, 'RGBA', 8, 'BGRA', 8))
+        self.assertEqual(ctypes.addressof(image._get_gl_data(array)),
+                         array.ctypes.data)
+        self.assertRaises(ValueError, convert.get_buffer, array[:, ::-1])
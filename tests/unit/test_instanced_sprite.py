@@ -0,0 +1,245 @@
+"""Tests `pyglet.sprite.InstancedSprite` against `pyglet.sprite.Sprite`.
+
+Textures are created without a GL context; only their coordinates are used.
+"""
+from builtins import range
+import unittest
+
+import pytest
+
+from tests import mock
+
+from pyglet import graphics, image, sprite
+from pyglet.gl import GL_TEXTURE_2D
+
+numpy = pytest.importorskip('numpy')
+
+
+def create_texture(texture_id=1):
+    texture = image.Texture(64, 64, GL_TEXTURE_2D, texture_id)
+    texture.tex_coords = (0., 0., 0., 1., 0., 0., 1., 1., 0., 0., 1., 0.)
+    return texture
+
+
+class InstancedSpriteTestCase(unittest.TestCase):
+    def setUp(self):
+        self.texture = create_texture()
+        self.image = self.texture.get_region(0, 0, 16, 8)
+        self.image.anchor_x = 8
+        self.image.anchor_y = 2
+        self.batch = graphics.Batch()
+
+    def create_pair(self, **kwargs):
+        reference = sprite.Sprite(self.image, batch=graphics.Batch(),
+                                  **kwargs)
+        instanced = sprite.InstancedSprite(self.image, batch=self.batch,
+                                           **kwargs)
+        return reference, instanced
+
+    def get_record(self, instanced, attribute, size):
+        sprite_array = instanced._sprite_array
+        sprite_array.update_vertices()
+        array = getattr(sprite_array.vertex_list, attribute)
+        index = instanced._index
+        return list(array[index * size:(index + 1) * size])
+
+    def check_pair(self, reference, instanced):
+        vertices = self.get_record(instanced, 'vertices', 8)
+        for a, b in zip(vertices, reference._vertex_list.vertices):
+            self.assertAlmostEqual(a, b, places=4)
+        self.assertEqual(self.get_record(instanced, 'colors', 16),
+                         list(reference._vertex_list.colors))
+        self.assertEqual(self.get_record(instanced, 'tex_coords', 12),
+                         list(reference._vertex_list.tex_coords))
+
+    def test_transforms(self):
+        for subpixel in (False, True):
+            pairs = [self.create_pair(x=i * 3.7, y=-i * 1.3,
+                                      subpixel=subpixel)
+                     for i in range(20)]
+            for i, (reference, instanced) in enumerate(pairs):
+                for s in (reference, instanced):
+                    s.rotation = i * 17.5 if i % 3 else 0
+                    s.scale = 1.5 if i % 2 else 1.0
+                    s.opacity = i * 10
+                    s.color = (i, 2 * i, 3 * i)
+            for reference, instanced in pairs:
+                self.check_pair(reference, instanced)
+
+    def test_shared_array(self):
+        sprites = [sprite.InstancedSprite(self.image, batch=self.batch)
+                   for i in range(40)]
+        arrays = set(id(s._sprite_array) for s in sprites)
+        self.assertEqual(len(arrays), 1)
+        self.assertEqual(len(sprites[0]._sprite_array), 40)
+        self.assertEqual(len(self.batch.top_groups), 1)
+
+    def test_invisible_and_delete(self):
+        reference, instanced = self.create_pair(x=10, y=10)
+        other = sprite.InstancedSprite(self.image, x=5, batch=self.batch)
+        instanced.visible = False
+        self.assertEqual(self.get_record(instanced, 'vertices', 8), [0] * 8)
+
+        sprite_array = other._sprite_array
+        index = other._index
+        other.delete()
+        self.assertEqual(len(sprite_array), 1)
+        sprite_array.update_vertices()
+        self.assertEqual(
+            list(sprite_array.vertex_list.vertices[index * 8:index * 8 + 8]),
+            [0] * 8)
+
+    def test_empty_array_deleted(self):
+        first = sprite.InstancedSprite(self.image, batch=self.batch)
+        second = sprite.InstancedSprite(self.image, batch=self.batch)
+        sprite_array = first._sprite_array
+        vertex_list = sprite_array.vertex_list
+        first.delete()
+        self.assertIs(sprite.SpriteArray._arrays[self.batch].get(
+            sprite_array._key), sprite_array)
+        second.delete()
+        self.assertIsNone(sprite_array.vertex_list)
+        self.assertEqual(
+            vertex_list.domain.allocator.get_allocated_regions(), ([], []))
+        self.assertNotIn(self.batch, sprite.SpriteArray._arrays)
+
+        third = sprite.InstancedSprite(self.image, batch=self.batch)
+        self.assertIsNot(third._sprite_array, sprite_array)
+
+    def test_draw(self):
+        instanced = sprite.InstancedSprite(self.image, batch=self.batch)
+        other = sprite.InstancedSprite(self.image, x=5, batch=self.batch)
+        vertex_list = other._sprite_array.vertex_list
+        with mock.patch.object(sprite.SpriteGroup, 'set_state'), \
+                mock.patch.object(sprite.SpriteGroup, 'unset_state'), \
+                mock.patch.object(vertex_list.domain, 'draw') as draw:
+            other.draw()
+        (mode, vertex_range), kwargs = draw.call_args
+        self.assertEqual(mode, sprite.GL_QUADS)
+        self.assertEqual((vertex_range.start, vertex_range.count),
+                         (vertex_list.start + other._index * 4, 4))
+        # The array was brought up to date before drawing.
+        self.assertFalse(other._sprite_array._vertices_dirty)
+
+    def test_change_texture(self):
+        reference, instanced = self.create_pair(x=10, y=20)
+        old_array = instanced._sprite_array
+        other_image = create_texture(2).get_region(0, 0, 32, 32)
+        reference.image = other_image
+        instanced.image = other_image
+        self.assertFalse(instanced._sprite_array is old_array)
+        self.assertEqual(len(old_array), 0)
+        self.check_pair(reference, instanced)
+
+        region = other_image.owner.get_region(32, 32, 16, 16)
+        reference.image = region
+        instanced.image = region
+        self.check_pair(reference, instanced)
+
+    def test_requires_batch(self):
+        self.assertRaises(AssertionError, sprite.InstancedSprite, self.image)
+
+
+class SpriteBatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.texture = create_texture()
+        self.images = [self.texture.get_region(i * 16, 0, 16, 16)
+                       for i in range(4)]
+        for img in self.images:
+            img.anchor_x = 4
+        self.batch = graphics.Batch()
+
+    def get_vertices(self, sprites):
+        sprite_array = sprites._sprite_array
+        sprite_array.update_vertices()
+        vertices = list(sprite_array.vertex_list.vertices)
+        return [vertices[i * 8:(i + 1) * 8] for i in range(len(sprites))]
+
+    def test_matches_sprites(self):
+        count = 30
+        images = [self.images[i % 4] for i in range(count)]
+        x = numpy.linspace(-50, 50, count)
+        y = numpy.linspace(10, 20, count)
+        rotation = numpy.arange(count) * 13.
+        scale = 1 + numpy.arange(count) % 3 / 2.
+        visible = numpy.arange(count) % 4 != 0
+
+        for subpixel in (False, True):
+            sprites = sprite.SpriteBatch(images, batch=self.batch,
+                                         subpixel=subpixel)
+            sprites.update(x=x, y=y, rotation=rotation)
+            sprites.scale = scale
+            sprites.visible = visible
+            sprites.opacity = 128
+            vertices = self.get_vertices(sprites)
+            colors = list(sprites._sprite_array.vertex_list.colors)
+
+            for i in range(count):
+                reference = sprite.Sprite(images[i], x=x[i], y=y[i],
+                                          batch=graphics.Batch(),
+                                          subpixel=subpixel)
+                reference.rotation = rotation[i]
+                reference.scale = scale[i]
+                reference.visible = visible[i]
+                reference.opacity = 128
+                for a, b in zip(vertices[i], reference._vertex_list.vertices):
+                    self.assertAlmostEqual(a, b, places=4)
+                self.assertEqual(colors[i * 16:(i + 1) * 16],
+                                 list(reference._vertex_list.colors))
+
+    def test_single_image(self):
+        sprites = sprite.SpriteBatch(self.images[0], 40, batch=self.batch)
+        self.assertEqual(len(sprites), 40)
+        self.assertEqual(sprites.x.shape, (40,))
+        sprites.x = 100
+        self.assertEqual(self.get_vertices(sprites)[39][:2], [96, 0])
+
+    def test_empty(self):
+        sprites = sprite.SpriteBatch(self.images[0], 0, batch=self.batch)
+        self.assertEqual(len(sprites), 0)
+        self.assertEqual(sprites.x.shape, (0,))
+        sprites.x = 100
+        self.assertEqual(self.get_vertices(sprites), [])
+        self.assertRaises(ValueError, sprite.SpriteBatch, [],
+                          batch=self.batch)
+
+    def test_in_place(self):
+        sprites = sprite.SpriteBatch(self.images[:2], batch=self.batch)
+        self.get_vertices(sprites)
+        sprites.y[1] = 5
+        sprites.color[0] = (1, 2, 3)
+        sprites.invalidate()
+        self.assertEqual(self.get_vertices(sprites)[1][1], 5)
+        self.assertEqual(list(sprites._sprite_array.vertex_list.colors[:4]),
+                         [1, 2, 3, 255])
+
+    def test_set_images(self):
+        sprites = sprite.SpriteBatch(self.images[:2], batch=self.batch)
+        sprites.set_images([0], [self.images[3]])
+        sprite_array = sprites._sprite_array
+        sprite_array.update_vertices()
+        self.assertEqual(list(sprite_array.vertex_list.tex_coords[:12]),
+                         list(self.images[3].tex_coords))
+        other = create_texture(2)
+        self.assertRaises(AssertionError, sprites.set_images, [0], [other])
+
+
+class NumpyArraysSpriteTestCase(unittest.TestCase):
+    def setUp(self):
+        self.numpy_arrays = graphics.vertexdomain.VertexDomain.numpy_arrays
+        graphics.vertexdomain.VertexDomain.numpy_arrays = True
+
+    def tearDown(self):
+        graphics.vertexdomain.VertexDomain.numpy_arrays = self.numpy_arrays
+
+    def test_static_sprite(self):
+        texture = create_texture()
+        for usage in ('static', 'dynamic'):
+            s = sprite.Sprite(texture.get_region(0, 0, 16, 16), x=10, y=20,
+                              batch=graphics.Batch(), usage=usage)
+            s.update(x=30, scale=2)
+            s.color = (1, 2, 3)
+            s.image = texture.get_region(16, 0, 16, 16)
+            self.assertEqual(list(s._vertex_list.vertices[:]),
+                             [30, 20, 62, 20, 62, 52, 30, 52])
+            self.assertEqual(list(s._vertex_list.colors[:4]), [1, 2, 3, 255])
@@ -0,0 +1,114 @@
+"""Tests the direct decoding path of `pyglet.image.codecs.png`."""
+import array
+import io
+import itertools
+import os
+import random
+import struct
+import unittest
+import zlib
+
+import pyglet.extlibs.png as pypng
+from pyglet.image.codecs import png
+
+test_data_dir = os.path.abspath(os.path.join(os.path.dirname(__file__),
+                                             '..', 'data', 'images'))
+
+
+def encode(width, height, rows, bitdepth, color_type, unit, filter_types,
+           chunks=()):
+    # Write a PNG whose scanlines use the given filter types in turn.
+    raw = bytearray()
+    prev = None
+    for y, row in enumerate(rows):
+        filter_type = filter_types[y % len(filter_types)]
+        raw.extend(pypng.filter_scanline(filter_type, row, unit, prev))
+        prev = row
+    header = struct.pack('!2I5B', width, height, bitdepth, color_type,
+                         0, 0, 0)
+    file = io.BytesIO()
+    pypng.write_chunks(file, [(b'IHDR', header)] + list(chunks) +
+                             [(b'IDAT', zlib.compress(bytes(raw))),
+                              (b'IEND', b'')])
+    return file.getvalue()
+
+
+def decode(data):
+    image = png.PNGImageDecoder().decode(io.BytesIO(data), 'test.png')
+    return image.format, bytes(image.get_data(image.format, image.pitch))
+
+
+class PNGDecoderTestCase(unittest.TestCase):
+    def decode_pypng(self, data):
+        reader = pypng.Reader(file=io.BytesIO(data))
+        width, height, pixels, metadata = reader.asDirect()
+        return pypng.tostring(array.array('B', itertools.chain(*pixels)))
+
+    def test_images(self):
+        for filename, format in (('l.png', 'L'), ('la.png', 'LA'),
+                                 ('rgb.png', 'RGB'), ('rgba.png', 'RGBA'),
+                                 ('rgb_8bpp.png', 'RGB'),
+                                 ('rgb_8bpp_trans.png', 'RGBA')):
+            with open(os.path.join(test_data_dir, filename), 'rb') as f:
+                data = f.read()
+            self.assertEqual(decode(data), (format, self.decode_pypng(data)),
+                             filename)
+
+    def test_filters(self):
+        rand = random.Random(0)
+        for unit, color_type in ((1, 0), (2, 4), (3, 2), (4, 6)):
+            rows = [bytearray([rand.randint(0, 255) for i in range(9 * unit)])
+                    for j in range(10)]
+            data = encode(9, 10, rows, 8, color_type, unit, [0, 1, 2, 3, 4])
+            self.assertEqual(decode(data)[1], b''.join(map(bytes, rows)))
+
+    def test_diagonals(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest('NumPy not installed')
+        rand = random.Random(0)
+        for width, height, unit in ((1, 5, 1), (7, 3, 4), (3, 9, 3)):
+            row_bytes = width * unit
+            raw = bytes(bytearray(itertools.chain(*[
+                [rand.randint(0, 4)] +
+                [rand.randint(0, 255) for i in range(row_bytes)]
+                for y in range(height)])))
+            self.assertEqual(
+                png._unfilter_diagonals(numpy, raw, height, row_bytes, unit),
+                png._unfilter_rows(raw, height, row_bytes, unit))
+
+    def test_greyscale_2bit(self):
+        # Samples 0, 1, 2, 3 in a row of 5 pixels, padded to 2 bytes.
+        rows = [bytearray([0x1b, 0xc0])]
+        data = encode(5, 1, rows, 2, 0, 1, [0])
+        self.assertEqual(decode(data),
+                         ('L', bytes(bytearray([0, 85, 170, 255, 255]))))
+
+    def test_palette_4bit_transparency(self):
+        rows = [bytearray([0x01, 0x20])]
+        data = encode(3, 1, rows, 4, 3, 1, [0], [
+            (b'PLTE', bytes(bytearray([10, 11, 12, 20, 21, 22, 30, 31, 32]))),
+            (b'tRNS', bytes(bytearray([0])))])
+        self.assertEqual(decode(data), ('RGBA', bytes(bytearray(
+            [10, 11, 12, 0, 20, 21, 22, 255, 30, 31, 32, 255]))))
+
+    def test_rgb_transparency(self):
+        rows = [bytearray([1, 2, 3, 1, 2, 4])]
+        data = encode(2, 1, rows, 8, 2, 3, [1], [
+            (b'tRNS', struct.pack('!3H', 1, 2, 3))])
+        self.assertEqual(decode(data), ('RGBA', bytes(bytearray(
+            [1, 2, 3, 0, 1, 2, 4, 255]))))
+
+    def test_16bit(self):
+        rows = [bytearray([0x12, 0x34, 0xab, 0xcd])]
+        data = encode(2, 1, rows, 16, 0, 2, [2])
+        self.assertEqual(decode(data), ('L', bytes(bytearray([0x12, 0xab]))))
+
+    def test_16bit_transparency(self):
+        # Only the first pixel matches the transparent colour on both bytes.
+        rows = [bytearray([0x12, 0x34, 0x12, 0x35, 0x13, 0x34])]
+        data = encode(3, 1, rows, 16, 0, 2, [0], [
+            (b'tRNS', struct.pack('!H', 0x1234))])
+        self.assertEqual(decode(data), ('LA', bytes(bytearray(
+            [0x12, 0, 0x12, 255, 0x13, 255]))))
@@ -0,0 +1,142 @@
+"""Tests the frame profiler of `pyglet.profiler`."""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from pyglet import clock, profiler
+
+
+class _Output(object):
+    def __init__(self):
+        self.text = ''
+
+    def write(self, text):
+        self.text += text
+
+
+class FrameProfilerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.time = 0.
+        self.profiler = profiler.FrameProfiler(
+            capacity=16, time_function=lambda: self.time)
+
+    def record(self, name, duration):
+        self.profiler.begin(name)
+        self.time += duration
+        self.profiler.end()
+
+    def test_nested_spans(self):
+        self.profiler.next_frame()
+        with self.profiler.span('update'):
+            self.record('physics', 0.002)
+            self.record('ai', 0.001)
+        self.record('draw', 0.005)
+        self.profiler.next_frame()
+        self.assertEqual(self.profiler.get_spans(), [
+            (1, 'frame', 0., 0.008, 0),
+            (1, 'update', 0., 0.003, 1),
+            (1, 'physics', 0., 0.002, 2),
+            (1, 'ai', 0.002, 0.003, 2),
+            (1, 'draw', 0.003, 0.008, 1),
+        ])
+
+    def test_open_spans_ended_by_next_frame(self):
+        self.profiler.next_frame()
+        self.profiler.begin('update')
+        self.time += 0.01
+        self.profiler.next_frame()
+        spans = self.profiler.get_spans()
+        self.assertEqual([span[1] for span in spans], ['frame', 'update'])
+        self.assertEqual(self.profiler.frame, 2)
+
+    def test_ring_buffer(self):
+        for i in range(20):
+            self.record('span%d' % i, 0.001)
+        spans = self.profiler.get_spans()
+        self.assertEqual(len(spans), 16)
+        self.assertEqual(spans[0][1], 'span4')
+        self.assertEqual(spans[-1][1], 'span19')
+
+    def test_overwritten_open_span(self):
+        self.profiler.begin('outer')
+        for i in range(20):
+            self.record('span%d' % i, 0.001)
+        self.profiler.end()
+        self.assertEqual(len(self.profiler.get_spans()), 16)
+        self.assertTrue('outer' not in
+                        [span[1] for span in self.profiler.get_spans()])
+
+    def test_frame_summary(self):
+        for i in range(3):
+            self.profiler.next_frame()
+            self.record('update', 0.001)
+            self.record('update', 0.002)
+            self.record('draw', 0.004 * i)
+        self.profiler.next_frame()
+        summary = self.profiler.get_frame_summary()
+        self.assertEqual([frame for frame, times in summary], [1, 2, 3])
+        frame, times = summary[2]
+        self.assertAlmostEqual(times['frame'], 0.011)
+        self.assertAlmostEqual(times['update'], 0.003)
+        self.assertAlmostEqual(times['draw'], 0.008)
+
+        output = _Output()
+        self.profiler.print_summary(frames=2, file=output)
+        lines = output.text.splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(lines[0].split(), ['frame', 'total', 'ms',
+                                            'draw', 'update'])
+        self.assertEqual(lines[2].split(), ['3', '11.00', '8.00', '3.00'])
+
+    def test_chrome_trace(self):
+        self.profiler.next_frame()
+        self.record('draw', 0.005)
+        directory = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(directory, 'trace.json')
+            self.profiler.dump_chrome_trace(filename)
+            with open(filename) as f:
+                trace = json.load(f)
+        finally:
+            shutil.rmtree(directory)
+        events = trace['traceEvents']
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]['name'], 'draw')
+        self.assertEqual(events[0]['ph'], 'X')
+        self.assertAlmostEqual(events[0]['dur'], 5000)
+        self.assertEqual(events[0]['args'], {'frame': 1})
+
+
+class ProfilerModuleTestCase(unittest.TestCase):
+    def setUp(self):
+        self.old_state = profiler.enabled, profiler.profiler
+        profiler.profiler = None
+
+    def tearDown(self):
+        profiler.enabled, profiler.profiler = self.old_state
+
+    def test_disabled(self):
+        self.assertFalse(profiler.enabled)
+        with profiler.span('draw'):
+            pass
+        profiler.next_frame()
+        self.assertTrue(profiler.profiler is None)
+
+    def test_clock_spans(self):
+        def update(dt):
+            pass
+
+        profiler.enable(capacity=64)
+        c = clock.Clock(time_function=lambda: 0.)
+        c.schedule(update)
+        c.schedule_once(update, 0)
+        profiler.next_frame()
+        c.tick()
+        profiler.disable()
+        c.tick()
+        profiler.profiler.next_frame()
+        names = [span[1] for span in profiler.profiler.get_spans()]
+        self.assertEqual(names, ['frame', profiler.get_func_name(update),
+                                 profiler.get_func_name(update)])
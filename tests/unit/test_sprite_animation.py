@@ -0,0 +1,155 @@
+"""Tests the animation of sprites by `pyglet.sprite.AnimationManager`.
+
+Textures are created without a GL context; only their coordinates are used.
+"""
+from builtins import range
+import unittest
+
+from pyglet import clock, graphics, image, sprite
+from pyglet.gl import GL_TEXTURE_2D
+
+
+class SpriteAnimationTestCase(unittest.TestCase):
+    def setUp(self):
+        self.time = 0.
+        self.old_clock = clock.get_default()
+        self.clock = clock.Clock(time_function=lambda: self.time)
+        clock.set_default(self.clock)
+        self.clock.tick()
+        self.old_manager = sprite.animation_manager
+        sprite.animation_manager = sprite.AnimationManager()
+
+        texture = image.Texture(64, 64, GL_TEXTURE_2D, 1)
+        self.frames = [texture.get_region(i * 16, 0, 16, 16)
+                       for i in range(4)]
+        self.animation = image.Animation.from_image_sequence(self.frames, 0.1)
+        self.batch = graphics.Batch()
+        self.ends = []
+
+    def tearDown(self):
+        clock.set_default(self.old_clock)
+        sprite.animation_manager = self.old_manager
+
+    def advance(self, dt, steps=1):
+        for i in range(steps):
+            self.time += dt / steps
+            self.clock.tick()
+
+    def scheduled_items(self):
+        return [entry for entry in self.clock._schedule_interval_items
+                if entry[2].func is not clock._dummy_schedule_func]
+
+    def create_sprite(self, img=None, sprite_class=sprite.Sprite):
+        s = sprite_class(img or self.animation, batch=self.batch)
+
+        @s.event
+        def on_animation_end():
+            self.ends.append(s)
+        return s
+
+    def test_frames(self):
+        s = self.create_sprite()
+        self.assertTrue(s._texture is self.frames[0])
+        self.advance(0.1)
+        self.assertTrue(s._texture is self.frames[1])
+        self.advance(0.2, 2)
+        self.assertTrue(s._texture is self.frames[3])
+        self.assertEqual(self.ends, [])
+        self.advance(0.1)
+        self.assertTrue(s._texture is self.frames[0])
+        self.assertEqual(self.ends, [s])
+        self.assertEqual(list(s._vertex_list.tex_coords),
+                         list(self.frames[0].tex_coords))
+
+    def test_single_clock_item(self):
+        sprites = [self.create_sprite() for i in range(100)]
+        self.assertEqual(len(self.scheduled_items()), 1)
+        self.advance(0.05)
+        more = [self.create_sprite() for i in range(100)]
+        self.assertEqual(len(self.scheduled_items()), 1)
+        self.advance(0.05)
+        self.assertTrue(all(s._texture is self.frames[1] for s in sprites))
+        self.assertTrue(all(s._texture is self.frames[0] for s in more))
+        self.advance(0.05)
+        self.assertTrue(all(s._texture is self.frames[1] for s in more))
+
+    def test_late_tick(self):
+        s = self.create_sprite()
+        self.advance(0.15)
+        self.assertTrue(s._texture is self.frames[1])
+        # Frame 1 is due at 0.2, keeping the original schedule.
+        self.advance(0.05)
+        self.assertTrue(s._texture is self.frames[2])
+
+    def test_no_loop(self):
+        animation = image.Animation.from_image_sequence(self.frames[:2], 0.1,
+                                                        loop=False)
+        s = self.create_sprite(animation)
+        self.advance(0.1)
+        self.assertTrue(s._texture is self.frames[1])
+        self.assertEqual(self.ends, [s])
+        self.advance(1)
+        self.assertTrue(s._texture is self.frames[1])
+        self.assertEqual(self.ends, [s])
+        self.assertEqual(self.scheduled_items(), [])
+
+    def test_delete(self):
+        a = self.create_sprite()
+        b = self.create_sprite()
+        a.delete()
+        self.advance(0.1)
+        self.assertTrue(b._texture is self.frames[1])
+        b.image = self.frames[3]
+        self.advance(0.1)
+        self.assertTrue(b._texture is self.frames[3])
+        self.assertEqual(self.scheduled_items(), [])
+
+    def test_delete_in_handler(self):
+        a = self.create_sprite()
+        b = self.create_sprite()
+
+        @a.event
+        def on_animation_end():
+            a.delete()
+        self.advance(0.4, 4)
+        self.assertTrue(a._texture is None)
+        self.assertTrue(b._texture is self.frames[0])
+        self.advance(0.1)
+        self.assertTrue(b._texture is self.frames[1])
+
+    def test_instanced_sprite(self):
+        try:
+            import numpy
+        except ImportError:
+            self.skipTest('NumPy is not installed')
+        s = self.create_sprite(sprite_class=sprite.InstancedSprite)
+        self.advance(0.1)
+        self.assertTrue(s._texture is self.frames[1])
+        sprite_array = s._sprite_array
+        self.assertEqual(list(sprite_array.tex_coords[s._index]),
+                         list(self.frames[1].tex_coords))
+
+    def test_quantum(self):
+        # Both frame changes round up to 7 / 60 seconds.
+        self.advance(0.002)
+        a = self.create_sprite()
+        self.advance(0.004)
+        b = self.create_sprite()
+        self.assertTrue(a._animation_cohort is b._animation_cohort)
+        self.advance(0.11)
+        self.assertTrue(a._texture is self.frames[0])
+        self.advance(0.01)
+        for s in (a, b):
+            self.assertTrue(s._texture is self.frames[1])
+            self.assertEqual(list(s._vertex_list.tex_coords),
+                             list(self.frames[1].tex_coords))
+
+    def test_mixed_batches(self):
+        other_batch = graphics.Batch()
+        sprites = [self.create_sprite() for i in range(3)]
+        sprites.append(sprite.Sprite(self.animation, batch=other_batch))
+        self.advance(0.1)
+        for s in sprites:
+            self.assertTrue(s._texture is self.frames[1])
+            self.assertEqual(list(s._vertex_list.tex_coords),
+                             list(self.frames[1].tex_coords))
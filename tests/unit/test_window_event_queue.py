@@ -0,0 +1,53 @@
+"""Tests the queue of events of `pyglet.window.BaseWindow`.
+
+The window is not created; only its event queue is used.
+"""
+from collections import deque
+import unittest
+
+from pyglet import window
+
+
+class WindowEventQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        self.window = window.BaseWindow.__new__(window.BaseWindow)
+        self.window._event_queue = deque()
+
+    def queue(self, *events):
+        for event in events:
+            self.window.dispatch_event(*event)
+        return list(self.window._event_queue)
+
+    def test_no_coalescing(self):
+        events = [('on_mouse_motion', 1, 1, 1, 1),
+                  ('on_mouse_motion', 2, 3, 1, 2)]
+        self.assertEqual(self.queue(*events), events)
+        self.assertEqual(self.window.coalesced_event_count, 0)
+
+    def test_coalesce_motion(self):
+        self.window.coalesce_mouse_motion = True
+        self.assertEqual(self.queue(('on_mouse_motion', 1, 1, 1, 1),
+                                    ('on_mouse_motion', 2, 3, 1, 2),
+                                    ('on_mouse_motion', 5, 3, 3, 0)),
+                         [('on_mouse_motion', 5, 3, 5, 3)])
+        self.assertEqual(self.window.coalesced_event_count, 2)
+
+    def test_coalesce_drag(self):
+        self.window.coalesce_mouse_motion = True
+        self.assertEqual(self.queue(('on_mouse_drag', 1, 1, 1, 1, 1, 0),
+                                    ('on_mouse_drag', 2, 2, 1, 1, 1, 0),
+                                    ('on_mouse_drag', 3, 3, 1, 1, 4, 0),
+                                    ('on_mouse_motion', 4, 4, 1, 1)),
+                         [('on_mouse_drag', 2, 2, 2, 2, 1, 0),
+                          ('on_mouse_drag', 3, 3, 1, 1, 4, 0),
+                          ('on_mouse_motion', 4, 4, 1, 1)])
+        self.assertEqual(self.window.coalesced_event_count, 1)
+
+    def test_coalesce_keeps_order(self):
+        self.window.coalesce_mouse_motion = True
+        self.assertEqual(self.queue(('on_mouse_motion', 1, 1, 1, 1),
+                                    ('on_mouse_press', 1, 1, 1, 0),
+                                    ('on_mouse_motion', 2, 2, 1, 1)),
+                         [('on_mouse_motion', 1, 1, 1, 1),
+                          ('on_mouse_press', 1, 1, 1, 0),
+                          ('on_mouse_motion', 2, 2, 1, 1)])